@@ -5,3 +5,6 @@ class AppAdsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app_ads"
     verbose_name = "Доска объявлений"
+
+    def ready(self):
+        from app_ads import signals  # noqa: F401
@@ -0,0 +1,291 @@
+from functools import wraps
+from typing import Any, Callable, Dict, Type
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db.models import Count, Max, Q, QuerySet
+from django.db.models.functions import Greatest
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseBase
+from django_filters.utils import translate_validation
+from rest_framework import exceptions, status
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.request import Request
+from rest_framework.serializers import Serializer
+
+from app_users.authentication import AsyncJWTAuthentication
+from config.db_router import is_pinned_to_primary, read_from_primary
+from config.renderers import FastJSONRenderer
+
+from .cache import aget_ads_version, get_ads_list_cache_key
+from .conditional import aconditional_get, make_etag
+from .filters import AdFilter
+from .models import Ad, Review
+from .pagination import ReviewPagination, get_ad_pagination_class
+from .serializers import AdListSerializer, AdSerializer, ReviewSerializer
+
+authentication = AsyncJWTAuthentication()
+
+
+def render_json(data: Any, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+    """
+    Возвращает JSON-ответ, побайтно совпадающий с ответом DRF.
+    :param data: Данные ответа.
+    :param status_code: Код ответа.
+    """
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status_code,
+        content_type="application/json",
+    )
+
+
+def async_api_view(authentication_required: bool = False) -> Callable:
+    """
+    Декоратор асинхронного представления только для чтения (GET, HEAD).
+    Аутентифицирует пользователя по JWT-токену без блокирующих запросов к базе данных
+    и преобразует исключения DRF в ответы того же формата, что и у синхронного API.
+    :param authentication_required: Требуется ли аутентификация.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponseBase:
+            try:
+                if request.method not in ("GET", "HEAD"):
+                    raise exceptions.MethodNotAllowed(request.method)
+
+                user_auth = await authentication.aauthenticate(request)
+                request.user = user_auth[0] if user_auth else AnonymousUser()
+                if authentication_required and not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+
+                return await view(request, *args, **kwargs)
+            except Http404:
+                return handle_exception(request, exceptions.NotFound())
+            except exceptions.APIException as exc:
+                return handle_exception(request, exc)
+
+        return wrapper
+
+    return decorator
+
+
+def handle_exception(
+    request: HttpRequest, exc: exceptions.APIException
+) -> HttpResponse:
+    """
+    Формирует ответ на исключение DRF так же, как стандартный обработчик исключений.
+    :param request: HTTP-запрос.
+    :param exc: Исключение.
+    """
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    response = render_json(data, exc.status_code)
+
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response["WWW-Authenticate"] = authentication.authenticate_header(request)
+    if isinstance(exc, exceptions.MethodNotAllowed):
+        response["Allow"] = "GET, HEAD"
+    return response
+
+
+def get_page(paginator: Paginator, page_number: str, last_page_strings: tuple) -> Page:
+    """
+    Возвращает страницу пагинатора.
+    Выполняется в отдельном потоке: подсчет количества объектов синхронный,
+    а EstimatedCountPaginator выбирает строки страницы при ее создании.
+    """
+    if page_number in last_page_strings:
+        page_number = paginator.num_pages
+    page = paginator.page(page_number)
+    # Количество объектов нужно для ответа, а его подсчет синхронный.
+    paginator.count
+    return page
+
+
+async def paginate(
+    request: HttpRequest,
+    queryset: QuerySet,
+    pagination_class: Type[BasePagination],
+    serializer_class: Type[Serializer],
+) -> Dict[str, Any]:
+    """
+    Возвращает страницу сериализованных объектов в формате пагинации DRF.
+    Строки страницы загружаются через .values() и сериализуются
+    без создания экземпляров моделей.
+    Подсчет количества, выборка строк страницы (EstimatedCountPaginator
+    выбирает их при создании страницы) и курсорная пагинация выполняются
+    синхронным ORM в отдельном потоке через sync_to_async: запросы к базе данных
+    не становятся асинхронными, но не блокируют цикл событий.
+    :param request: HTTP-запрос.
+    :param queryset: Выборка объектов.
+    :param pagination_class: Класс пагинации.
+    :param serializer_class: Класс сериализатора с ValuesSerializerMixin.
+    """
+    serializer = serializer_class(context={"request": request})
+    drf_request = Request(request)
+    pagination = pagination_class()
+    if isinstance(pagination, CursorPagination):
+        ordering = pagination.get_ordering(drf_request, queryset, None)
+        queryset = serializer.get_values_queryset(
+            queryset, *(name.lstrip("-") for name in ordering)
+        )
+        rows = await sync_to_async(pagination.paginate_queryset)(queryset, drf_request)
+        return pagination.get_paginated_response(serializer.serialize_values(rows)).data
+
+    queryset = serializer.get_values_queryset(queryset)
+    paginator = pagination.django_paginator_class(
+        queryset, pagination.get_page_size(drf_request)
+    )
+    page_number = request.GET.get(pagination.page_query_param, 1)
+    try:
+        page = await sync_to_async(get_page)(
+            paginator, page_number, pagination.last_page_strings
+        )
+    except InvalidPage as exc:
+        raise exceptions.NotFound(
+            pagination.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+        )
+
+    if isinstance(page.object_list, QuerySet):
+        rows = [row async for row in page.object_list]
+    else:
+        rows = page.object_list
+    pagination.page = page
+    pagination.request = drf_request
+    return pagination.get_paginated_response(serializer.serialize_values(rows)).data
+
+
+@async_api_view()
+async def ad_list(request: HttpRequest) -> HttpResponseBase:
+    """
+    Асинхронно возвращает список объявлений.
+    Поддерживает фильтры, сортировку, постраничную и курсорную пагинацию,
+    кэш страниц и ETag синхронного эндпоинта /api/ads/.
+    Кэшируемая страница строится по основной базе данных.
+    :param request: HTTP-запрос.
+    """
+    cache_key = get_ads_list_cache_key(request, await aget_ads_version())
+
+    async def get_response() -> HttpResponse:
+        data = None if is_pinned_to_primary() else await cache.aget(cache_key)
+        if data is None:
+            filterset = AdFilter(request.GET, queryset=Ad.get_visible_ads())
+            if not filterset.is_valid():
+                raise translate_validation(filterset.errors)
+            with read_from_primary():
+                data = await paginate(
+                    request,
+                    filterset.qs,
+                    get_ad_pagination_class(request.GET),
+                    AdListSerializer,
+                )
+            await cache.aset(cache_key, data, settings.ADS_LIST_CACHE_TIMEOUT)
+        return render_json(data)
+
+    return await aconditional_get(request, get_response, etag=make_etag(cache_key))
+
+
+@async_api_view(authentication_required=True)
+async def ad_detail(request: HttpRequest, pk: int) -> HttpResponseBase:
+    """
+    Асинхронно возвращает объявление.
+    :param request: HTTP-запрос.
+    :param pk: Идентификатор объявления.
+    """
+    ad = (
+        await Ad.get_visible_ads()
+        .filter(pk=pk)
+        .annotate(last_modified=Greatest("updated_at", "author__updated_at"))
+        .afirst()
+    )
+    if ad is None:
+        raise Http404
+
+    async def get_response() -> HttpResponse:
+        return render_json(AdSerializer(ad, context={"request": request}).data)
+
+    return await aconditional_get(
+        request,
+        get_response,
+        etag=make_etag("ad", pk, ad.last_modified.isoformat()),
+        last_modified=ad.last_modified,
+    )
+
+
+@async_api_view(authentication_required=True)
+async def review_list(request: HttpRequest, ad_pk: int) -> HttpResponseBase:
+    """
+    Асинхронно возвращает список отзывов к объявлению.
+    :param request: HTTP-запрос.
+    :param ad_pk: Идентификатор объявления.
+    """
+    version = (
+        await Ad.objects.filter(pk=ad_pk)
+        .order_by()
+        .annotate(
+            count=Count("reviews", filter=Q(reviews__is_hidden=False)),
+            last_modified=Max(
+                Greatest("reviews__updated_at", "reviews__author__updated_at")
+            ),
+        )
+        .values("count", "last_modified")
+        .afirst()
+    )
+    if version is None:
+        raise Http404
+
+    async def get_response() -> HttpResponse:
+        queryset = Review.get_ad_reviews(ad_pk)
+        data = await paginate(request, queryset, ReviewPagination, ReviewSerializer)
+        return render_json(data)
+
+    if version["last_modified"] is None:
+        return await get_response()
+    return await aconditional_get(
+        request,
+        get_response,
+        etag=make_etag(
+            "reviews",
+            ad_pk,
+            version["count"],
+            version["last_modified"].isoformat(),
+            request.GET.urlencode(),
+        ),
+        last_modified=version["last_modified"],
+    )
+
+
+@async_api_view(authentication_required=True)
+async def review_detail(request: HttpRequest, ad_pk: int, pk: int) -> HttpResponseBase:
+    """
+    Асинхронно возвращает отзыв.
+    :param request: HTTP-запрос.
+    :param ad_pk: Идентификатор объявления.
+    :param pk: Идентификатор отзыва.
+    """
+    review = (
+        await Review.get_ad_reviews(ad_pk)
+        .filter(pk=pk)
+        .annotate(last_modified=Greatest("updated_at", "author__updated_at"))
+        .afirst()
+    )
+    if review is None:
+        raise Http404
+
+    async def get_response() -> HttpResponse:
+        return render_json(ReviewSerializer(review, context={"request": request}).data)
+
+    return await aconditional_get(
+        request,
+        get_response,
+        etag=make_etag("review", pk, review.last_modified.isoformat()),
+        last_modified=review.last_modified,
+    )
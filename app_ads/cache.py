@@ -0,0 +1,57 @@
+from typing import Optional
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.http import HttpRequest
+
+ADS_VERSION_KEY = "ads:version"
+
+
+def get_ads_version() -> int:
+    """
+    Возвращает текущую версию данных объявлений.
+    """
+    return cache.get_or_set(ADS_VERSION_KEY, 1, timeout=None)
+
+
+async def aget_ads_version() -> int:
+    """
+    Асинхронно возвращает текущую версию данных объявлений.
+    """
+    return await cache.aget_or_set(ADS_VERSION_KEY, 1, timeout=None)
+
+
+def bump_ads_version() -> None:
+    """
+    Увеличивает версию данных объявлений.
+    Все ранее закэшированные страницы списка становятся недоступными,
+    без перебора ключей кэша.
+    """
+    try:
+        cache.incr(ADS_VERSION_KEY)
+    except ValueError:
+        cache.add(ADS_VERSION_KEY, 1, timeout=None)
+        cache.incr(ADS_VERSION_KEY)
+
+
+def get_ads_list_cache_key(request: HttpRequest, version: Optional[int] = None) -> str:
+    """
+    Формирует ключ кэша страницы списка объявлений.
+    Ключ включает версию данных, адрес страницы
+    и нормализованную строку запроса (параметры отсортированы, пустые отброшены).
+    Значения кодируются заново, поэтому закодированные в значении '&' и '='
+    не совпадают с разделителями параметров.
+    :param request: HTTP-запрос.
+    :param version: Версия данных объявлений, если уже получена.
+    """
+    if version is None:
+        version = get_ads_version()
+    params = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        for value in values
+        if value != ""
+    )
+    query = urlencode(params)
+    url = request.build_absolute_uri(request.path)
+    return f"ads:list:v{version}:{url}?{query}"
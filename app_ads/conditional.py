@@ -0,0 +1,77 @@
+import hashlib
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.request import Request
+
+
+def make_etag(*parts) -> str:
+    """
+    Формирует значение ETag из переданных частей версии ресурса.
+    """
+    raw = ":".join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def conditional_get(
+    request: Request,
+    get_response: Callable[[], HttpResponseBase],
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+) -> HttpResponseBase:
+    """
+    Обрабатывает условный GET-запрос.
+    Если версия ресурса совпадает с заголовками If-None-Match / If-Modified-Since,
+    возвращает 304 без построения тела ответа,
+    иначе строит ответ и добавляет к нему заголовки ETag и Last-Modified.
+
+    :param request: HTTP-запрос.
+    :param get_response: Функция, строящая полный ответ.
+    :param etag: Значение ETag ресурса.
+    :param last_modified: Время последнего изменения ресурса.
+    :return: Ответ 304 или полный ответ.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = get_response()
+    return add_validators(response, etag, timestamp)
+
+
+async def aconditional_get(
+    request: HttpRequest,
+    get_response: Callable[[], Awaitable[HttpResponseBase]],
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+) -> HttpResponseBase:
+    """
+    Асинхронный вариант conditional_get для асинхронных представлений.
+
+    :param request: HTTP-запрос.
+    :param get_response: Асинхронная функция, строящая полный ответ.
+    :param etag: Значение ETag ресурса.
+    :param last_modified: Время последнего изменения ресурса.
+    :return: Ответ 304 или полный ответ.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = await get_response()
+    return add_validators(response, etag, timestamp)
+
+
+def add_validators(
+    response: HttpResponseBase, etag: Optional[str], timestamp: Optional[int]
+) -> HttpResponseBase:
+    """
+    Добавляет к успешному ответу или ответу 304 заголовки ETag и Last-Modified.
+    """
+    if response.status_code in (200, 304):
+        if etag:
+            response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+    return response
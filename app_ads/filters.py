@@ -1,16 +1,39 @@
 import django_filters
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, QuerySet
 
 from app_ads.models import Ad
 
+SEARCH_CONFIG = "russian"
+
+AD_ORDERINGS = {
+    "price": ("price", "created_at", "id"),
+    "-price": ("-price", "-created_at", "-id"),
+    "-created_at": ("-created_at", "-id"),
+}
+
 
 class AdFilter(django_filters.rest_framework.FilterSet):
     """
     Фильтр для объявлений.
     Позволяет фильтровать объявления по заголовку (title) с учетом регистра,
-    используя оператор содержания "icontains".
+    используя оператор содержания "icontains",
+    выполнять полнотекстовый поиск по заголовку и описанию (q),
+    нечеткий поиск по заголовку, устойчивый к опечаткам (fuzzy),
+    фильтровать по диапазону цены и сортировать результаты.
 
     Attrs:
         - title: Фильтр по заголовку объявления с оператором "icontains".
+        - q: Полнотекстовый поиск по заголовку и описанию объявления.
+        - fuzzy: Поиск по заголовку на основе триграммного сходства слов.
+        - price_min: Минимальная цена объявления (включительно).
+        - price_max: Максимальная цена объявления (включительно).
+        - ordering: Сортировка: 'price', '-price' или '-created_at' (сначала новые).
 
     Meta attrs:
         - model: Класс модели, к которой будет применяться фильтр.
@@ -18,7 +41,86 @@ class AdFilter(django_filters.rest_framework.FilterSet):
     """
 
     title = django_filters.CharFilter(field_name="title", lookup_expr="icontains")
+    q = django_filters.CharFilter(method="filter_search")
+    fuzzy = django_filters.CharFilter(method="filter_fuzzy")
+    price_min = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
+    price_max = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
+    ordering = django_filters.ChoiceFilter(
+        choices=[(key, key) for key in AD_ORDERINGS], method="filter_ordering"
+    )
 
     class Meta:
         model = Ad
         fields = ("title",)
+
+    @staticmethod
+    def filter_search(queryset: QuerySet[Ad], name: str, value: str) -> QuerySet[Ad]:
+        """
+        Выполняет полнотекстовый поиск по индексированному вектору search_vector.
+        Добавляет к объявлениям релевантность (search_rank)
+        и фрагменты текста с подсвеченными совпадениями,
+        результаты сортируются по убыванию релевантности.
+
+        :param queryset: Исходный queryset объявлений.
+        :param name: Имя фильтра.
+        :param value: Поисковый запрос в формате websearch.
+        :return: Отфильтрованный queryset.
+        """
+        query = SearchQuery(value, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(
+                search_rank=SearchRank(F("search_vector"), query),
+                title_headline=SearchHeadline(
+                    "title",
+                    query,
+                    config=SEARCH_CONFIG,
+                    start_sel="<mark>",
+                    stop_sel="</mark>",
+                    highlight_all=True,
+                ),
+                description_headline=SearchHeadline(
+                    "description",
+                    query,
+                    config=SEARCH_CONFIG,
+                    start_sel="<mark>",
+                    stop_sel="</mark>",
+                    max_fragments=2,
+                ),
+            )
+            .order_by("-search_rank", "-created_at", "-id")
+        )
+
+    @staticmethod
+    def filter_fuzzy(queryset: QuerySet[Ad], name: str, value: str) -> QuerySet[Ad]:
+        """
+        Выполняет нечеткий поиск по заголовку с помощью pg_trgm.
+        Условие "<%" (trigram_word_similar) обслуживается триграммным GIN-индексом,
+        поэтому опечатки в запросе не приводят к полному просмотру таблицы.
+        Результаты сортируются по убыванию сходства (similarity).
+
+        :param queryset: Исходный queryset объявлений.
+        :param name: Имя фильтра.
+        :param value: Поисковый запрос.
+        :return: Отфильтрованный queryset.
+        """
+        return (
+            queryset.filter(title__trigram_word_similar=value)
+            .annotate(similarity=TrigramWordSimilarity(value, "title"))
+            .order_by("-similarity", "-created_at", "-id")
+        )
+
+    @staticmethod
+    def filter_ordering(queryset: QuerySet[Ad], name: str, value: str) -> QuerySet[Ad]:
+        """
+        Сортирует объявления.
+        Каждый вариант сортировки дополнен полями created_at и id,
+        чтобы порядок был однозначным и совпадал с составными индексами
+        ads(price, created_at, id) и ads(created_at, id).
+
+        :param queryset: Исходный queryset объявлений.
+        :param name: Имя фильтра.
+        :param value: Вариант сортировки.
+        :return: Отсортированный queryset.
+        """
+        return queryset.order_by(*AD_ORDERINGS[value])
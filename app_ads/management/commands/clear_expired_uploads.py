@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app_ads.models import ImageUpload
+from app_ads.uploads import delete_upload
+
+
+class Command(BaseCommand):
+    """
+    Удаляет незавершенные загрузки изображений старше CHUNKED_UPLOAD_EXPIRATION секунд
+    вместе с их временными файлами.
+    """
+
+    help = "Удаляет просроченные незавершенные загрузки изображений"
+
+    def handle(self, *args, **options):
+        expired_at = timezone.now() - timedelta(
+            seconds=settings.CHUNKED_UPLOAD_EXPIRATION
+        )
+        deleted = 0
+        for upload in ImageUpload.objects.filter(created_at__lt=expired_at).iterator():
+            delete_upload(upload)
+            deleted += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Удалено загрузок: {deleted}"))
@@ -0,0 +1,57 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app_ads.models import Ad, MediaBlob
+from app_users.models import CustomUser
+from config.storage import content_addressed_storage, is_blob_name
+
+
+class Command(BaseCommand):
+    """
+    Переносит изображения объявлений и пользователей, загруженные до появления
+    контентно-адресуемого хранилища, в хранилище с дедупликацией
+    и пересчитывает счетчики ссылок на файлы хранилища.
+    Исходные файлы не удаляются.
+    """
+
+    help = "Переносит изображения в хранилище с дедупликацией"
+
+    def handle(self, *args, **options):
+        moved = 0
+        for model in (Ad, CustomUser):
+            queryset = model.objects.exclude(image="").exclude(image__isnull=True)
+            for pk, name in queryset.values_list("pk", "image").iterator():
+                if is_blob_name(name) or not content_addressed_storage.exists(name):
+                    continue
+                with content_addressed_storage.open(name, "rb") as file:
+                    blob_name = content_addressed_storage.save(name, file)
+                model.objects.filter(pk=pk).update(image=blob_name)
+                moved += 1
+
+        references = Counter()
+        for model in (Ad, CustomUser):
+            references.update(
+                name
+                for name in model.objects.values_list("image", flat=True).iterator()
+                if is_blob_name(name)
+            )
+
+        with transaction.atomic():
+            MediaBlob.objects.exclude(name__in=references).update(ref_count=0)
+            for name, count in references.items():
+                MediaBlob.objects.update_or_create(
+                    name=name, defaults={"ref_count": count}
+                )
+            unused = list(
+                MediaBlob.objects.filter(ref_count=0).values_list("name", flat=True)
+            )
+            MediaBlob.objects.filter(name__in=unused).delete()
+            transaction.on_commit(lambda: MediaBlob.delete_files(unused))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Перенесено изображений: {moved}, файлов в хранилище: {len(references)}"
+            )
+        )
@@ -0,0 +1,127 @@
+import time
+from array import array
+from datetime import datetime, timezone
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from app_ads.cache import bump_ads_version
+from app_ads.models import Ad, Review
+from app_ads.synthetic import SyntheticData, copy_rows, reserve_ids
+from app_users.models import CustomUser
+
+
+class Command(BaseCommand):
+    """
+    Генерирует синтетических пользователей, объявления и отзывы
+    для нагрузочного тестирования и проверки запросов на больших объемах.
+    Строки генерируются потоком и загружаются командой COPY без промежуточных
+    объектов моделей, идентификаторы заранее резервируются в последовательностях,
+    а счетчики отзывов объявлений вычисляются при генерации, поэтому миллионы строк
+    загружаются за минуты. Пароль хэшируется один раз для всех пользователей.
+    При одинаковых --seed и --until генерируются одинаковые данные.
+    """
+
+    help = "Генерирует синтетических пользователей, объявления и отзывы"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=10000, help="Количество пользователей"
+        )
+        parser.add_argument(
+            "--ads", type=int, default=100000, help="Количество объявлений"
+        )
+        parser.add_argument(
+            "--reviews", type=int, default=300000, help="Количество отзывов"
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Начальное значение генератора случайных чисел",
+        )
+        parser.add_argument(
+            "--days", type=int, default=365, help="Период генерации дат в днях"
+        )
+        parser.add_argument(
+            "--until",
+            type=datetime.fromisoformat,
+            help="Конец периода в формате ГГГГ-ММ-ДД, по умолчанию - сегодня",
+        )
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Пароль всех созданных пользователей",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["users"], options["ads"], options["reviews"]) < 0:
+            raise CommandError("Количество строк не может быть отрицательным")
+        until = options["until"] or datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        if until.tzinfo is None:
+            until = until.replace(tzinfo=timezone.utc)
+        end = until.timestamp()
+        data = SyntheticData(options["seed"], end - options["days"] * 86400, end)
+
+        started_at = time.monotonic()
+        with transaction.atomic():
+            if options["users"]:
+                first_user_id = reserve_ids(CustomUser, options["users"])
+                copy_rows(
+                    CustomUser,
+                    SyntheticData.USER_FIELDS,
+                    data.users(
+                        first_user_id,
+                        options["users"],
+                        make_password(options["password"]),
+                    ),
+                )
+                data.author_ids = range(first_user_id, first_user_id + options["users"])
+                self.stdout.write(f"Создано пользователей: {options['users']}")
+            else:
+                data.author_ids = list(
+                    CustomUser.objects.order_by("pk").values_list("pk", flat=True)
+                )
+            if (options["ads"] or options["reviews"]) and not data.author_ids:
+                raise CommandError("Нет пользователей - авторов объявлений и отзывов")
+            if options["reviews"] and not options["ads"]:
+                raise CommandError("Отзывы создаются только к новым объявлениям")
+
+            review_counts = data.allocate_reviews(options["ads"], options["reviews"])
+            created = array("d")
+            if options["ads"]:
+                first_ad_id = reserve_ids(Ad, options["ads"])
+                copy_rows(
+                    Ad,
+                    SyntheticData.AD_FIELDS,
+                    data.ads(first_ad_id, review_counts, created),
+                )
+                self.stdout.write(f"Создано объявлений: {options['ads']}")
+            if options["reviews"]:
+                copy_rows(
+                    Review,
+                    SyntheticData.REVIEW_FIELDS,
+                    data.reviews(
+                        reserve_ids(Review, options["reviews"]),
+                        first_ad_id,
+                        review_counts,
+                        created,
+                    ),
+                )
+                self.stdout.write(f"Создано отзывов: {options['reviews']}")
+
+        # Оценка количества объявлений для пагинации берется из статистики таблиц.
+        with connection.cursor() as cursor:
+            for model in (CustomUser, Ad, Review):
+                cursor.execute(
+                    f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}"
+                )
+        bump_ads_version()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Данные сгенерированы за {time.monotonic() - started_at:.1f} с"
+            )
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from app_ads.models import Ad
+from app_ads.renditions import generate_renditions, has_renditions
+from app_users.models import CustomUser
+
+
+class Command(BaseCommand):
+    """
+    Создает уменьшенные копии (JPEG и WebP) изображений объявлений и пользователей,
+    загруженных до появления конвейера обработки изображений.
+    """
+
+    help = "Создает уменьшенные копии изображений объявлений и пользователей"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Пересоздать уже существующие копии",
+        )
+
+    def handle(self, *args, **options):
+        generated = 0
+        for model in (Ad, CustomUser):
+            queryset = model.objects.exclude(image="").exclude(image__isnull=True)
+            for instance in queryset.only("pk", "image").iterator():
+                if options["force"] or not has_renditions(instance.image.name):
+                    if generate_renditions(instance.image):
+                        generated += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Обработано изображений: {generated}"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from app_ads.cache import bump_ads_version
+from app_ads.models import Ad
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает денормализованные счетчики отзывов объявлений
+    (review_count и last_review_at) по таблице отзывов.
+    Объявления обрабатываются пакетами по диапазонам id,
+    каждый пакет обновляется одним UPDATE в отдельной транзакции.
+    """
+
+    help = "Пересчитывает счетчики отзывов объявлений"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Количество объявлений в одном пакете",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        bounds = Ad.objects.aggregate(min_id=Min("id"), max_id=Max("id"))
+        if bounds["min_id"] is None:
+            self.stdout.write("Объявления не найдены")
+            return
+
+        updated = 0
+        for start in range(bounds["min_id"], bounds["max_id"] + 1, batch_size):
+            updated += Ad.recompute_review_counters(
+                Ad.objects.filter(id__gte=start, id__lt=start + batch_size)
+            )
+            self.stdout.write(f"Обработано объявлений: {updated}")
+
+        bump_ads_version()
+        self.stdout.write(self.style.SUCCESS("Счетчики отзывов пересчитаны"))
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_ads", "0003_alter_ad_price_alter_review_text"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="ad",
+            options={
+                "ordering": ["-created_at", "-id"],
+                "verbose_name": "Объявление",
+                "verbose_name_plural": "Объявления",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                fields=["created_at", "id"], name="ads_created_at_id_idx"
+            ),
+        ),
+    ]
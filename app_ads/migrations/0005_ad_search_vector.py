@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-18 14:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_TRIGGER_SQL = """
+CREATE FUNCTION ads_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.russian', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.russian', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ads_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON ads
+    FOR EACH ROW EXECUTE FUNCTION ads_search_vector_update();
+
+UPDATE ads SET search_vector =
+    setweight(to_tsvector('pg_catalog.russian', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('pg_catalog.russian', coalesce(description, '')), 'B');
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS ads_search_vector_trigger ON ads;
+DROP FUNCTION IF EXISTS ads_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_ads", "0004_ad_created_at_id_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True, editable=False, null=True, verbose_name="Поисковый вектор"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="ads_search_vector_idx"
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, reverse_sql=DROP_TRIGGER_SQL),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 14:13
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_ads", "0005_ad_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="ad",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["title"], name="ads_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
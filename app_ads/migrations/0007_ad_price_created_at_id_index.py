@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_ads", "0006_ad_title_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                fields=["price", "created_at", "id"], name="ads_price_created_at_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-18 14:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_ads", "0007_ad_price_created_at_id_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Время изменения",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Время изменения",
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            "UPDATE ads SET updated_at = created_at;"
+            "UPDATE reviews SET updated_at = created_at;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
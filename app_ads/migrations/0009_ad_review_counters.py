@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+FILL_COUNTERS_SQL = """
+UPDATE ads
+SET review_count = r.review_count, last_review_at = r.last_review_at
+FROM (
+    SELECT ad_id, count(*) AS review_count, max(created_at) AS last_review_at
+    FROM reviews
+    GROUP BY ad_id
+) AS r
+WHERE ads.id = r.ad_id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_ads", "0008_ad_updated_at_review_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="last_review_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Время последнего отзыва"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ad",
+            name="review_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Количество отзывов"
+            ),
+        ),
+        migrations.RunSQL(FILL_COUNTERS_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
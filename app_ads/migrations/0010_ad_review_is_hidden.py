@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_ads", "0009_ad_review_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="is_hidden",
+            field=models.BooleanField(default=False, verbose_name="Скрыто модератором"),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="is_hidden",
+            field=models.BooleanField(default=False, verbose_name="Скрыт модератором"),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-18 14:44
+
+import config.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_ads", "0011_image_upload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Имя файла"
+                    ),
+                ),
+                (
+                    "ref_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество ссылок"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Время создания"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Файл хранилища",
+                "verbose_name_plural": "Файлы хранилища",
+                "db_table": "media_blobs",
+            },
+        ),
+        migrations.AlterField(
+            model_name="ad",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=config.storage.get_content_addressed_storage,
+                upload_to="ads/",
+                verbose_name="Изображение",
+            ),
+        ),
+    ]
@@ -1,9 +1,24 @@
-from typing import List
+import os
+import uuid
+from collections import Counter
+from typing import Iterable, List
 
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField, TrigramSimilarity
 from django.core.validators import MaxValueValidator
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest, Now
 
 from app_users.models import CustomUser
+from config.storage import (
+    content_addressed_storage,
+    get_content_addressed_storage,
+    is_blob_name,
+)
+
+from .renditions import delete_renditions
 
 NULLABLE = {"blank": True, "null": True}
 
@@ -24,13 +39,40 @@ class Ad(models.Model):
         CustomUser, related_name="ads", on_delete=models.CASCADE, verbose_name="Автор"
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
-    image = models.ImageField(upload_to="ads/", verbose_name="Изображение", **NULLABLE)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Время изменения")
+    image = models.ImageField(
+        upload_to="ads/",
+        storage=get_content_addressed_storage,
+        verbose_name="Изображение",
+        **NULLABLE,
+    )
+    is_hidden = models.BooleanField(default=False, verbose_name="Скрыто модератором")
+    review_count = models.PositiveIntegerField(
+        default=0, verbose_name="Количество отзывов"
+    )
+    last_review_at = models.DateTimeField(
+        verbose_name="Время последнего отзыва", **NULLABLE
+    )
+    search_vector = SearchVectorField(
+        editable=False, verbose_name="Поисковый вектор", **NULLABLE
+    )
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
         verbose_name = "Объявление"
         verbose_name_plural = "Объявления"
         db_table = "ads"
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="ads_created_at_id_idx"),
+            models.Index(
+                fields=["price", "created_at", "id"],
+                name="ads_price_created_at_id_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="ads_search_vector_idx"),
+            GinIndex(
+                fields=["title"], name="ads_title_trgm_idx", opclasses=["gin_trgm_ops"]
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -42,6 +84,87 @@ class Ad(models.Model):
         """
         return cls.objects.all().select_related("author")
 
+    @classmethod
+    def get_visible_ads(cls) -> List["Ad"]:
+        """
+        Возвращает список объявлений, не скрытых модератором
+        """
+        return cls.get_all_ads().filter(is_hidden=False)
+
+    @classmethod
+    def recompute_review_counters(cls, queryset: models.QuerySet) -> int:
+        """
+        Пересчитывает счетчики видимых отзывов для объявлений из queryset
+        одним UPDATE с подзапросами.
+        :param queryset: Объявления, для которых нужно пересчитать счетчики.
+        :return: Количество обновленных объявлений.
+        """
+        reviews = (
+            Review.objects.filter(ad=OuterRef("pk"), is_hidden=False)
+            .order_by()
+            .values("ad")
+        )
+        return queryset.update(
+            review_count=Coalesce(
+                Subquery(
+                    reviews.annotate(count=Count("id")).values("count"),
+                    output_field=models.IntegerField(),
+                ),
+                0,
+            ),
+            last_review_at=Subquery(
+                reviews.annotate(last=Max("created_at")).values("last")
+            ),
+            updated_at=Now(),
+        )
+
+    def register_review(self, review: "Review") -> None:
+        """
+        Учитывает новый отзыв в счетчиках объявления.
+        Обновление выполняется одним UPDATE с F-выражениями,
+        поэтому параллельные отзывы не теряются, а время последнего отзыва
+        не уменьшается, если транзакции отзывов завершились не по порядку.
+        :param review: Созданный отзыв.
+        """
+        Ad.objects.filter(pk=self.pk).update(
+            review_count=F("review_count") + 1,
+            last_review_at=Greatest(
+                Coalesce(F("last_review_at"), review.created_at), review.created_at
+            ),
+            updated_at=Now(),
+        )
+
+    def unregister_review(self) -> None:
+        """
+        Учитывает удаление отзыва в счетчиках объявления.
+        Вызывается после удаления отзыва в той же транзакции,
+        время последнего отзыва пересчитывается по оставшимся отзывам.
+        """
+        Ad.objects.filter(pk=self.pk).update(
+            review_count=Greatest(F("review_count") - 1, 0),
+            last_review_at=Subquery(
+                Review.objects.filter(ad=OuterRef("pk"), is_hidden=False)
+                .order_by("-created_at")
+                .values("created_at")[:1]
+            ),
+            updated_at=Now(),
+        )
+
+    def get_similar_ads(self, limit: int = 10) -> List["Ad"]:
+        """
+        Возвращает объявления с наиболее похожими заголовками.
+        Отбор кандидатов выполняется оператором pg_trgm "%"
+        по триграммному индексу заголовка, сортировка - по убыванию сходства.
+        :param limit: Максимальное количество объявлений.
+        """
+        return (
+            Ad.get_visible_ads()
+            .filter(title__trigram_similar=self.title)
+            .exclude(pk=self.pk)
+            .annotate(similarity=TrigramSimilarity("title", self.title))
+            .order_by("-similarity", "-created_at", "-id")[:limit]
+        )
+
 
 class Review(models.Model):
     """
@@ -59,6 +182,8 @@ class Review(models.Model):
         Ad, related_name="reviews", on_delete=models.CASCADE, verbose_name="Объявление"
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Время изменения")
+    is_hidden = models.BooleanField(default=False, verbose_name="Скрыт модератором")
 
     class Meta:
         ordering = ["-created_at"]
@@ -75,3 +200,129 @@ class Review(models.Model):
         Возвращает список всех отзывов
         """
         return cls.objects.all()
+
+    @classmethod
+    def get_ad_reviews(cls, ad_id: int) -> List["Review"]:
+        """
+        Возвращает видимые отзывы объявления в порядке создания вместе с авторами
+        :param ad_id: Идентификатор объявления.
+        """
+        return (
+            cls.objects.filter(ad_id=ad_id, is_hidden=False)
+            .select_related("author")
+            .order_by("created_at", "id")
+        )
+
+
+class ImageUpload(models.Model):
+    """
+    Модель, описывающая незавершенную загрузку изображения по частям.
+    Части записываются во временный файл, offset - количество уже принятых байт.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    author = models.ForeignKey(
+        CustomUser,
+        related_name="image_uploads",
+        on_delete=models.CASCADE,
+        verbose_name="Автор",
+    )
+    filename = models.CharField(max_length=255, verbose_name="Имя файла")
+    size = models.PositiveIntegerField(verbose_name="Размер файла")
+    offset = models.PositiveIntegerField(default=0, verbose_name="Принято байт")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
+
+    class Meta:
+        verbose_name = "Загрузка изображения"
+        verbose_name_plural = "Загрузки изображений"
+        db_table = "image_uploads"
+
+    def __str__(self):
+        return f"Загрузка {self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def path(self) -> str:
+        """
+        Возвращает путь к временному файлу загрузки.
+        """
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{self.pk}.part")
+
+    @property
+    def is_complete(self) -> bool:
+        """
+        Проверяет, приняты ли все байты файла.
+        """
+        return self.offset == self.size
+
+
+class MediaBlob(models.Model):
+    """
+    Модель, описывающая файл контентно-адресуемого хранилища
+    и количество ссылок на него из объявлений и пользователей.
+    Файл удаляется, когда на него не остается ссылок.
+    """
+
+    name = models.CharField(max_length=255, unique=True, verbose_name="Имя файла")
+    ref_count = models.PositiveIntegerField(default=0, verbose_name="Количество ссылок")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
+
+    class Meta:
+        verbose_name = "Файл хранилища"
+        verbose_name_plural = "Файлы хранилища"
+        db_table = "media_blobs"
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+    @classmethod
+    def acquire(cls, name: str) -> None:
+        """
+        Увеличивает счетчик ссылок на файл, создавая запись при необходимости.
+        Запись создается через INSERT ... ON CONFLICT DO NOTHING,
+        счетчик увеличивается F-выражением, поэтому параллельные загрузки
+        одного и того же файла не теряют ссылки.
+        :param name: Имя файла в хранилище.
+        """
+        if not is_blob_name(name):
+            return
+        updated = 0
+        while not updated:
+            cls.objects.bulk_create([cls(name=name)], ignore_conflicts=True)
+            updated = cls.objects.filter(name=name).update(ref_count=F("ref_count") + 1)
+
+    @classmethod
+    def release(cls, names: Iterable[str]) -> List[str]:
+        """
+        Уменьшает счетчики ссылок на файлы и удаляет файлы без ссылок
+        вместе с их уменьшенными копиями после фиксации транзакции.
+        :param names: Имена файлов в хранилище, по одному на каждую ссылку.
+        :return: Имена удаляемых файлов.
+        """
+        counts = Counter(name for name in names if is_blob_name(name))
+        if not counts:
+            return []
+
+        with transaction.atomic():
+            for name, count in sorted(counts.items()):
+                cls.objects.filter(name=name).update(
+                    ref_count=Greatest(F("ref_count") - count, 0)
+                )
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {cls._meta.db_table} "
+                    "WHERE name = ANY(%s) AND ref_count = 0 RETURNING name",
+                    [sorted(counts)],
+                )
+                freed = [row[0] for row in cursor.fetchall()]
+            transaction.on_commit(lambda: cls.delete_files(freed))
+        return freed
+
+    @staticmethod
+    def delete_files(names: List[str]) -> None:
+        """
+        Удаляет файлы хранилища и их уменьшенные копии.
+        :param names: Имена файлов в хранилище.
+        """
+        for name in names:
+            content_addressed_storage.delete(name)
+            delete_renditions(name)
@@ -0,0 +1,93 @@
+from typing import Iterator, List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.db.models.functions import Now
+
+from .cache import bump_ads_version
+from .models import Ad, MediaBlob, Review
+
+
+def iter_pk_chunks(queryset: QuerySet, batch_size: int) -> Iterator[List[int]]:
+    """
+    Последовательно возвращает идентификаторы объектов queryset пакетами.
+    Пакеты выбираются по возрастанию pk условием pk > последнего pk,
+    без OFFSET и без загрузки всех идентификаторов в память.
+    :param queryset: Выборка объектов.
+    :param batch_size: Размер пакета.
+    """
+    last_pk = 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def moderate_ads(action: str, queryset: QuerySet[Ad]) -> int:
+    """
+    Удаляет, скрывает или показывает объявления из queryset.
+    Каждый пакет обрабатывается несколькими SQL-запросами в отдельной транзакции,
+    при удалении освобождаются ссылки на изображения объявлений.
+    :param action: Действие: 'delete', 'hide' или 'unhide'.
+    :param queryset: Выборка объявлений.
+    :return: Количество затронутых объявлений.
+    """
+    if action in ("hide", "unhide"):
+        queryset = queryset.filter(is_hidden=action == "unhide")
+
+    affected = 0
+    for pks in iter_pk_chunks(queryset, settings.MODERATION_BATCH_SIZE):
+        with transaction.atomic():
+            if action == "delete":
+                images = Ad.objects.filter(pk__in=pks).values_list("image", flat=True)
+                images = [image for image in images if image]
+                Review.objects.filter(ad_id__in=pks).delete()
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"DELETE FROM {Ad._meta.db_table} WHERE id = ANY(%s)", [pks]
+                    )
+                    affected += cursor.rowcount
+                MediaBlob.release(images)
+            else:
+                affected += Ad.objects.filter(pk__in=pks).update(
+                    is_hidden=action == "hide", updated_at=Now()
+                )
+
+    if affected:
+        bump_ads_version()
+    return affected
+
+
+def moderate_reviews(action: str, queryset: QuerySet[Review]) -> int:
+    """
+    Удаляет, скрывает или показывает отзывы из queryset
+    и пересчитывает счетчики отзывов затронутых объявлений.
+    Каждый пакет обрабатывается несколькими SQL-запросами в отдельной транзакции.
+    :param action: Действие: 'delete', 'hide' или 'unhide'.
+    :param queryset: Выборка отзывов.
+    :return: Количество затронутых отзывов.
+    """
+    if action in ("hide", "unhide"):
+        queryset = queryset.filter(is_hidden=action == "unhide")
+
+    affected = 0
+    for pks in iter_pk_chunks(queryset, settings.MODERATION_BATCH_SIZE):
+        with transaction.atomic():
+            reviews = Review.objects.filter(pk__in=pks)
+            ad_ids = list(reviews.values_list("ad_id", flat=True).distinct())
+            if action == "delete":
+                affected += reviews.delete()[0]
+            else:
+                affected += reviews.update(is_hidden=action == "hide", updated_at=Now())
+            Ad.recompute_review_counters(Ad.objects.filter(pk__in=ad_ids))
+
+    if affected:
+        bump_ads_version()
+    return affected
@@ -0,0 +1,319 @@
+import hashlib
+import json
+from typing import Any, Optional, Type
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import F, Field, Func, QuerySet, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import _reverse_ordering
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from .cache import get_ads_version
+from .filters import AD_ORDERINGS
+
+
+class EstimatedCountPage(Page):
+    """
+    Страница, наличие следующей страницы у которой определяется
+    по выбранным строкам, а не по количеству объектов.
+    """
+
+    def __init__(
+        self, object_list: list, number: int, paginator: Paginator, has_next: bool
+    ) -> None:
+        """
+        :param has_next: Есть ли объекты после этой страницы.
+        """
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который для больших выборок PostgreSQL использует
+    оценку количества строк планировщиком вместо SELECT COUNT(*).
+
+    Для выборки без условий оценка берется из pg_class.reltuples,
+    для выборки с условиями - из плана запроса (EXPLAIN).
+    Если оценка меньше PAGINATION_EXACT_COUNT_THRESHOLD, выполняется точный подсчет.
+    Оценки и точные количества кэшируются по сигнатуре запроса
+    на PAGINATION_COUNT_CACHE_TIMEOUT секунд. Ключ точного количества
+    дополнительно содержит версию данных объявлений, поэтому создание
+    и удаление объявлений и отзывов сбрасывает его сразу,
+    а приблизительная оценка живет до истечения таймаута.
+
+    Оценка для выборки с условиями может многократно отличаться от точного количества,
+    поэтому номер страницы с оценкой не сравнивается: страница выбирается
+    с одной лишней строкой, по которой определяется наличие следующей страницы,
+    а пустая страница после первой считается несуществующей.
+    """
+
+    def validate_number(self, number: Any) -> int:
+        """
+        Проверяет номер страницы без сравнения с оценкой количества страниц.
+        :param number: Номер страницы, начиная с 1.
+        """
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+    def page(self, number: Any) -> EstimatedCountPage:
+        """
+        Возвращает страницу по номеру, выбирая на одну строку больше размера страницы.
+        :param number: Номер страницы, начиная с 1.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page + 1
+        rows = list(self.object_list[bottom:top])
+        if not rows and number > 1:
+            raise EmptyPage(_("That page contains no results"))
+        return EstimatedCountPage(
+            rows[: self.per_page], number, self, len(rows) > self.per_page
+        )
+
+    @cached_property
+    def count(self) -> int:
+        """
+        Возвращает точное или оценочное количество объектов.
+        """
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return super().count
+
+        queryset = queryset.order_by()
+        sql, params = queryset.query.sql_with_params()
+        signature = hashlib.md5(f"{sql}:{params!r}".encode()).hexdigest()
+        cache_key = f"pagination:count:{signature}"
+        exact_cache_key = f"pagination:count:v{get_ads_version()}:{signature}"
+        cached = cache.get_many([cache_key, exact_cache_key])
+        if cache_key in cached:
+            return cached[cache_key]
+        if exact_cache_key in cached:
+            return cached[exact_cache_key]
+
+        with connection.cursor() as cursor:
+            if queryset.query.where:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimate = int(plan[0]["Plan"]["Plan Rows"])
+            else:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                estimate = cursor.fetchone()[0]
+
+        if estimate < settings.PAGINATION_EXACT_COUNT_THRESHOLD:
+            count = super().count
+            cache.set(exact_cache_key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+            return count
+
+        cache.set(cache_key, estimate, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return estimate
+
+
+class EstimatedCountPagination(pagination.PageNumberPagination):
+    """
+    Постраничная пагинация с оценочным подсчетом количества объектов.
+    Используется для больших таблиц (объявления, отзывы) явно, по умолчанию в DRF
+    остается PageNumberPagination с точным подсчетом.
+    """
+
+    django_paginator_class = EstimatedCountPaginator
+
+
+class AdPagination(EstimatedCountPagination):
+    """
+    Пагинация для объявлений.
+    """
+
+    page_size = 4
+    page_query_param = "page"
+
+
+class ReviewPagination(EstimatedCountPagination):
+    """
+    Пагинация для отзывов.
+    """
+
+
+class Row(Func):
+    """
+    Конструктор строки PostgreSQL ROW(...) для сравнения кортежей столбцов.
+    """
+
+    function = "ROW"
+    output_field = Field()
+
+
+class AdCursorPagination(pagination.CursorPagination):
+    """
+    Курсорная (keyset) пагинация для объявлений.
+    Позиция курсора - значения всех полей сортировки последнего объявления страницы,
+    например (created_at, id), а следующая страница выбирается условием
+    ROW(created_at, id) < ROW(%s, %s) по составному индексу вместо OFFSET.
+    Общее количество объявлений не подсчитывается.
+    Курсоры next/previous непрозрачны для клиента,
+    а выдача не смещается при добавлении новых объявлений.
+    Сортировка по релевантности поиска (q, fuzzy) не поддерживается.
+    """
+
+    page_size = 4
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+    rank_query_params = ("q", "fuzzy")
+
+    def get_ordering(
+        self, request: Request, queryset: QuerySet, view: APIView
+    ) -> tuple:
+        """
+        Возвращает порядок сортировки с учетом параметра 'ordering' фильтра объявлений.
+        Все поля порядка сортируются в одном направлении.
+        """
+        if any(request.query_params.get(param) for param in self.rank_query_params):
+            raise ValidationError(
+                {
+                    "pagination": [
+                        "Курсорная пагинация не поддерживает сортировку "
+                        "по релевантности (q, fuzzy)."
+                    ]
+                }
+            )
+        return AD_ORDERINGS.get(request.query_params.get("ordering"), self.ordering)
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: Optional[APIView] = None
+    ) -> Optional[list]:
+        """
+        Возвращает страницу объектов после позиции курсора.
+        Повторяет CursorPagination.paginate_queryset, но фильтрует выборку
+        по всем полям сортировки, поэтому смещение курсора всегда равно нулю.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            reverse, current_position = self.cursor.reverse, self.cursor.position
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = self.filter_after_position(
+                queryset, current_position, backwards=reverse
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if has_following_position
+            else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def filter_after_position(
+        self, queryset: QuerySet, position: str, backwards: bool
+    ) -> QuerySet:
+        """
+        Оставляет объекты, идущие в порядке сортировки после позиции курсора
+        (или перед ней при движении назад).
+        :param queryset: Выборка объектов.
+        :param position: Позиция курсора.
+        :param backwards: Выбирать ли объекты перед позицией.
+        """
+        fields = [name.lstrip("-") for name in self.ordering]
+        try:
+            values = [
+                queryset.model._meta.get_field(name).to_python(value)
+                for name, value in zip(fields, json.loads(position), strict=True)
+            ]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        descending = self.ordering[0].startswith("-")
+        lookup = LessThan if descending != backwards else GreaterThan
+        return queryset.filter(
+            lookup(Row(*map(F, fields)), Row(*map(Value, values)))
+        )
+
+    def _get_position_from_instance(self, instance: Any, ordering: tuple) -> str:
+        """
+        Возвращает позицию объекта: значения всех полей сортировки.
+        :param instance: Объект или строка выборки .values().
+        :param ordering: Порядок сортировки.
+        """
+        fields = [name.lstrip("-") for name in ordering]
+        if isinstance(instance, dict):
+            values = [instance[name] for name in fields]
+        else:
+            values = [getattr(instance, name) for name in fields]
+        return json.dumps([str(value) for value in values])
+
+
+AD_PAGINATION_CLASSES = {
+    "page": AdPagination,
+    "cursor": AdCursorPagination,
+}
+
+
+def get_ad_pagination_class(
+    query_params: Any, default: Type[pagination.BasePagination] = AdPagination
+) -> Type[pagination.BasePagination]:
+    """
+    Возвращает класс пагинации объявлений, выбранный параметром запроса 'pagination'.
+    По умолчанию используется постраничная пагинация,
+    при 'pagination=cursor' - курсорная.
+    :param query_params: Параметры строки запроса.
+    :param default: Класс пагинации по умолчанию.
+    """
+    return AD_PAGINATION_CLASSES.get(query_params.get("pagination"), default)
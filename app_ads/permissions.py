@@ -34,3 +34,22 @@ class IsAdminOrOwner(BasePermission):
             if obj.author == request.user:
                 return True
         return False
+
+
+class IsAdmin(BasePermission):
+    """
+    Разрешение для пользователей с ролью 'admin'.
+    """
+
+    def has_permission(self, request: Request, view: APIView) -> bool:
+        """
+        Проверяет, является ли пользователь администратором.
+        :param request: HTTP-запрос.
+        :param view: Объект APIView.
+        :return: True, если пользователь аутентифицирован и имеет роль 'admin', иначе False.
+        """
+        return bool(
+            request.user
+            and request.user.is_authenticated
+            and request.user.role == "admin"
+        )
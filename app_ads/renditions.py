@@ -0,0 +1,145 @@
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from PIL import Image, ImageOps
+
+RENDITION_FORMATS = {
+    "jpeg": ("JPEG", "jpg", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_rendition_name(name: str, width: int, fmt: str) -> str:
+    """
+    Возвращает имя файла уменьшенной копии изображения.
+    Копии хранятся в подкаталоге renditions рядом с оригиналом,
+    поэтому их адреса вычисляются без обращения к хранилищу.
+    :param name: Имя оригинального файла в хранилище.
+    :param width: Ширина копии.
+    :param fmt: Формат копии: 'jpeg' или 'webp'.
+    """
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    extension = RENDITION_FORMATS[fmt][1]
+    return posixpath.join(directory, "renditions", f"{stem}_{width}w.{extension}")
+
+
+def has_renditions(name: str) -> bool:
+    """
+    Проверяет, созданы ли уменьшенные копии изображения.
+    :param name: Имя оригинального файла в хранилище.
+    """
+    width = settings.IMAGE_RENDITION_WIDTHS[-1]
+    return default_storage.exists(get_rendition_name(name, width, "webp"))
+
+
+def generate_renditions(image: FieldFile) -> List[str]:
+    """
+    Создает уменьшенные копии изображения в форматах JPEG и WebP
+    для каждой ширины из IMAGE_RENDITION_WIDTHS.
+    JPEG декодируется в режиме draft сразу в уменьшенном масштабе,
+    что многократно ускоряет обработку больших фотографий.
+    Изображения меньше требуемой ширины не увеличиваются.
+    :param image: Файл изображения модели.
+    :return: Имена созданных файлов.
+    """
+    try:
+        with image.storage.open(image.name, "rb") as file:
+            original = Image.open(file)
+            widest = settings.IMAGE_RENDITION_WIDTHS[-1]
+            width, height = original.size
+            # Размер для draft сохраняет пропорции исходного изображения,
+            # иначе широкие фотографии уменьшаются при декодировании слабее возможного.
+            original.draft("RGB", (widest, max(1, height * widest // max(width, 1))))
+            original = ImageOps.exif_transpose(original)
+    except OSError:
+        return []
+
+    names = []
+    for width in settings.IMAGE_RENDITION_WIDTHS:
+        rendition = original.copy()
+        rendition.thumbnail((width, rendition.height), Image.Resampling.LANCZOS)
+        for fmt, (pil_format, _, options) in RENDITION_FORMATS.items():
+            converted = rendition
+            if pil_format == "JPEG" and rendition.mode != "RGB":
+                converted = rendition.convert("RGB")
+            elif rendition.mode not in ("RGB", "RGBA"):
+                converted = rendition.convert("RGBA")
+
+            buffer = BytesIO()
+            converted.save(buffer, pil_format, **options)
+            name = get_rendition_name(image.name, width, fmt)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            names.append(default_storage.save(name, ContentFile(buffer.getvalue())))
+    return names
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Возвращает пул потоков процесса для создания уменьшенных копий.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_RENDITION_WORKERS,
+                thread_name_prefix="renditions",
+            )
+        return _executor
+
+
+def schedule_renditions(image: FieldFile) -> None:
+    """
+    Планирует создание уменьшенных копий изображения после фиксации транзакции.
+    Копии создаются в пуле из IMAGE_RENDITION_WORKERS потоков процесса,
+    поэтому ответ на запрос с загрузкой изображения не ждет декодирования Pillow.
+    При IMAGE_RENDITION_WORKERS = 0 копии создаются сразу после фиксации.
+    Копии, не созданные из-за перезапуска процесса,
+    создает команда generate_image_renditions.
+    :param image: Файл изображения модели.
+    """
+    if settings.IMAGE_RENDITION_WORKERS:
+        transaction.on_commit(
+            partial(get_executor().submit, generate_renditions, image)
+        )
+    else:
+        transaction.on_commit(partial(generate_renditions, image))
+
+
+def delete_renditions(name: str) -> None:
+    """
+    Удаляет уменьшенные копии изображения.
+    :param name: Имя оригинального файла в хранилище.
+    """
+    for width in settings.IMAGE_RENDITION_WIDTHS:
+        for fmt in RENDITION_FORMATS:
+            default_storage.delete(get_rendition_name(name, width, fmt))
+
+
+def get_srcset(name: str, build_url: Callable[[str], str]) -> Dict[str, str]:
+    """
+    Возвращает набор адресов уменьшенных копий в формате атрибута srcset
+    для каждого формата, например {"webp": "https://.../a_320w.webp 320w, ..."}.
+    :param name: Имя оригинального файла в хранилище.
+    :param build_url: Функция, строящая абсолютный адрес файла по его имени в хранилище.
+    """
+    return {
+        fmt: ", ".join(
+            f"{build_url(get_rendition_name(name, width, fmt))} {width}w"
+            for width in settings.IMAGE_RENDITION_WIDTHS
+        )
+        for fmt in RENDITION_FORMATS
+    }
@@ -1,23 +1,175 @@
-from typing import Any, Dict
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.validators import get_available_image_extensions
+from django.db.models import QuerySet
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
 
-from .models import Ad, Review
+from .models import Ad, ImageUpload, Review
+from .renditions import get_srcset
 from .validators import NotEmptyStringValidator
 
 
-class AdSerializer(serializers.ModelSerializer):
+class ImageSrcsetMixin:
+    """
+    Добавляет к сериализатору построение абсолютных адресов изображений
+    и наборов адресов их уменьшенных копий (srcset).
+    """
+
+    def build_media_url(self, url: str) -> str:
+        """
+        Возвращает абсолютный адрес файла.
+        Базовый адрес сайта вычисляется один раз на весь список объектов
+        и хранится в контексте сериализатора.
+        :param url: Адрес файла в хранилище.
+        """
+        if not url.startswith("/"):
+            return url
+        if "base_url" not in self.context:
+            self.context["base_url"] = self.context["request"].build_absolute_uri("/")
+        return self.context["base_url"][:-1] + url
+
+    def get_media_url(self, name: Optional[str]) -> Optional[str]:
+        """
+        Возвращает абсолютный адрес файла по его имени в хранилище.
+        Абсолютный адрес MEDIA_URL вычисляется один раз на весь список объектов,
+        поэтому адрес строится без обращения к хранилищу.
+        :param name: Имя файла в хранилище.
+        :return: Адрес файла или None, если имя пустое.
+        """
+        if not name:
+            return None
+        if "media_url" not in self.context:
+            self.context["media_url"] = self.build_media_url(default_storage.base_url)
+        return self.context["media_url"] + filepath_to_uri(name).lstrip("/")
+
+    def get_srcset_by_name(self, name: Optional[str]) -> Optional[Dict[str, str]]:
+        """
+        Возвращает адреса уменьшенных копий изображения в форматах JPEG и WebP.
+        :param name: Имя оригинального файла в хранилище.
+        :return: Наборы адресов или None, если имя пустое.
+        """
+        if not name:
+            return None
+        return get_srcset(name, self.get_media_url)
+
+    def get_image_srcset(self, obj: Any) -> Optional[Dict[str, str]]:
+        """
+        Возвращает адреса уменьшенных копий изображения объекта в форматах JPEG и WebP.
+        :param obj: Экземпляр модели с полем image.
+        """
+        return self.get_srcset_by_name(obj.image.name)
+
+
+class ValuesSerializerMixin:
+    """
+    Быстрая сериализация списков без создания экземпляров моделей.
+    Строки выбираются через .values() только со столбцами, нужными полям сериализатора,
+    а словари ответа строятся по соответствию полей и столбцов,
+    вычисленному один раз на список. Результат совпадает с to_representation.
+    Поля-методы описываются в values_fields: имя поля -> (столбец, имя метода,
+    преобразующего значение столбца).
+    """
+
+    values_fields: Dict[str, Tuple[str, str]] = {}
+
+    # Поля, у которых to_representation не меняет значение из базы данных.
+    VALUES_IDENTITY_FIELDS = (
+        serializers.IntegerField,
+        serializers.CharField,
+        serializers.ReadOnlyField,
+    )
+
+    def get_values_mapping(self) -> List[Tuple[str, str, Optional[Callable]]]:
+        """
+        Возвращает соответствие полей сериализатора и столбцов выборки:
+        список (имя поля, столбец, функция преобразования или None).
+        """
+        mapping = []
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in self.values_fields:
+                column, method_name = self.values_fields[name]
+                mapping.append((name, column, getattr(self, method_name)))
+                continue
+            column = "__".join(field.source_attrs)
+            if isinstance(field, serializers.ImageField):
+                converter = self.get_media_url
+            elif type(field) in self.VALUES_IDENTITY_FIELDS:
+                converter = None
+            else:
+                converter = field.to_representation
+            mapping.append((name, column, converter))
+        return mapping
+
+    def get_values_columns(self, queryset: QuerySet) -> List[str]:
+        """
+        Возвращает столбцы, которые нужно выбрать для сериализации.
+        :param queryset: Выборка объектов.
+        """
+        return [column for _, column, _ in self.get_values_mapping()]
+
+    def get_values_queryset(self, queryset: QuerySet, *extra_columns: str) -> QuerySet:
+        """
+        Возвращает выборку словарей только с нужными столбцами.
+        :param queryset: Выборка объектов.
+        :param extra_columns: Дополнительные столбцы, например поля сортировки
+        для курсорной пагинации.
+        """
+        columns = [*self.get_values_columns(queryset), *extra_columns]
+        return queryset.values(*dict.fromkeys(columns))
+
+    def to_values_representation(
+        self, row: Dict[str, Any], mapping: List[Tuple[str, str, Optional[Callable]]]
+    ) -> Dict[str, Any]:
+        """
+        Возвращает представление строки выборки.
+        :param row: Строка выборки .values().
+        :param mapping: Соответствие полей и столбцов из get_values_mapping().
+        """
+        output = {}
+        for name, column, converter in mapping:
+            value = row[column]
+            if converter is not None and value is not None:
+                value = converter(value)
+            output[name] = value
+        return output
+
+    def serialize_values(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Возвращает представления строк выборки .values().
+        :param rows: Строки выборки из get_values_queryset().
+        """
+        mapping = self.get_values_mapping()
+        return [self.to_values_representation(row, mapping) for row in rows]
+
+
+class AdSerializer(ImageSrcsetMixin, serializers.ModelSerializer):
     """
     Сериализатор для модели Ad, которая представляет объявление.
     """
 
     title = serializers.CharField(validators=[NotEmptyStringValidator()])
     description = serializers.CharField(validators=[NotEmptyStringValidator()])
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Ad
-        fields = ["pk", "image", "title", "price", "description"]
-        read_only_fields = ["pk"]
+        fields = [
+            "pk",
+            "image",
+            "image_srcset",
+            "title",
+            "price",
+            "description",
+            "review_count",
+            "last_review_at",
+        ]
+        read_only_fields = ["pk", "review_count", "last_review_at"]
 
     def to_representation(self, instance: Ad) -> Dict[str, Any]:
         """
@@ -36,30 +188,109 @@ class AdSerializer(serializers.ModelSerializer):
         return ad_output
 
 
-class AdListSerializer(serializers.ModelSerializer):
+class AdListSerializer(
+    ValuesSerializerMixin, ImageSrcsetMixin, serializers.ModelSerializer
+):
     """
     Сериализатор для представления списка объявлений (Ads).
     """
 
+    SEARCH_ANNOTATIONS = (
+        "search_rank",
+        "title_headline",
+        "description_headline",
+        "similarity",
+    )
+
+    image_srcset = serializers.SerializerMethodField()
+
+    values_fields = {"image_srcset": ("image", "get_srcset_by_name")}
+
     class Meta:
         model = Ad
-        fields = ["pk", "image", "title", "price", "description"]
+        fields = [
+            "pk",
+            "image",
+            "image_srcset",
+            "title",
+            "price",
+            "description",
+            "review_count",
+            "last_review_at",
+        ]
+
+    def to_representation(self, instance: Ad) -> Dict[str, Any]:
+        """
+        Переопределяет представление объекта.
+        При полнотекстовом поиске добавляет релевантность
+        и фрагменты текста с подсвеченными совпадениями,
+        при нечетком поиске - степень сходства заголовка.
+        :param instance: Экземпляр модели Ad.
+        :return: Представление объекта в виде словаря.
+        """
+        ad_output = super().to_representation(instance)
+        if hasattr(instance, "search_rank"):
+            ad_output["search_rank"] = instance.search_rank
+            ad_output["headline"] = {
+                "title": instance.title_headline,
+                "description": instance.description_headline,
+            }
+        if hasattr(instance, "similarity"):
+            ad_output["similarity"] = instance.similarity
+        return ad_output
+
+    def get_values_columns(self, queryset: QuerySet) -> List[str]:
+        """
+        Добавляет к столбцам аннотации полнотекстового и нечеткого поиска.
+        :param queryset: Выборка объявлений.
+        """
+        columns = super().get_values_columns(queryset)
+        annotations = queryset.query.annotations
+        columns += [name for name in self.SEARCH_ANNOTATIONS if name in annotations]
+        return columns
+
+    def to_values_representation(
+        self, row: Dict[str, Any], mapping: List[Tuple[str, str, Optional[Callable]]]
+    ) -> Dict[str, Any]:
+        """
+        Добавляет к представлению строки результаты поиска, как to_representation.
+        :param row: Строка выборки .values().
+        :param mapping: Соответствие полей и столбцов из get_values_mapping().
+        """
+        ad_output = super().to_values_representation(row, mapping)
+        if "search_rank" in row:
+            ad_output["search_rank"] = row["search_rank"]
+            ad_output["headline"] = {
+                "title": row["title_headline"],
+                "description": row["description_headline"],
+            }
+        if "similarity" in row:
+            ad_output["similarity"] = row["similarity"]
+        return ad_output
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(
+    ValuesSerializerMixin, ImageSrcsetMixin, serializers.ModelSerializer
+):
     """
     Сериализатор для модели Review, представляющей отзывы.
     """
 
     text = serializers.CharField(validators=[NotEmptyStringValidator()])
-    author_id = serializers.IntegerField(source="author.id", read_only=True)
+    author_id = serializers.IntegerField(read_only=True)
     author_first_name = serializers.CharField(
         source="author.first_name", read_only=True
     )
     author_last_name = serializers.CharField(source="author.last_name", read_only=True)
-    ad_id = serializers.IntegerField(source="ad.id", read_only=True)
+    ad_id = serializers.IntegerField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     author_image = serializers.SerializerMethodField()
+    author_image_srcset = serializers.SerializerMethodField()
+
+    values_fields = {
+        "author_image": ("author__image", "get_media_url"),
+        "author_image_srcset": ("author__image", "get_srcset_by_name"),
+    }
 
     class Meta:
         model = Review
@@ -72,9 +303,99 @@ class ReviewSerializer(serializers.ModelSerializer):
             "author_first_name",
             "author_last_name",
             "author_image",
+            "author_image_srcset",
         ]
 
-    def get_author_image(self, obj):
-        request = self.context.get("request")
-        if obj.author.image:
-            return request.build_absolute_uri(obj.author.image.url)
+    def get_author_image(self, obj: Review) -> Optional[str]:
+        """
+        Возвращает абсолютный URL изображения автора отзыва.
+        :param obj: Экземпляр модели Review.
+        """
+        return self.get_media_url(obj.author.image.name)
+
+    def get_author_image_srcset(self, obj: Review) -> Optional[Dict[str, str]]:
+        """
+        Возвращает адреса уменьшенных копий изображения автора отзыва.
+        :param obj: Экземпляр модели Review.
+        """
+        return self.get_image_srcset(obj.author)
+
+
+class ModerationSerializer(serializers.Serializer):
+    """
+    Сериализатор запроса массовой модерации объявлений или отзывов.
+    Объекты выбираются либо списком идентификаторов, либо по автору.
+    """
+
+    ACTION_CHOICES = ["delete", "hide", "unhide"]
+
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        required=False,
+    )
+    author_id = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Проверяет, что указан ровно один способ выбора объектов.
+        :param attrs: Словарь атрибутов для валидации.
+        :return: Валидированный словарь атрибутов.
+        """
+        if ("ids" in attrs) == ("author_id" in attrs):
+            raise serializers.ValidationError(
+                "Необходимо указать либо ids, либо author_id."
+            )
+        return attrs
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для модели ImageUpload, представляющей загрузку изображения по частям.
+    """
+
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImageUpload
+        fields = ["id", "filename", "size", "offset", "chunk_size", "created_at"]
+        read_only_fields = ["id", "offset", "created_at"]
+
+    def validate_filename(self, value: str) -> str:
+        """
+        Проверяет расширение имени файла.
+        :param value: Имя файла.
+        :return: Валидированное имя файла.
+        """
+        extension = os.path.splitext(value)[1][1:].lower()
+        if extension not in get_available_image_extensions():
+            raise serializers.ValidationError("Недопустимое расширение файла.")
+        return value
+
+    def validate_size(self, value: int) -> int:
+        """
+        Проверяет, что размер файла не превышает CHUNKED_UPLOAD_MAX_SIZE.
+        :param value: Размер файла в байтах.
+        :return: Валидированный размер файла.
+        """
+        if not 0 < value <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Размер файла должен быть от 1 до {settings.CHUNKED_UPLOAD_MAX_SIZE} байт."
+            )
+        return value
+
+    def get_chunk_size(self, obj: ImageUpload) -> int:
+        """
+        Возвращает максимальный размер одной части.
+        :param obj: Экземпляр модели ImageUpload.
+        """
+        return settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE
+
+
+class ImageUploadFinalizeSerializer(serializers.Serializer):
+    """
+    Сериализатор запроса завершения загрузки изображения.
+    """
+
+    ad = serializers.IntegerField(min_value=1)
@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from app_users.models import CustomUser
+
+from .cache import bump_ads_version
+from .models import Ad, MediaBlob
+from .renditions import has_renditions, schedule_renditions
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_delete, sender=Ad)
+def invalidate_ads_list_cache(sender, **kwargs) -> None:
+    """
+    Сбрасывает кэш списка объявлений при изменении или удалении объявления.
+    """
+    bump_ads_version()
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_save, sender=CustomUser)
+def create_image_renditions(sender, instance, update_fields=None, **kwargs) -> None:
+    """
+    Планирует создание уменьшенных копий загруженного изображения
+    объявления или пользователя вне обработки запроса.
+    """
+    if update_fields is not None and "image" not in update_fields:
+        return
+    if instance.image and not has_renditions(instance.image.name):
+        schedule_renditions(instance.image)
+
+
+@receiver(pre_save, sender=Ad)
+@receiver(pre_save, sender=CustomUser)
+def remember_previous_image(sender, instance, update_fields=None, **kwargs) -> None:
+    """
+    Запоминает имя изображения, сохраненное в базе данных до изменения объекта.
+    """
+    if instance.pk is None:
+        return
+    if update_fields is not None and "image" not in update_fields:
+        return
+    instance._previous_image = (
+        sender.objects.filter(pk=instance.pk).values_list("image", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_save, sender=CustomUser)
+def update_image_references(sender, instance, update_fields=None, **kwargs) -> None:
+    """
+    Обновляет счетчики ссылок на файлы хранилища при смене изображения.
+    """
+    if update_fields is not None and "image" not in update_fields:
+        return
+    previous = getattr(instance, "_previous_image", None) or ""
+    current = instance.image.name or ""
+    if previous != current:
+        MediaBlob.acquire(current)
+        MediaBlob.release([previous])
+
+
+@receiver(post_delete, sender=Ad)
+@receiver(post_delete, sender=CustomUser)
+def release_image_reference(sender, instance, **kwargs) -> None:
+    """
+    Освобождает ссылку удаленного объекта на файл хранилища.
+    """
+    MediaBlob.release([instance.image.name or ""])
@@ -0,0 +1,562 @@
+import random
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.db import connection
+from django.db.models import Model
+
+FIRST_NAMES = {
+    "male": [
+        "Александр",
+        "Дмитрий",
+        "Максим",
+        "Сергей",
+        "Андрей",
+        "Алексей",
+        "Артём",
+        "Илья",
+        "Кирилл",
+        "Михаил",
+        "Никита",
+        "Иван",
+        "Егор",
+        "Роман",
+        "Павел",
+        "Владимир",
+        "Денис",
+        "Евгений",
+        "Олег",
+        "Николай",
+    ],
+    "female": [
+        "Анна",
+        "Мария",
+        "Елена",
+        "Ольга",
+        "Наталья",
+        "Екатерина",
+        "Татьяна",
+        "Ирина",
+        "Светлана",
+        "Юлия",
+        "Анастасия",
+        "Дарья",
+        "Полина",
+        "Ксения",
+        "Виктория",
+        "Алина",
+        "Марина",
+        "Софья",
+        "Вера",
+        "Людмила",
+    ],
+}
+
+# Фамилии в мужской форме, женская образуется добавлением "а".
+LAST_NAMES = [
+    "Иванов",
+    "Смирнов",
+    "Кузнецов",
+    "Попов",
+    "Васильев",
+    "Петров",
+    "Соколов",
+    "Михайлов",
+    "Новиков",
+    "Фёдоров",
+    "Морозов",
+    "Волков",
+    "Алексеев",
+    "Лебедев",
+    "Семёнов",
+    "Егоров",
+    "Павлов",
+    "Козлов",
+    "Степанов",
+    "Николаев",
+    "Орлов",
+    "Андреев",
+    "Макаров",
+    "Никитин",
+    "Захаров",
+]
+
+EMAIL_DOMAINS = ["mail.ru", "yandex.ru", "gmail.com", "bk.ru", "inbox.ru"]
+
+TRANSLITERATION = str.maketrans(
+    {
+        "а": "a",
+        "б": "b",
+        "в": "v",
+        "г": "g",
+        "д": "d",
+        "е": "e",
+        "ё": "e",
+        "ж": "zh",
+        "з": "z",
+        "и": "i",
+        "й": "y",
+        "к": "k",
+        "л": "l",
+        "м": "m",
+        "н": "n",
+        "о": "o",
+        "п": "p",
+        "р": "r",
+        "с": "s",
+        "т": "t",
+        "у": "u",
+        "ф": "f",
+        "х": "kh",
+        "ц": "ts",
+        "ч": "ch",
+        "ш": "sh",
+        "щ": "shch",
+        "ъ": "",
+        "ы": "y",
+        "ь": "",
+        "э": "e",
+        "ю": "yu",
+        "я": "ya",
+    }
+)
+
+# Товары и медианная цена в рублях.
+ITEMS = [
+    ("Смартфон Samsung Galaxy A54", 22000),
+    ("iPhone 13 128 ГБ", 45000),
+    ("Ноутбук Lenovo IdeaPad 5", 38000),
+    ("Планшет iPad 9", 24000),
+    ('Телевизор LG 43"', 21000),
+    ("Наушники Sony WH-1000XM4", 15000),
+    ("Игровая приставка PlayStation 5", 48000),
+    ("Фотоаппарат Canon EOS 250D", 35000),
+    ("Умные часы Apple Watch SE", 14000),
+    ('Монитор Samsung 27"', 13000),
+    ("Диван угловой", 18000),
+    ("Шкаф-купе", 12000),
+    ("Кровать двуспальная с матрасом", 15000),
+    ("Стол обеденный раздвижной", 7000),
+    ("Комод", 4500),
+    ("Кресло офисное", 5000),
+    ("Холодильник Indesit", 16000),
+    ("Стиральная машина Bosch", 19000),
+    ("Микроволновая печь Samsung", 4000),
+    ("Пылесос Dyson V11", 28000),
+    ("Кофемашина DeLonghi", 17000),
+    ("Куртка зимняя мужская", 4000),
+    ("Пуховик женский", 5000),
+    ("Кроссовки Nike Air Max", 5500),
+    ("Джинсы Levi's 501", 2500),
+    ("Платье вечернее", 3500),
+    ("Коляска 2 в 1", 14000),
+    ("Автокресло Britax Römer", 9000),
+    ("Детская кроватка", 5000),
+    ("Конструктор LEGO Technic", 4500),
+    ("Велосипед горный Stels", 16000),
+    ("Самокат электрический Xiaomi", 21000),
+    ("Шины зимние R16, комплект", 20000),
+    ("Lada Granta 2019", 650000),
+    ("Volkswagen Polo 2017", 1100000),
+    ("Гитара акустическая Yamaha F310", 11000),
+    ("Синтезатор Casio", 9000),
+    ("Палатка четырёхместная", 7000),
+    ("Спиннинг с катушкой", 3000),
+    ("Книги, собрание сочинений", 1500),
+]
+
+TITLE_SUFFIXES = [
+    "",
+    "",
+    "",
+    "",
+    " б/у",
+    " в отличном состоянии",
+    " срочно",
+    " с доставкой",
+    " недорого",
+]
+
+CONDITIONS = ["хорошем", "отличном", "идеальном", "рабочем", "удовлетворительном"]
+
+STATIONS = [
+    "Сокол",
+    "Тверская",
+    "Парк культуры",
+    "Выхино",
+    "Марьино",
+    "Автово",
+    "Чкаловская",
+    "Площадь Ленина",
+]
+
+DESCRIPTION_SENTENCES = [
+    "Причина продажи - переезд.",
+    "Причина продажи - купил новый.",
+    "Пользовался аккуратно, без дефектов.",
+    "Есть небольшие следы использования.",
+    "Торг уместен.",
+    "Без торга.",
+    "Возможна отправка по России.",
+    "Доставка по городу за ваш счет.",
+    "Есть чек и коробка.",
+    "Звоните с 9 до 21.",
+    "Пишите в сообщения, отвечу быстро.",
+    "Обмен не интересует.",
+]
+
+REVIEW_SENTENCES = [
+    "Отличный продавец, все как в описании.",
+    "Товар соответствует описанию, рекомендую!",
+    "Быстро ответил, договорились о встрече за день.",
+    "Цена завышена, но продавец вежливый.",
+    "Продавец не пришел на встречу.",
+    "Все понравилось, спасибо!",
+    "Состояние хуже, чем на фото.",
+    "Отправил в тот же день, упаковка надежная.",
+    "Долго не отвечал на сообщения.",
+    "Сделка прошла гладко.",
+]
+
+HIDDEN_AD_RATE = 0.02
+HIDDEN_REVIEW_RATE = 0.03
+
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class RowsFile:
+    """
+    Файлоподобный объект, который по мере чтения выдает строки в текстовом
+    формате COPY. Строки генерируются лениво, поэтому таблица любого размера
+    передается в PostgreSQL без накопления в памяти.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]]) -> None:
+        """
+        :param rows: Строки таблицы: значения в порядке столбцов COPY.
+        """
+        self._lines = (format_copy_row(row) for row in rows)
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Возвращает следующие size байт данных COPY.
+        :param size: Количество байт, -1 - все оставшиеся данные.
+        """
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def format_copy_row(row: Sequence[Any]) -> bytes:
+    """
+    Форматирует строку таблицы для COPY в текстовом формате.
+    :param row: Значения столбцов: None, bool, int, datetime или str.
+    """
+    values = []
+    for value in row:
+        if value is None:
+            values.append("\\N")
+        elif value is True:
+            values.append("t")
+        elif value is False:
+            values.append("f")
+        elif isinstance(value, datetime):
+            values.append(value.isoformat())
+        else:
+            values.append(str(value).translate(COPY_ESCAPES))
+    return ("\t".join(values) + "\n").encode()
+
+
+def get_columns(model: Model, field_names: List[str]) -> List[str]:
+    """
+    Возвращает имена столбцов таблицы модели для полей.
+    :param model: Модель.
+    :param field_names: Имена полей.
+    """
+    return [model._meta.get_field(name).column for name in field_names]
+
+
+def reserve_ids(model: Model, count: int) -> int:
+    """
+    Резервирует диапазон идентификаторов в последовательности таблицы.
+    Вызывается в транзакции: таблица блокируется для записи до ее окончания,
+    поэтому параллельные вставки не получат идентификаторы из диапазона.
+    :param model: Модель.
+    :param count: Количество идентификаторов.
+    :return: Первый идентификатор диапазона.
+    """
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"LOCK TABLE {connection.ops.quote_name(table)} IN SHARE ROW EXCLUSIVE MODE"
+        )
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        sequence = cursor.fetchone()[0]
+        cursor.execute("SELECT nextval(%s)", [sequence])
+        first_id = cursor.fetchone()[0]
+        cursor.execute("SELECT setval(%s, %s)", [sequence, first_id + count - 1])
+    return first_id
+
+
+def copy_rows(
+    model: Model, field_names: List[str], rows: Iterable[Sequence[Any]]
+) -> None:
+    """
+    Загружает строки в таблицу модели командой COPY.
+    :param model: Модель.
+    :param field_names: Имена полей в порядке значений строк.
+    :param rows: Строки таблицы.
+    """
+    columns = ", ".join(
+        connection.ops.quote_name(column) for column in get_columns(model, field_names)
+    )
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} ({columns}) FROM STDIN", RowsFile(rows), 65536
+        )
+
+
+def to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def round_price(price: float) -> int:
+    """
+    Округляет цену так, как ее обычно указывают в объявлениях.
+    :param price: Цена в рублях.
+    """
+    step = 10 if price < 1000 else 100 if price < 10000 else 500
+    return max(int(round(price / step)) * step, 100)
+
+
+class SyntheticData:
+    """
+    Генератор синтетических пользователей, объявлений и отзывов.
+    Все значения определяются начальным значением генератора случайных чисел
+    и моментом окончания периода, поэтому повторный запуск с теми же параметрами
+    дает те же данные. Отзывы каждого объявления порождаются отдельным генератором
+    с начальным значением из номера объявления: счетчики отзывов объявления
+    вычисляются при генерации объявлений, а сами отзывы - при повторном проходе.
+    """
+
+    USER_FIELDS = [
+        "id",
+        "password",
+        "last_login",
+        "is_superuser",
+        "first_name",
+        "last_name",
+        "is_staff",
+        "is_active",
+        "date_joined",
+        "email",
+        "image",
+        "phone",
+        "role",
+        "updated_at",
+    ]
+    AD_FIELDS = [
+        "id",
+        "title",
+        "price",
+        "description",
+        "created_at",
+        "updated_at",
+        "image",
+        "author",
+        "is_hidden",
+        "review_count",
+        "last_review_at",
+    ]
+    REVIEW_FIELDS = [
+        "id",
+        "text",
+        "ad",
+        "author",
+        "created_at",
+        "updated_at",
+        "is_hidden",
+    ]
+
+    def __init__(
+        self,
+        seed: int,
+        start: float,
+        end: float,
+        author_ids: Optional[Sequence[int]] = None,
+    ) -> None:
+        """
+        :param seed: Начальное значение генератора случайных чисел.
+        :param start: Начало периода (timestamp) для дат регистрации и создания.
+        :param end: Конец периода (timestamp).
+        :param author_ids: Идентификаторы существующих пользователей - авторов
+        объявлений и отзывов, если новые пользователи не создаются.
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.start = start
+        self.end = end
+        self.author_ids = author_ids or []
+
+    def random_timestamp(self, rng: random.Random, start: float) -> float:
+        """
+        Возвращает момент между start и концом периода.
+        Недавние моменты встречаются чаще.
+        """
+        return self.end - (self.end - start) * rng.random() ** 1.5
+
+    def users(self, first_id: int, count: int, password: str) -> Iterator[Tuple]:
+        """
+        Генерирует пользователей с одинаковым заранее вычисленным хэшем пароля.
+        :param first_id: Идентификатор первого пользователя.
+        :param count: Количество пользователей.
+        :param password: Хэш пароля.
+        """
+        rng = self.rng
+        for user_id in range(first_id, first_id + count):
+            gender = rng.choice(("male", "female"))
+            first_name = rng.choice(FIRST_NAMES[gender])
+            last_name = rng.choice(LAST_NAMES)
+            if gender == "female":
+                last_name += "а"
+            login = f"{first_name}.{last_name}".lower().translate(TRANSLITERATION)
+            email = f"{login}{user_id}@{rng.choice(EMAIL_DOMAINS)}"
+            phone = "+7(9{:02d}){:03d}-{:02d}-{:02d}".format(
+                rng.randrange(100),
+                rng.randrange(1000),
+                rng.randrange(100),
+                rng.randrange(100),
+            )
+            date_joined = to_datetime(self.random_timestamp(rng, self.start))
+            yield (
+                user_id,
+                password,
+                None,
+                False,
+                first_name,
+                last_name,
+                False,
+                True,
+                date_joined,
+                email,
+                None,
+                phone,
+                "user",
+                date_joined,
+            )
+
+    def allocate_reviews(self, ads: int, reviews: int) -> array:
+        """
+        Распределяет отзывы по объявлениям: у небольшой части объявлений
+        отзывов много, у большинства - мало или нет.
+        :param ads: Количество объявлений.
+        :param reviews: Количество отзывов.
+        :return: Количество отзывов каждого объявления.
+        """
+        counts = array("I", bytes(4 * ads))
+        rng = self.rng
+        for _ in range(reviews if ads else 0):
+            counts[int(ads * rng.random() ** 3)] += 1
+        return counts
+
+    def ad_reviews(
+        self, index: int, created_at: float, count: int
+    ) -> Iterator[Tuple[float, bool, int, str]]:
+        """
+        Генерирует отзывы объявления: время создания, скрыт ли отзыв,
+        номер автора и текст.
+        :param index: Номер объявления.
+        :param created_at: Время создания объявления (timestamp).
+        :param count: Количество отзывов.
+        """
+        rng = random.Random(self.seed * 4294967296 + index)
+        for _ in range(count):
+            text = " ".join(rng.sample(REVIEW_SENTENCES, rng.randint(1, 2)))
+            yield (
+                self.random_timestamp(rng, created_at),
+                rng.random() < HIDDEN_REVIEW_RATE,
+                rng.randrange(len(self.author_ids)),
+                text,
+            )
+
+    def ads(
+        self, first_id: int, review_counts: array, created: array
+    ) -> Iterator[Tuple]:
+        """
+        Генерирует объявления со счетчиками видимых отзывов.
+        :param first_id: Идентификатор первого объявления.
+        :param review_counts: Количество отзывов каждого объявления.
+        :param created: Массив, в который записывается время создания объявлений.
+        """
+        rng = self.rng
+        for index, review_count in enumerate(review_counts):
+            item, median_price = rng.choice(ITEMS)
+            title = item + rng.choice(TITLE_SUFFIXES)
+            price = round_price(median_price * rng.lognormvariate(0, 0.35))
+            sentences = [
+                f"Продаю {item[0].lower()}{item[1:]} в {rng.choice(CONDITIONS)} состоянии."
+            ]
+            sentences += rng.sample(DESCRIPTION_SENTENCES, rng.randint(1, 3))
+            if rng.random() < 0.5:
+                sentences.append(f"Самовывоз от метро {rng.choice(STATIONS)}.")
+            created_at = self.random_timestamp(rng, self.start)
+            created.append(created_at)
+
+            visible = [
+                review_created_at
+                for review_created_at, hidden, _, _ in self.ad_reviews(
+                    index, created_at, review_count
+                )
+                if not hidden
+            ]
+            last_review_at = to_datetime(max(visible)) if visible else None
+            yield (
+                first_id + index,
+                title,
+                price,
+                " ".join(sentences),
+                to_datetime(created_at),
+                last_review_at or to_datetime(created_at),
+                None,
+                rng.choice(self.author_ids),
+                rng.random() < HIDDEN_AD_RATE,
+                len(visible),
+                last_review_at,
+            )
+
+    def reviews(
+        self, first_id: int, first_ad_id: int, review_counts: array, created: array
+    ) -> Iterator[Tuple]:
+        """
+        Генерирует отзывы объявлений в том же виде, что и при подсчете счетчиков.
+        :param first_id: Идентификатор первого отзыва.
+        :param first_ad_id: Идентификатор первого объявления.
+        :param review_counts: Количество отзывов каждого объявления.
+        :param created: Время создания объявлений.
+        """
+        review_id = first_id
+        for index, review_count in enumerate(review_counts):
+            for created_at, hidden, author, text in self.ad_reviews(
+                index, created[index], review_count
+            ):
+                created_at = to_datetime(created_at)
+                yield (
+                    review_id,
+                    text,
+                    first_ad_id + index,
+                    self.author_ids[author],
+                    created_at,
+                    created_at,
+                    hidden,
+                )
+                review_id += 1
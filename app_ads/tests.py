@@ -1,7 +1,55 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from functools import partial
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlsplit
+
+import brotli
+import psycopg2
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from PIL import Image
 from rest_framework import status
-from rest_framework.test import APIClient, APITestCase
-
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+
+from app_ads.cache import bump_ads_version
+from app_ads.filters import AdFilter
+from app_ads.models import Ad, ImageUpload, MediaBlob, Review
+from app_ads.pagination import EstimatedCountPaginator
+from app_ads.renditions import generate_renditions, get_rendition_name
+from app_ads.serializers import AdListSerializer, AdSerializer, ReviewSerializer
+from app_users.cache import get_cached_user
 from app_users.models import CustomUser
+from config import renderers
+from config.compression import CompressionMiddleware, choose_encoding
+from config.db_pool.pool import ConnectionPool
+from config.parsers import FastJSONParser
+from config.storage import CompressedStaticFilesStorage, ContentAddressedStorage
+from config.db_router import STICKY_KEY, ReplicaRouter
+from config.throttling import parse_rate
 
 
 class BaseTestCase(APITestCase):
@@ -40,6 +88,7 @@ class BaseTestCase(APITestCase):
         return client
 
     def setUp(self):
+        cache.clear()
         self.user_1 = CustomUser.objects.create_user(
             email="ivan@mail.ru",
             password="qwerty123!",
@@ -700,3 +749,2331 @@ class ReviewDeleteAPITestCase(BaseTestCase):
         for ad_id, comment_id in zip(self.ad_ids, self.comment_ids):
             response = self.delete_comment(admin_client, ad_id, comment_id)
             self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class AdCursorPaginationAPITestCase(BaseTestCase):
+    """Курсорная пагинация объявлений"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.ads = [
+            Ad.objects.create(
+                title=f"Объявление {i}",
+                price=1000 + i,
+                description="Описание",
+                author=self.user_1 if i % 2 else self.user_2,
+            )
+            for i in range(10)
+        ]
+
+    def collect_pages(self, client, url):
+        ad_ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response_data = response.json()
+            self.assertNotIn("count", response_data)
+            ad_ids.extend(ad["pk"] for ad in response_data["results"])
+            url = response_data["next"]
+        return ad_ids
+
+    def test_cursor_pagination_returns_all_ads_in_order(self):
+        """Курсорная пагинация отдает все объявления от новых к старым без повторов"""
+
+        ad_ids = self.collect_pages(APIClient(), f"{self.URL}?pagination=cursor")
+        self.assertEqual(ad_ids, [ad.pk for ad in reversed(self.ads)])
+
+    def test_page_pagination_is_default(self):
+        """Без параметра pagination используется постраничная пагинация"""
+
+        response_data = APIClient().get(self.URL).json()
+        self.assertEqual(response_data["count"], len(self.ads))
+        self.assertEqual(len(response_data["results"]), 4)
+
+    def test_cursor_pagination_is_stable_under_inserts(self):
+        """Новые объявления не смещают выдачу следующих страниц"""
+
+        client = APIClient()
+        first_page = client.get(f"{self.URL}?pagination=cursor").json()
+        first_ids = [ad["pk"] for ad in first_page["results"]]
+
+        Ad.objects.create(
+            title="Новое объявление",
+            price=500,
+            description="Описание",
+            author=self.user_1,
+        )
+
+        rest_ids = self.collect_pages(client, first_page["next"])
+        self.assertEqual(first_ids + rest_ids, [ad.pk for ad in reversed(self.ads)])
+
+    def test_cursor_pagination_with_equal_created_at(self):
+        """Объявления с одинаковым временем создания упорядочиваются по id"""
+
+        Ad.objects.update(created_at=self.ads[0].created_at)
+        client = APIClient()
+        ad_ids = self.collect_pages(client, f"{self.URL}?pagination=cursor")
+        self.assertEqual(ad_ids, [ad.pk for ad in reversed(self.ads)])
+
+        first_page = client.get(f"{self.URL}?pagination=cursor").json()
+        second_page = client.get(first_page["next"]).json()
+        self.assertEqual(client.get(second_page["previous"]).json(), first_page)
+
+    def test_cursor_pagination_rejects_search_rank(self):
+        """Курсорная пагинация не сочетается с сортировкой по релевантности"""
+
+        for param in ("q", "fuzzy"):
+            response = APIClient().get(
+                self.URL, {"pagination": "cursor", param: "Объявление"}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_pagination_for_own_ads(self):
+        """Курсорная пагинация доступна для списка своих объявлений"""
+
+        client = self.user_clients[0]
+        ad_ids = self.collect_pages(client, f"{self.URL}me/?pagination=cursor")
+        own_ads = [ad.pk for ad in reversed(self.ads) if ad.author == self.user_1]
+        self.assertEqual(ad_ids, own_ads)
+
+
+class AdSearchAPITestCase(BaseTestCase):
+    """Полнотекстовый поиск объявлений"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.laptop = Ad.objects.create(
+            title="Продам ноутбук",
+            price=50000,
+            description="Игровой ноутбук в хорошем состоянии",
+            author=self.user_1,
+        )
+        self.bag = Ad.objects.create(
+            title="Сумка",
+            price=1500,
+            description="Подходит для ноутбуков",
+            author=self.user_1,
+        )
+        self.car = Ad.objects.create(
+            title="Продам машину",
+            price=300000,
+            description="Отличное состояние",
+            author=self.user_2,
+        )
+
+    def test_search_matches_word_forms_in_title_and_description(self):
+        """Поиск находит разные словоформы в заголовке и описании"""
+
+        response = APIClient().get(self.URL, {"q": "ноутбуки"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        ad_ids = [ad["pk"] for ad in response.json()["results"]]
+        self.assertEqual(ad_ids, [self.laptop.pk, self.bag.pk])
+
+    def test_search_returns_rank_and_headline(self):
+        """Результаты поиска содержат релевантность и подсвеченные фрагменты"""
+
+        response = APIClient().get(self.URL, {"q": "машина"})
+        results = response.json()["results"]
+
+        self.assertEqual(len(results), 1)
+        self.assertGreater(results[0]["search_rank"], 0)
+        self.assertEqual(results[0]["headline"]["title"], "Продам <mark>машину</mark>")
+
+    def test_search_vector_follows_updates(self):
+        """Поисковый вектор обновляется при изменении объявления"""
+
+        self.car.description = "Новый ноутбук в подарок"
+        self.car.save()
+
+        response = APIClient().get(self.URL, {"q": "ноутбук"})
+        ad_ids = [ad["pk"] for ad in response.json()["results"]]
+        self.assertIn(self.car.pk, ad_ids)
+
+    def test_title_filter_still_works(self):
+        """Фильтр по заголовку продолжает работать без полей поиска"""
+
+        response = APIClient().get(self.URL, {"title": "машин"})
+        results = response.json()["results"]
+
+        self.assertEqual([ad["pk"] for ad in results], [self.car.pk])
+        self.assertNotIn("headline", results[0])
+
+
+class AdTrigramAPITestCase(BaseTestCase):
+    """Нечеткий поиск и похожие объявления"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.laptop = Ad.objects.create(
+            title="Игровой ноутбук Lenovo",
+            price=50000,
+            description="Описание",
+            author=self.user_1,
+        )
+        self.other_laptop = Ad.objects.create(
+            title="Игровой ноутбук Asus",
+            price=60000,
+            description="Описание",
+            author=self.user_2,
+        )
+        self.car = Ad.objects.create(
+            title="Автомобиль",
+            price=300000,
+            description="Описание",
+            author=self.user_2,
+        )
+
+    def test_fuzzy_search_tolerates_typos(self):
+        """Нечеткий поиск находит объявления по запросу с опечаткой"""
+
+        response = APIClient().get(self.URL, {"fuzzy": "ноудбук"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = response.json()["results"]
+        self.assertEqual(
+            {ad["pk"] for ad in results}, {self.laptop.pk, self.other_laptop.pk}
+        )
+        self.assertTrue(all(ad["similarity"] > 0 for ad in results))
+
+    def test_similar_ads(self):
+        """Похожие объявления подбираются по заголовку без самого объявления"""
+
+        client = self.user_clients[0]
+        response = client.get(f"{self.URL}{self.laptop.pk}/similar/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        ad_ids = [ad["pk"] for ad in response.json()]
+        self.assertEqual(ad_ids, [self.other_laptop.pk])
+
+    def test_similar_ads_for_missing_ad(self):
+        """Для несуществующего объявления возвращается 404"""
+
+        client = self.user_clients[0]
+        response = client.get(f"{self.URL}0/similar/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unauthorized_user_cannot_get_similar_ads(self):
+        """Неавторизованный пользователь не видит похожие объявления"""
+
+        response = APIClient().get(f"{self.URL}{self.laptop.pk}/similar/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AdPriceFilterAPITestCase(BaseTestCase):
+    """Фильтрация по цене и сортировка объявлений"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.ads = [
+            Ad.objects.create(
+                title=f"Объявление {price}",
+                price=price,
+                description="Описание",
+                author=self.user_1,
+            )
+            for price in (3000, 1000, 5000, 2000, 4000)
+        ]
+
+    def get_prices(self, params):
+        response = APIClient().get(self.URL, {"pagination": "cursor", **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [ad["price"] for ad in response.json()["results"]]
+
+    def test_price_range(self):
+        """Фильтр по диапазону цены включает границы"""
+
+        prices = self.get_prices({"price_min": 2000, "price_max": 4000})
+        self.assertEqual(sorted(prices), [2000, 3000, 4000])
+
+    def test_ordering(self):
+        """Сортировка по цене и по новизне"""
+
+        self.assertEqual(
+            self.get_prices({"ordering": "price"}), [1000, 2000, 3000, 4000]
+        )
+        self.assertEqual(
+            self.get_prices({"ordering": "-price"}), [5000, 4000, 3000, 2000]
+        )
+        self.assertEqual(
+            self.get_prices({"ordering": "-created_at"}), [4000, 2000, 5000, 1000]
+        )
+
+    def test_ordering_with_page_pagination(self):
+        """Сортировка работает и с постраничной пагинацией"""
+
+        response = APIClient().get(
+            self.URL, {"ordering": "price", "price_min": 1000, "page": 2}
+        )
+        self.assertEqual(response.json()["count"], 5)
+        self.assertEqual([ad["price"] for ad in response.json()["results"]], [5000])
+
+    def test_invalid_ordering(self):
+        """Неизвестный вариант сортировки отклоняется"""
+
+        response = APIClient().get(self.URL, {"ordering": "title"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnless(os.getenv("RUN_EXPLAIN_TESTS"), "RUN_EXPLAIN_TESTS не задана")
+class AdPriceIndexExplainTestCase(TestCase):
+    """
+    Планы запросов фильтрации по цене и сортировки на 1 млн объявлений.
+    Каждая комбинация фильтра и сортировки должна обслуживаться индексом.
+    Заполнение таблицы занимает заметное время, поэтому тест запускается
+    только при заданной переменной окружения RUN_EXPLAIN_TESTS.
+    """
+
+    ROWS = 1_000_000
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user(
+            email="seller@mail.ru", password="qwerty123!", phone="+7(921)123-45-67"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO ads (
+                    title, price, description, author_id,
+                    created_at, updated_at, review_count, is_hidden
+                )
+                SELECT 'Объявление ' || g, (random() * 1000000)::int, '', %s,
+                       now() - g * interval '1 second', now(), 0, false
+                FROM generate_series(1, %s) AS g
+                """,
+                [author.pk, cls.ROWS],
+            )
+            cursor.execute("ANALYZE ads")
+
+    def test_no_seq_scan_on_ads(self):
+        """Ни одна комбинация фильтра по цене и сортировки не читает ads целиком"""
+
+        price_filters = [
+            {},
+            {"price_min": 1000},
+            {"price_max": 5000},
+            {"price_min": 1000, "price_max": 5000},
+            {"price_min": 900000},
+        ]
+        orderings = [None, "price", "-price", "-created_at"]
+
+        for price_filter in price_filters:
+            for ordering in orderings:
+                data = dict(price_filter)
+                if ordering:
+                    data["ordering"] = ordering
+                with self.subTest(**data):
+                    queryset = AdFilter(data, queryset=Ad.get_visible_ads()).qs
+                    plan = queryset[:4].explain()
+                    self.assertIn("Index Scan", plan)
+                    self.assertNotIn("Seq Scan on ads", plan)
+
+
+class AdListCacheAPITestCase(BaseTestCase):
+    """Кэширование списка объявлений"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.ad = Ad.objects.create(
+            title="Продам ноутбук",
+            price=50000,
+            description="Хороший ноутбук",
+            author=self.user_1,
+        )
+
+    def test_repeated_request_is_served_from_cache(self):
+        """Повторный запрос той же страницы не обращается к базе данных"""
+
+        client = APIClient()
+        first_response = client.get(self.URL, {"price_min": 100, "ordering": "price"})
+
+        with self.assertNumQueries(0):
+            second_response = client.get(
+                self.URL, {"ordering": "price", "price_min": 100, "title": ""}
+            )
+
+        self.assertEqual(second_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(second_response.json(), first_response.json())
+
+    def test_encoded_separators_do_not_share_cache(self):
+        """Закодированные '&' и '=' в значении не совпадают с другой строкой запроса"""
+
+        client = APIClient()
+        response = client.get(f"{self.URL}?fuzzy=a%26page%3D2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = client.get(f"{self.URL}?fuzzy=a&page=2")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_changes_invalidate_cache(self):
+        """Создание, изменение и удаление объявления сбрасывают кэш списка"""
+
+        client = APIClient()
+        client.get(self.URL)
+
+        new_ad = Ad.objects.create(
+            title="Продам машину",
+            price=300000,
+            description="Отличное состояние",
+            author=self.user_2,
+        )
+        self.assertEqual(client.get(self.URL).json()["count"], 2)
+
+        self.user_clients[0].patch(f"{self.URL}{self.ad.pk}/", {"title": "Ноутбук"})
+        titles = [ad["title"] for ad in client.get(self.URL).json()["results"]]
+        self.assertIn("Ноутбук", titles)
+
+        new_ad.delete()
+        self.assertEqual(client.get(self.URL).json()["count"], 1)
+
+    def test_own_ads_are_not_cached(self):
+        """Список своих объявлений не берется из кэша"""
+
+        client = self.user_clients[0]
+        client.get(f"{self.URL}me/")
+
+        Ad.objects.filter(pk=self.ad.pk).update(title="Ноутбук")
+        response = client.get(f"{self.URL}me/")
+        self.assertEqual(response.json()["results"][0]["title"], "Ноутбук")
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": tempfile.mkdtemp(),
+            }
+        }
+    )
+    def test_file_based_cache_backend(self):
+        """Кэш работает с файловым бэкендом"""
+
+        cache.clear()
+        client = APIClient()
+        first_response = client.get(self.URL)
+
+        with self.assertNumQueries(0):
+            second_response = client.get(self.URL)
+
+        self.assertEqual(second_response.json(), first_response.json())
+
+
+class ConditionalGetAPITestCase(BaseTestCase):
+    """Условные GET-запросы для объявлений и отзывов"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.ad = Ad.objects.create(
+            title="Продам ноутбук",
+            price=50000,
+            description="Хороший ноутбук",
+            author=self.user_1,
+        )
+        self.review = Review.objects.create(
+            text="Отличное объявление!", author=self.user_2, ad=self.ad
+        )
+        self.owner_client = self.user_clients[0]
+        self.urls = [
+            self.URL,
+            f"{self.URL}{self.ad.pk}/",
+            f"{self.URL}{self.ad.pk}/comments/",
+            f"{self.URL}{self.ad.pk}/comments/{self.review.pk}/",
+        ]
+
+    def test_not_modified_with_etag(self):
+        """При совпадении ETag возвращается 304 без тела"""
+
+        for url in self.urls:
+            response = self.owner_client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.has_header("ETag"))
+
+            response = self.owner_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b"")
+
+    def test_not_modified_with_last_modified(self):
+        """При совпадении If-Modified-Since возвращается 304"""
+
+        for url in self.urls[1:]:
+            response = self.owner_client.get(url)
+            response = self.owner_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            )
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_changes_produce_new_etag(self):
+        """После изменения объявления и отзыва возвращается полный ответ"""
+
+        etags = [self.owner_client.get(url)["ETag"] for url in self.urls]
+
+        self.owner_client.patch(f"{self.URL}{self.ad.pk}/", {"title": "Ноутбук"})
+        self.user_clients[1].patch(self.urls[3], {"text": "Обновленный отзыв"})
+
+        for url, etag in zip(self.urls, etags):
+            response = self.owner_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_author_changes_produce_new_etag(self):
+        """После изменения профиля автора возвращается полный ответ с новыми данными"""
+
+        urls = self.urls[1:] + [
+            url.replace("/api/", "/api/async/") for url in self.urls[1:]
+        ]
+        etags = [self.owner_client.get(url)["ETag"] for url in urls]
+
+        for user in (self.user_1, self.user_2):
+            user.last_name = "Новая фамилия"
+            user.save()
+
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.owner_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertIn("Новая фамилия", response.content.decode())
+
+    def test_deleted_review_changes_list_etag(self):
+        """Удаление отзыва меняет ETag списка отзывов"""
+
+        Review.objects.create(text="Еще отзыв", author=self.user_1, ad=self.ad)
+        etag = self.owner_client.get(self.urls[2])["ETag"]
+
+        self.review.delete()
+        response = self.owner_client.get(self.urls[2], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_hidden_objects_get_404_not_304(self):
+        """Скрытые модератором объявление и отзыв не отдаются по совпавшему ETag"""
+
+        etags = {url: self.owner_client.get(url)["ETag"] for url in self.urls[1::2]}
+        Ad.objects.filter(pk=self.ad.pk).update(is_hidden=True)
+        Review.objects.filter(pk=self.review.pk).update(is_hidden=True)
+
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.user_clients[1].get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unauthorized_user_gets_401_not_304(self):
+        """Проверка прав выполняется до проверки ETag"""
+
+        etag = self.owner_client.get(self.urls[1])["ETag"]
+        response = APIClient().get(self.urls[1], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AdReviewCountersAPITestCase(BaseTestCase):
+    """Счетчики отзывов объявления"""
+
+    COMMENT_DATA = {"text": "Отличное объявление!"}
+
+    def setUp(self):
+        super().setUp()
+
+        self.ad = Ad.objects.create(
+            title="Продам ноутбук",
+            price=50000,
+            description="Хороший ноутбук",
+            author=self.user_1,
+        )
+        self.comments_url = f"{self.URL}{self.ad.pk}/comments/"
+
+    def test_last_review_at_does_not_go_backwards(self):
+        """Отзыв, зафиксированный позже более нового отзыва, не уменьшает last_review_at"""
+
+        newer = Review.objects.create(
+            text="Новый отзыв", author=self.user_2, ad=self.ad
+        )
+        older = Review.objects.create(
+            text="Старый отзыв", author=self.user_2, ad=self.ad
+        )
+        older.created_at = newer.created_at - timedelta(seconds=1)
+
+        self.ad.register_review(newer)
+        self.ad.register_review(older)
+
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.review_count, 2)
+        self.assertEqual(self.ad.last_review_at, newer.created_at)
+
+    def test_counters_follow_reviews(self):
+        """Создание и удаление отзывов обновляют счетчики объявления"""
+
+        client = self.user_clients[1]
+        first = client.post(self.comments_url, self.COMMENT_DATA).json()
+        second = client.post(self.comments_url, self.COMMENT_DATA).json()
+
+        ad_data = client.get(f"{self.URL}{self.ad.pk}/").json()
+        self.assertEqual(ad_data["review_count"], 2)
+        self.assertEqual(ad_data["last_review_at"], second["created_at"])
+
+        list_data = APIClient().get(self.URL).json()["results"][0]
+        self.assertEqual(list_data["review_count"], 2)
+
+        client.delete(f"{self.comments_url}{second['pk']}/")
+        ad_data = client.get(f"{self.URL}{self.ad.pk}/").json()
+        self.assertEqual(ad_data["review_count"], 1)
+        self.assertEqual(ad_data["last_review_at"], first["created_at"])
+
+        client.delete(f"{self.comments_url}{first['pk']}/")
+        ad_data = client.get(f"{self.URL}{self.ad.pk}/").json()
+        self.assertEqual(ad_data["review_count"], 0)
+        self.assertIsNone(ad_data["last_review_at"])
+
+    def test_counters_cost_no_extra_queries(self):
+        """Счетчики в списке объявлений не требуют дополнительных запросов"""
+
+        for i in range(3):
+            Ad.objects.create(
+                title=f"Объявление {i}",
+                price=1000,
+                description="Описание",
+                author=self.user_2,
+            )
+
+        client = APIClient()
+        with CaptureQueriesContext(connection) as without_reviews:
+            client.get(self.URL)
+
+        for _ in range(3):
+            Review.objects.create(text="Отзыв", author=self.user_1, ad=self.ad)
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as with_reviews:
+            response = client.get(self.URL)
+
+        self.assertEqual(len(with_reviews), len(without_reviews))
+        self.assertEqual(len(response.json()["results"]), 4)
+
+    def test_recompute_command(self):
+        """Команда пересчитывает рассинхронизированные счетчики"""
+
+        reviews = [
+            Review.objects.create(text="Отзыв", author=self.user_2, ad=self.ad)
+            for _ in range(3)
+        ]
+        empty_ad = Ad.objects.create(
+            title="Без отзывов",
+            price=1000,
+            description="Описание",
+            author=self.user_2,
+            review_count=5,
+        )
+
+        call_command("recompute_review_counters", batch_size=1, stdout=StringIO())
+
+        self.ad.refresh_from_db()
+        empty_ad.refresh_from_db()
+        self.assertEqual(self.ad.review_count, 3)
+        self.assertEqual(self.ad.last_review_at, reviews[-1].created_at)
+        self.assertEqual(empty_ad.review_count, 0)
+        self.assertIsNone(empty_ad.last_review_at)
+
+
+class EstimatedCountPaginationAPITestCase(BaseTestCase):
+    """Оценочный подсчет количества объектов при пагинации"""
+
+    def setUp(self):
+        super().setUp()
+
+        for i in range(20):
+            Ad.objects.create(
+                title=f"Объявление {i}",
+                price=1000 * i,
+                description="Описание",
+                author=self.user_1,
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE ads")
+
+    def get_count(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(self.URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        count_queries = [
+            query["sql"] for query in queries if "COUNT(*)" in query["sql"]
+        ]
+        return response.json()["count"], count_queries
+
+    def test_small_sets_are_counted_exactly(self):
+        """Ниже порога количество считается точно"""
+
+        count, count_queries = self.get_count({"price_min": 5000})
+        self.assertEqual(count, 15)
+        self.assertEqual(len(count_queries), 1)
+
+    def test_exact_count_is_cached_until_ads_change(self):
+        """Точное количество кэшируется до изменения объявлений"""
+
+        self.get_count({"price_min": 5000})
+        count, count_queries = self.get_count({"price_min": 5000, "page": 2})
+        self.assertEqual(count, 15)
+        self.assertEqual(count_queries, [])
+
+        Ad.objects.create(
+            title="Новое объявление",
+            price=50000,
+            description="Описание",
+            author=self.user_1,
+        )
+        count, count_queries = self.get_count({"price_min": 5000, "page": 2})
+        self.assertEqual(count, 16)
+        self.assertEqual(len(count_queries), 1)
+
+    @override_settings(PAGINATION_EXACT_COUNT_THRESHOLD=5)
+    def test_unfiltered_count_uses_table_statistics(self):
+        """Количество всех объявлений берется из статистики таблицы"""
+
+        count, count_queries = self.get_count({})
+        self.assertEqual(count, 20)
+        self.assertEqual(count_queries, [])
+
+    @override_settings(PAGINATION_EXACT_COUNT_THRESHOLD=5)
+    def test_filtered_count_uses_planner_estimate(self):
+        """Количество отфильтрованных объявлений берется из плана запроса"""
+
+        count, count_queries = self.get_count({"price_min": 5000})
+        self.assertGreater(count, 0)
+        self.assertEqual(count_queries, [])
+
+    @override_settings(PAGINATION_EXACT_COUNT_THRESHOLD=5)
+    def test_estimate_is_cached(self):
+        """Оценка кэшируется по сигнатуре запроса"""
+
+        self.get_count({"price_min": 5000})
+        bump_ads_version()
+
+        with CaptureQueriesContext(connection) as queries:
+            APIClient().get(self.URL, {"price_min": 5000})
+        self.assertFalse(any("EXPLAIN" in query["sql"] for query in queries))
+
+    def test_next_link_does_not_follow_overestimate(self):
+        """Завышенная оценка не дает ссылку next на последней странице"""
+
+        for url in (self.URL, "/api/async/ads/"):
+            with self.subTest(url=url), mock.patch.object(
+                EstimatedCountPaginator, "count", 100000
+            ):
+                response = APIClient().get(url, {"page": 5})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json()["count"], 100000)
+                self.assertEqual(len(response.json()["results"]), 4)
+                self.assertIsNone(response.json()["next"])
+
+                response = APIClient().get(url, {"page": 6})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_next_link_does_not_follow_underestimate(self):
+        """Заниженная оценка не отбрасывает существующие страницы"""
+
+        with mock.patch.object(EstimatedCountPaginator, "count", 4):
+            response = APIClient().get(self.URL, {"page": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["results"]), 4)
+        self.assertIsNotNone(response.json()["next"])
+
+    def test_other_lists_use_exact_count(self):
+        """Оценочный подсчет не используется по умолчанию для других списков"""
+
+        self.assertEqual(api_settings.DEFAULT_PAGINATION_CLASS, PageNumberPagination)
+
+    def test_reviews_use_estimated_count(self):
+        """Список отзывов использует оценочный подсчет"""
+
+        ad = Ad.objects.first()
+        for url in (self.URL, "/api/async/ads/"):
+            with self.subTest(url=url), mock.patch.object(
+                EstimatedCountPaginator, "count", 100000
+            ):
+                response = self.user_clients[0].get(f"{url}{ad.pk}/comments/")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json()["count"], 100000)
+                self.assertIsNone(response.json()["next"])
+
+
+class ReviewListQueriesAPITestCase(BaseTestCase):
+    """Количество запросов при чтении отзывов"""
+
+    def setUp(self):
+        super().setUp()
+
+        self.ad = Ad.objects.create(
+            title="Продам ноутбук",
+            price=50000,
+            description="Хороший ноутбук",
+            author=self.user_1,
+        )
+        self.url = f"{self.URL}{self.ad.pk}/comments/"
+        self.user_2.image = "users/avatar.jpg"
+        self.user_2.save()
+
+    def create_reviews(self, number):
+        for i in range(number):
+            author = self.user_1 if i % 2 else self.user_2
+            Review.objects.create(text=f"Отзыв {i}", author=author, ad=self.ad)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.user_clients[0].get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        """Количество запросов не зависит от количества отзывов на странице"""
+
+        self.create_reviews(1)
+        self.count_queries()  # пользователь загружается в кэш аутентификации
+        queries_for_one = self.count_queries()
+
+        self.create_reviews(9)
+        self.assertEqual(self.count_queries(), queries_for_one)
+
+    def test_author_image_is_absolute_url(self):
+        """Изображение автора возвращается абсолютным URL"""
+
+        self.create_reviews(2)
+        results = self.user_clients[0].get(self.url).json()["results"]
+
+        images = {review["author_id"]: review["author_image"] for review in results}
+        self.assertEqual(
+            images[self.user_2.pk], "http://testserver/django_media/users/avatar.jpg"
+        )
+        self.assertIsNone(images[self.user_1.pk])
+
+    def test_missing_ad_returns_404(self):
+        """Для несуществующего объявления возвращается 404"""
+
+        response = self.user_clients[0].get(f"{self.URL}0/comments/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AdBulkCreateAPITestCase(BaseTestCase):
+    """Пакетное создание объявлений"""
+
+    BULK_URL = "/api/ads/bulk/"
+
+    def test_bulk_create_with_item_errors(self):
+        """Корректные объявления создаются, для некорректных возвращаются ошибки"""
+
+        client = self.user_clients[0]
+        data = [
+            self.ADS_DATA[0],
+            {"title": "   ", "price": 100, "description": "Описание"},
+            self.ADS_DATA[1],
+            {"title": "Без цены", "description": "Описание"},
+        ]
+
+        response = client.post(self.BULK_URL, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response_data = response.json()
+        self.assertEqual([item["index"] for item in response_data["created"]], [0, 2])
+        self.assertEqual([item["index"] for item in response_data["errors"]], [1, 3])
+        self.assertIn("title", response_data["errors"][0]["errors"])
+        self.assertIn("price", response_data["errors"][1]["errors"])
+
+        ads = Ad.objects.filter(author=self.user_1).order_by("id")
+        self.assertEqual(
+            [ad.pk for ad in ads], [item["pk"] for item in response_data["created"]]
+        )
+        self.assertEqual([ad.title for ad in ads], ["Продам ноутбук", "Продам машину"])
+
+    def test_bulk_created_ads_are_listed_and_searchable(self):
+        """Созданные пакетом объявления попадают в список и поиск"""
+
+        client = self.user_clients[0]
+        APIClient().get(self.URL)
+
+        data = [
+            {"title": f"Ноутбук {i}", "price": 1000 + i, "description": "Описание"}
+            for i in range(10)
+        ]
+        with self.settings(ADS_BULK_CREATE_BATCH_SIZE=3):
+            response = client.post(self.BULK_URL, data, format="json")
+        self.assertEqual(len(response.json()["created"]), 10)
+
+        self.assertEqual(APIClient().get(self.URL).json()["count"], 10)
+        search = APIClient().get(self.URL, {"q": "ноутбуки"}).json()
+        self.assertEqual(search["count"], 10)
+
+    def test_all_invalid_items(self):
+        """Если ни одно объявление не создано, возвращается 400"""
+
+        client = self.user_clients[0]
+        response = client.post(
+            self.BULK_URL, [{"title": ""}, "not an object"], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.json()["errors"]), 2)
+        self.assertFalse(Ad.objects.exists())
+
+    def test_body_must_be_list(self):
+        """Тело запроса должно быть списком"""
+
+        client = self.user_clients[0]
+        response = client.post(self.BULK_URL, self.ADS_DATA[0], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_empty_list(self):
+        """Пустой список отклоняется с понятной ошибкой"""
+
+        response = self.user_clients[0].post(self.BULK_URL, [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json(),
+            {"non_field_errors": ["Ожидается непустой список объявлений."]},
+        )
+
+    @override_settings(ADS_BULK_CREATE_MAX_ITEMS=2)
+    def test_too_many_items(self):
+        """Слишком длинный список отклоняется до проверки объявлений"""
+
+        with mock.patch.object(AdSerializer, "run_validation") as run_validation:
+            response = self.user_clients[0].post(
+                self.BULK_URL, self.ADS_DATA * 2, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.json())
+        run_validation.assert_not_called()
+        self.assertFalse(Ad.objects.exists())
+
+    def test_unauthorized_user_cannot_bulk_create(self):
+        """Неавторизованный пользователь не может создавать объявления"""
+
+        response = APIClient().post(self.BULK_URL, self.ADS_DATA, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ModerationAPITestCase(BaseTestCase):
+    """Массовая модерация объявлений и отзывов"""
+
+    ADS_URL = "/api/moderation/ads/"
+    REVIEWS_URL = "/api/moderation/reviews/"
+
+    def setUp(self):
+        super().setUp()
+
+        self.ads = [
+            Ad.objects.create(
+                title=f"Объявление {i}",
+                price=1000 + i,
+                description="Описание",
+                author=self.user_1 if i < 3 else self.user_2,
+            )
+            for i in range(5)
+        ]
+        self.reviews = []
+        for ad in self.ads[:2]:
+            for author in (self.user_1, self.user_2):
+                review = Review.objects.create(text="Отзыв", author=author, ad=ad)
+                ad.register_review(review)
+                self.reviews.append(review)
+
+    def test_user_cannot_moderate(self):
+        """Пользователь без роли администратора не может выполнять модерацию"""
+
+        data = {"action": "delete", "ids": [self.ads[0].pk]}
+        response = self.user_clients[0].post(self.ADS_URL, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = APIClient().post(self.REVIEWS_URL, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(Ad.objects.count(), 5)
+
+    def test_ids_or_author_required(self):
+        """Необходимо указать ровно один способ выбора объектов"""
+
+        client = self.user_clients[1]
+        for data in (
+            {"action": "delete"},
+            {"action": "delete", "ids": [1], "author_id": self.user_1.pk},
+            {"action": "ban", "ids": [1]},
+        ):
+            response = client.post(self.ADS_URL, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(MODERATION_BATCH_SIZE=2)
+    def test_delete_ads_by_author(self):
+        """Администратор удаляет все объявления автора вместе с отзывами"""
+
+        client = self.user_clients[1]
+        self.assertEqual(client.get(self.URL).json()["count"], 5)
+
+        data = {"action": "delete", "author_id": self.user_1.pk}
+        response = client.post(self.ADS_URL, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"action": "delete", "affected": 3})
+
+        self.assertFalse(Ad.objects.filter(author=self.user_1).exists())
+        self.assertFalse(Review.objects.exists())
+        self.assertEqual(client.get(self.URL).json()["count"], 2)
+
+    def test_hide_and_unhide_ads_by_ids(self):
+        """Скрытые объявления не попадают в список, но видны автору"""
+
+        client = self.user_clients[1]
+        ids = [self.ads[0].pk, self.ads[1].pk]
+
+        response = client.post(
+            self.ADS_URL, {"action": "hide", "ids": ids}, format="json"
+        )
+        self.assertEqual(response.json()["affected"], 2)
+
+        listed = [ad["pk"] for ad in client.get(self.URL).json()["results"]]
+        self.assertFalse(set(ids) & set(listed))
+        response = client.get(f"{self.URL}{ids[0]}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        own = self.user_clients[0].get(f"{self.URL}me/").json()["results"]
+        self.assertEqual(len(own), 3)
+
+        response = client.post(
+            self.ADS_URL, {"action": "unhide", "ids": ids}, format="json"
+        )
+        self.assertEqual(response.json()["affected"], 2)
+        self.assertEqual(client.get(self.URL).json()["count"], 5)
+
+    def test_owner_and_admin_manage_hidden_ad(self):
+        """Автор и администратор изменяют и удаляют скрытое объявление"""
+
+        Ad.objects.filter(pk__in=[self.ads[0].pk, self.ads[1].pk]).update(
+            is_hidden=True
+        )
+        owner, admin = self.user_clients
+        url = f"{self.URL}{self.ads[0].pk}/"
+        response = owner.patch(url, {"price": 5000}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["price"], 5000)
+        response = owner.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        url = f"{self.URL}{self.ads[1].pk}/"
+        response = admin.patch(url, {"price": 6000}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(admin.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+
+        hidden = Ad.objects.create(
+            title="Чужое", price=1, description="", author=self.user_2, is_hidden=True
+        )
+        response = owner.patch(f"{self.URL}{hidden.pk}/", {"price": 2}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = owner.patch(f"{self.URL}{self.ads[3].pk}/", {"price": 2})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_cannot_review_hidden_ad(self):
+        """К скрытому объявлению нельзя оставить отзыв"""
+
+        ad = self.ads[0]
+        ad.is_hidden = True
+        ad.save(update_fields=["is_hidden"])
+        response = self.user_clients[0].post(
+            f"{self.URL}{ad.pk}/comments/", {"text": "Отзыв"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        ad.refresh_from_db()
+        self.assertEqual(ad.review_count, 2)
+
+    def test_hide_reviews_updates_counters(self):
+        """Скрытые отзывы не отображаются и не учитываются в счетчиках"""
+
+        client = self.user_clients[1]
+        data = {"action": "hide", "author_id": self.user_2.pk}
+        response = client.post(self.REVIEWS_URL, data, format="json")
+        self.assertEqual(response.json(), {"action": "hide", "affected": 2})
+
+        ad = self.ads[0]
+        reviews = client.get(f"{self.URL}{ad.pk}/comments/").json()["results"]
+        self.assertEqual([review["author_id"] for review in reviews], [self.user_1.pk])
+
+        ad.refresh_from_db()
+        self.assertEqual(ad.review_count, 1)
+        self.assertEqual(client.get(f"{self.URL}{ad.pk}/").json()["review_count"], 1)
+
+    @override_settings(MODERATION_BATCH_SIZE=1)
+    def test_delete_reviews_by_ids(self):
+        """Удаление отзывов пересчитывает счетчики объявлений"""
+
+        client = self.user_clients[1]
+        ids = [review.pk for review in self.reviews[:3]]
+        response = client.post(
+            self.REVIEWS_URL, {"action": "delete", "ids": ids}, format="json"
+        )
+        self.assertEqual(response.json()["affected"], 3)
+
+        counters = dict(
+            Ad.objects.filter(pk__in=[self.ads[0].pk, self.ads[1].pk]).values_list(
+                "pk", "review_count"
+            )
+        )
+        self.assertEqual(counters, {self.ads[0].pk: 0, self.ads[1].pk: 1})
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_RENDITION_WORKERS=0)
+class ImageRenditionsAPITestCase(BaseTestCase):
+    """Уменьшенные копии изображений объявлений и пользователей"""
+
+    @staticmethod
+    def make_image(name, size, image_format="JPEG"):
+        buffer = BytesIO()
+        Image.new("RGB", size, (200, 100, 50)).save(buffer, image_format)
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def test_renditions_created_on_upload(self):
+        """При загрузке изображения создаются копии JPEG и WebP всех размеров"""
+
+        data = dict(self.ADS_DATA[0], image=self.make_image("photo.jpg", (3000, 2000)))
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.user_clients[0].post(self.URL, data, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        name = Ad.objects.get(pk=response.json()["pk"]).image.name
+        # Копии создаются только после фиксации транзакции.
+        self.assertFalse(default_storage.exists(get_rendition_name(name, 320, "jpeg")))
+        for callback in callbacks:
+            callback()
+        for width in (320, 640, 1280):
+            with default_storage.open(get_rendition_name(name, width, "jpeg")) as file:
+                image = Image.open(file)
+                self.assertEqual((image.format, image.width), ("JPEG", width))
+            with default_storage.open(get_rendition_name(name, width, "webp")) as file:
+                self.assertEqual(Image.open(file).format, "WEBP")
+
+    def test_small_image_is_not_upscaled(self):
+        """Изображения меньше требуемой ширины не увеличиваются"""
+
+        data = dict(
+            self.ADS_DATA[0], image=self.make_image("icon.png", (100, 50), "PNG")
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.user_clients[0].post(self.URL, data, format="multipart")
+
+        name = Ad.objects.get(pk=response.json()["pk"]).image.name
+        with default_storage.open(get_rendition_name(name, 640, "webp")) as file:
+            self.assertEqual(Image.open(file).size, (100, 50))
+
+    def test_srcset_in_ad_responses(self):
+        """Адреса копий возвращаются в списке и в карточке объявления"""
+
+        data = dict(self.ADS_DATA[0], image=self.make_image("photo.jpg", (800, 600)))
+        pk = self.user_clients[0].post(self.URL, data, format="multipart").json()["pk"]
+        name = Ad.objects.get(pk=pk).image.name
+
+        ad_list = APIClient().get(self.URL).json()["results"][0]
+        ad_detail = self.user_clients[0].get(f"{self.URL}{pk}/").json()
+        for ad in (ad_list, ad_detail):
+            self.assertEqual(
+                ad["image_srcset"]["webp"].split(", ")[0],
+                "http://testserver/django_media/"
+                f"{get_rendition_name(name, 320, 'webp')} 320w",
+            )
+            self.assertEqual(len(ad["image_srcset"]["jpeg"].split(", ")), 3)
+
+        Ad.objects.create(author=self.user_1, **self.ADS_DATA[1])
+        ad_without_image = APIClient().get(self.URL).json()["results"][0]
+        self.assertIsNone(ad_without_image["image_srcset"])
+
+    def test_author_image_srcset_in_reviews(self):
+        """Адреса копий аватара автора возвращаются в отзывах"""
+
+        self.user_2.image = self.make_image("avatar.jpg", (400, 400))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user_2.save()
+        name = self.user_2.image.name
+        self.assertTrue(default_storage.exists(get_rendition_name(name, 320, "webp")))
+
+        ad = Ad.objects.create(author=self.user_1, **self.ADS_DATA[0])
+        Review.objects.create(text="Отзыв", author=self.user_2, ad=ad)
+        Review.objects.create(text="Отзыв", author=self.user_1, ad=ad)
+
+        results = (
+            self.user_clients[0].get(f"{self.URL}{ad.pk}/comments/").json()["results"]
+        )
+        srcsets = {
+            review["author_id"]: review["author_image_srcset"] for review in results
+        }
+        self.assertIn(
+            f"{get_rendition_name(name, 640, 'jpeg')} 640w",
+            srcsets[self.user_2.pk]["jpeg"],
+        )
+        self.assertIsNone(srcsets[self.user_1.pk])
+
+    @override_settings(IMAGE_RENDITION_WORKERS=2)
+    def test_renditions_created_by_worker(self):
+        """Копии создаются пулом потоков, а не в обработчике запроса"""
+
+        data = dict(self.ADS_DATA[0], image=self.make_image("photo.jpg", (800, 600)))
+        with mock.patch("app_ads.renditions.get_executor") as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.user_clients[0].post(self.URL, data, format="multipart")
+        image = Ad.objects.get(pk=response.json()["pk"]).image
+        get_executor.return_value.submit.assert_called_once_with(
+            generate_renditions, image
+        )
+
+    def test_generate_renditions_command(self):
+        """Команда создает копии для ранее загруженных изображений"""
+
+        default_storage.save("ads/old.jpg", self.make_image("old.jpg", (500, 500)))
+        Ad.objects.bulk_create(
+            [Ad(author=self.user_1, image="ads/old.jpg", **self.ADS_DATA[0])]
+        )
+        self.assertFalse(default_storage.exists("ads/renditions/old_320w.jpg"))
+
+        call_command("generate_image_renditions", stdout=StringIO())
+        self.assertTrue(default_storage.exists("ads/renditions/old_320w.jpg"))
+        self.assertTrue(default_storage.exists("ads/renditions/old_1280w.webp"))
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    CHUNKED_UPLOAD_DIR=tempfile.mkdtemp(),
+    CHUNKED_UPLOAD_MAX_CHUNK_SIZE=1024,
+    IMAGE_RENDITION_WORKERS=0,
+)
+class ChunkedImageUploadAPITestCase(BaseTestCase):
+    """Загрузка изображений объявлений по частям"""
+
+    UPLOADS_URL = "/api/uploads/"
+
+    def setUp(self):
+        super().setUp()
+
+        self.ad = Ad.objects.create(author=self.user_1, **self.ADS_DATA[0])
+        buffer = BytesIO()
+        Image.effect_noise((200, 150), 64).convert("RGB").save(buffer, "JPEG")
+        self.content = buffer.getvalue()
+        self.client = self.user_clients[0]
+
+    def init_upload(self, client=None, **data):
+        data = {"filename": "photo.jpg", "size": len(self.content), **data}
+        return (client or self.client).post(self.UPLOADS_URL, data, format="json")
+
+    def put_chunk(self, upload_id, offset, data, client=None):
+        return (client or self.client).put(
+            f"{self.UPLOADS_URL}{upload_id}/chunk/",
+            data,
+            content_type="application/octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload_all(self, upload_id, chunk_size=1000):
+        for offset in range(0, len(self.content), chunk_size):
+            end = offset + chunk_size
+            response = self.put_chunk(upload_id, offset, self.content[offset:end])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def finalize(self, upload_id, ad_id, client=None):
+        return (client or self.client).post(
+            f"{self.UPLOADS_URL}{upload_id}/finalize/", {"ad": ad_id}, format="json"
+        )
+
+    def test_chunked_upload_attaches_image_to_ad(self):
+        """Изображение, переданное частями, сохраняется в объявлении"""
+
+        response = self.init_upload()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload = response.json()
+        self.assertEqual((upload["offset"], upload["chunk_size"]), (0, 1024))
+
+        response = self.upload_all(upload["id"])
+        self.assertEqual(response["Upload-Offset"], str(len(self.content)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.finalize(upload["id"], self.ad.pk)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()["image"].endswith(".jpg"))
+
+        self.ad.refresh_from_db()
+        with self.ad.image.open("rb") as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertFalse(ImageUpload.objects.exists())
+        self.assertTrue(
+            default_storage.exists(get_rendition_name(self.ad.image.name, 320, "webp"))
+        )
+
+    def test_resume_after_offset_conflict(self):
+        """При несовпадении позиции возвращается 409 и текущий offset"""
+
+        upload_id = self.init_upload().json()["id"]
+        self.put_chunk(upload_id, 0, self.content[:1000])
+
+        response = self.put_chunk(upload_id, 0, self.content[:1000])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.json()["offset"], 1000)
+
+        offset = self.client.get(f"{self.UPLOADS_URL}{upload_id}/").json()["offset"]
+        self.put_chunk(upload_id, offset, self.content[offset:2000])
+        self.assertEqual(ImageUpload.objects.get().offset, 2000)
+
+        upload = ImageUpload.objects.get()
+        with mock.patch("app_ads.views.append_chunk", return_value=False):
+            response = self.put_chunk(upload_id, 2000, self.content[2000:3000])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        chunk_prefix = f"{os.path.basename(upload.path)}."
+        self.assertFalse(
+            [
+                name
+                for name in os.listdir(os.path.dirname(upload.path))
+                if name.startswith(chunk_prefix)
+            ]
+        )
+
+    def test_chunk_limits(self):
+        """Части больше лимита и за пределами файла отклоняются"""
+
+        upload_id = self.init_upload().json()["id"]
+        response = self.put_chunk(upload_id, 0, self.content[:2000])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        upload_id = self.init_upload(size=10).json()["id"]
+        response = self.put_chunk(upload_id, 0, self.content[:100])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.put(
+            f"{self.UPLOADS_URL}{upload_id}/chunk/",
+            self.content[:10],
+            content_type="application/octet-stream",
+            CONTENT_LENGTH="abc",
+            HTTP_UPLOAD_OFFSET="0",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_init_validation(self):
+        """Проверяются размер и расширение файла"""
+
+        with self.settings(CHUNKED_UPLOAD_MAX_SIZE=100):
+            response = self.init_upload()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.init_upload(filename="script.sh")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_finalize_requires_complete_valid_image(self):
+        """Завершить можно только полностью загруженное корректное изображение"""
+
+        upload_id = self.init_upload().json()["id"]
+        self.put_chunk(upload_id, 0, self.content[:1000])
+        response = self.finalize(upload_id, self.ad.pk)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        upload_id = self.init_upload(size=1000).json()["id"]
+        self.put_chunk(upload_id, 0, b"x" * 1000)
+        response = self.finalize(upload_id, self.ad.pk)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(IMAGE_UPLOAD_MAX_PIXELS=100):
+            upload_id = self.init_upload().json()["id"]
+            self.upload_all(upload_id)
+            response = self.finalize(upload_id, self.ad.pk)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.ad.refresh_from_db()
+        self.assertFalse(self.ad.image)
+
+    def test_foreign_upload_and_ad(self):
+        """Нельзя продолжить чужую загрузку или прикрепить изображение к чужому объявлению"""
+
+        other_client = self.user_clients[1]
+        upload_id = self.init_upload().json()["id"]
+        response = self.put_chunk(upload_id, 0, self.content[:1000], other_client)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        foreign_ad = Ad.objects.create(author=self.user_2, **self.ADS_DATA[1])
+        self.upload_all(upload_id)
+        response = self.finalize(upload_id, foreign_ad.pk)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_cancel_upload(self):
+        """Отмена загрузки удаляет временный файл"""
+
+        upload_id = self.init_upload().json()["id"]
+        self.put_chunk(upload_id, 0, self.content[:1000])
+        path = ImageUpload.objects.get().path
+        self.assertTrue(os.path.exists(path))
+
+        response = self.client.delete(f"{self.UPLOADS_URL}{upload_id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(path))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), IMAGE_RENDITION_WORKERS=0)
+class ContentAddressedStorageAPITestCase(BaseTestCase):
+    """Хранение изображений с дедупликацией по содержимому"""
+
+    @staticmethod
+    def make_image(name, color=(200, 100, 50)):
+        buffer = BytesIO()
+        Image.new("RGB", (50, 50), color).save(buffer, "JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def create_ad(self, client, image):
+        data = dict(self.ADS_DATA[0], image=image)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(self.URL, data, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Ad.objects.get(pk=response.json()["pk"])
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковые изображения хранятся в одном файле под хэшем содержимого"""
+
+        image = self.make_image("photo.jpg")
+        digest = hashlib.sha256(image.read()).hexdigest()
+
+        ad_1 = self.create_ad(self.user_clients[0], self.make_image("photo.jpg"))
+        ad_2 = self.create_ad(self.user_clients[1], self.make_image("copy.JPG"))
+        self.user_1.image = self.make_image("avatar.jpg")
+        self.user_1.save()
+
+        self.assertEqual(ad_1.image.name, f"blobs/{digest[:2]}/{digest}.jpg")
+        self.assertEqual(ad_2.image.name, ad_1.image.name)
+        self.assertEqual(self.user_1.image.name, ad_1.image.name)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 3)
+
+    def test_file_deleted_when_unreferenced(self):
+        """Файл удаляется, когда на него не остается ссылок"""
+
+        ad_1 = self.create_ad(self.user_clients[0], self.make_image("photo.jpg"))
+        ad_2 = self.create_ad(self.user_clients[0], self.make_image("photo.jpg"))
+        name = ad_1.image.name
+        rendition = get_rendition_name(name, 320, "webp")
+        self.assertTrue(default_storage.exists(rendition))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user_clients[0].delete(f"{self.URL}{ad_1.pk}/")
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+
+        data = {"image": self.make_image("other.jpg", (0, 0, 255))}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.user_clients[0].patch(
+                f"{self.URL}{ad_2.pk}/", data, format="multipart"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(rendition))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+    def test_moderation_delete_releases_images(self):
+        """Массовое удаление объявлений освобождает ссылки на изображения"""
+
+        for _ in range(2):
+            ad = self.create_ad(self.user_clients[0], self.make_image("photo.jpg"))
+
+        data = {"action": "delete", "author_id": self.user_1.pk}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user_clients[1].post("/api/moderation/ads/", data, format="json")
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(default_storage.exists(ad.image.name))
+
+    def test_temp_file_removed_on_error(self):
+        """Временный файл удаляется, если сохранить файл в хранилище не удалось"""
+
+        with tempfile.TemporaryDirectory() as location:
+            storage = ContentAddressedStorage(location=location)
+            with mock.patch("config.storage.os.replace", side_effect=OSError):
+                with self.assertRaises(OSError):
+                    storage.save("photo.jpg", ContentFile(b"content"))
+            files = [name for _, _, names in os.walk(location) for name in names]
+            self.assertEqual(files, [])
+
+    def test_deduplicate_media_command(self):
+        """Команда переносит ранее загруженные изображения и пересчитывает ссылки"""
+
+        content = self.make_image("old.jpg").read()
+        for name in ("ads/old_1.jpg", "ads/old_2.jpg"):
+            default_storage.save(name, ContentFile(content))
+        Ad.objects.bulk_create(
+            [
+                Ad(author=self.user_1, image=f"ads/old_{i}.jpg", **self.ADS_DATA[0])
+                for i in (1, 2)
+            ]
+        )
+
+        call_command("deduplicate_media", stdout=StringIO())
+
+        names = set(Ad.objects.values_list("image", flat=True))
+        self.assertEqual(len(names), 1)
+        blob = MediaBlob.objects.get()
+        self.assertEqual((blob.name, blob.ref_count), (names.pop(), 2))
+
+
+@override_settings(PAGINATION_EXACT_COUNT_THRESHOLD=10**9)
+class AsyncReadAPITestCase(BaseTestCase):
+    """Асинхронные эндпоинты чтения объявлений и отзывов"""
+
+    ASYNC_URL = "/api/async/ads/"
+
+    def setUp(self):
+        super().setUp()
+
+        self.ads = [
+            Ad.objects.create(
+                title=f"Продам ноутбук {i}",
+                price=1000 * (i + 1),
+                description="Хороший ноутбук",
+                author=self.user_1,
+            )
+            for i in range(6)
+        ]
+        self.ad = self.ads[0]
+        self.user_2.image = "users/avatar.jpg"
+        self.user_2.save()
+        for author in (self.user_1, self.user_2):
+            review = Review.objects.create(text="Отзыв", author=author, ad=self.ad)
+            self.ad.register_review(review)
+        self.review = review
+        self.client = self.user_clients[0]
+
+    def assert_same_response(self, path, strip_links=False, **params):
+        sync_response = self.client.get(f"/api/{path}", params)
+        async_response = self.client.get(f"/api/async/{path}", params)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response["Content-Type"], sync_response["Content-Type"])
+        if strip_links:
+            sync_data, async_data = sync_response.json(), async_response.json()
+            for data in (sync_data, async_data):
+                data["next"] = data["next"] and data["next"].replace("/async/", "/")
+                data["previous"] = data["previous"] and data["previous"].replace(
+                    "/async/", "/"
+                )
+            self.assertEqual(async_data, sync_data)
+        else:
+            self.assertEqual(async_response.content, sync_response.content)
+        return async_response
+
+    def test_ad_list_matches_sync_api(self):
+        """Список объявлений совпадает с синхронным API"""
+
+        response = self.assert_same_response("ads/", strip_links=True)
+        self.assertEqual(response.json()["count"], 6)
+        self.assertIn(
+            b'"next":"http://testserver/api/async/ads/?page=2"', response.content
+        )
+
+        self.assert_same_response("ads/", strip_links=True, page=2)
+        self.assert_same_response("ads/", strip_links=True, page="last")
+        self.assert_same_response("ads/", strip_links=True, q="ноутбук", price_min=3000)
+        self.assert_same_response("ads/", strip_links=True, ordering="price")
+
+    def test_ad_list_cursor_pagination_matches_sync_api(self):
+        """Курсорная пагинация списка объявлений совпадает с синхронным API"""
+
+        response = self.assert_same_response(
+            "ads/", strip_links=True, pagination="cursor"
+        )
+        self.assertNotIn("count", response.json())
+        cursor = parse_qs(urlsplit(response.json()["next"]).query)["cursor"][0]
+        self.assert_same_response(
+            "ads/", strip_links=True, pagination="cursor", cursor=cursor
+        )
+        self.assert_same_response(
+            "ads/", strip_links=True, pagination="cursor", ordering="-price"
+        )
+        self.assert_same_response("ads/", pagination="cursor", q="ноутбук")
+
+    def test_ad_list_errors(self):
+        """Ошибки фильтров и пагинации совпадают с синхронным API"""
+
+        self.assert_same_response("ads/", ordering="unknown")
+        self.assert_same_response("ads/", page=100)
+
+        response = APIClient().post(self.ASYNC_URL, {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_ad_list_conditional_get(self):
+        """Список объявлений поддерживает ETag"""
+
+        response = APIClient().get(self.ASYNC_URL)
+        response = APIClient().get(self.ASYNC_URL, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_ad_detail_matches_sync_api(self):
+        """Объявление совпадает с синхронным API"""
+
+        self.assert_same_response(f"ads/{self.ad.pk}/")
+        self.assert_same_response("ads/0/")
+
+    def test_authentication(self):
+        """Чтение объявления и отзывов требует действительного токена"""
+
+        for path in (f"ads/{self.ad.pk}/", f"ads/{self.ad.pk}/comments/"):
+            for client in (APIClient(), APIClient()):
+                sync_response = client.get(f"/api/{path}")
+                async_response = client.get(f"/api/async/{path}")
+                self.assertEqual(
+                    async_response.status_code, status.HTTP_401_UNAUTHORIZED
+                )
+                self.assertEqual(async_response.content, sync_response.content)
+                self.assertEqual(
+                    async_response["WWW-Authenticate"],
+                    sync_response["WWW-Authenticate"],
+                )
+                client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+
+    def test_reviews_match_sync_api(self):
+        """Отзывы совпадают с синхронным API"""
+
+        self.assert_same_response(f"ads/{self.ad.pk}/comments/")
+        self.assert_same_response(f"ads/{self.ad.pk}/comments/{self.review.pk}/")
+        self.assert_same_response("ads/0/comments/")
+        self.assert_same_response(f"ads/{self.ads[1].pk}/comments/{self.review.pk}/")
+
+    async def test_async_client(self):
+        """Эндпоинты работают в асинхронном клиенте"""
+
+        token = self.client._credentials["HTTP_AUTHORIZATION"]
+        response = await self.async_client.get(
+            f"{self.ASYNC_URL}{self.ad.pk}/comments/", AUTHORIZATION=token
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 2)
+
+
+class DatabasePoolTestCase(BaseTestCase):
+    """Пул соединений с базой данных"""
+
+    URL = "/api/metrics/db-pool/"
+
+    def create_pool(self, **kwargs):
+        params = connection.get_connection_params()
+        pool = ConnectionPool(partial(psycopg2.connect, **params), **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_connection_reused(self):
+        """Возвращенное соединение выдается повторно"""
+
+        pool = self.create_pool(size=2, timeout=1)
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        self.assertIs(second, first)
+        pool.release(second)
+
+        stats = pool.get_stats()
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["idle"], 1)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_acquire_timeout(self):
+        """Если свободных соединений нет, запрос соединения ждет не дольше timeout"""
+
+        pool = self.create_pool(size=1, timeout=0.1)
+        conn = pool.acquire()
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.acquire()
+
+        stats = pool.get_stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["opened"], 1)
+
+        threading.Timer(0.1, pool.release, [conn]).start()
+        pool.timeout = 5
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(pool.get_stats()["waits"], 2)
+        pool.release(conn)
+
+    def test_transaction_rolled_back_on_release(self):
+        """Незавершенная транзакция откатывается при возврате соединения"""
+
+        pool = self.create_pool(size=1, timeout=1)
+        conn = pool.acquire()
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE TEMPORARY TABLE pool_test (id int)")
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(), conn)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pool_test')")
+            self.assertIsNone(cursor.fetchone()[0])
+        pool.release(conn)
+
+    def test_health_check(self):
+        """Разорванное соединение заменяется новым при проверке перед выдачей"""
+
+        pool = self.create_pool(size=1, timeout=1, health_check_interval=0)
+        conn = pool.acquire()
+        conn.autocommit = True
+        pool.release(conn)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [conn.get_backend_pid()])
+
+        new_conn = pool.acquire()
+        self.assertIsNot(new_conn, conn)
+        with new_conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        pool.release(new_conn)
+
+        stats = pool.get_stats()
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["connections_closed"], 1)
+        self.assertEqual(stats["opened"], 1)
+
+    def test_database_connections_pooled(self):
+        """Соединения Django в разных потоках берутся из одного пула"""
+
+        backend_pids = []
+
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_backend_pid()")
+                backend_pids.append(cursor.fetchone()[0])
+            connection.close()
+
+        for _ in range(2):
+            thread = threading.Thread(target=query)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(backend_pids[0], backend_pids[1])
+        self.assertNotEqual(backend_pids[0], connection.connection.get_backend_pid())
+
+    def test_metrics(self):
+        """Метрики пула доступны администратору"""
+
+        response = self.user_clients[1].get(self.URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stats = response.json()["databases"]["default"]
+        self.assertEqual(stats["size"], settings.DATABASES["default"]["POOL"]["SIZE"])
+        for name in ("checkouts", "waits", "wait_time", "timeouts", "errors", "in_use"):
+            self.assertIn(name, stats)
+        self.assertGreaterEqual(stats["in_use"], 1)
+
+        response = self.user_clients[0].get(self.URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica"], PAGINATION_EXACT_COUNT_THRESHOLD=10**9
+)
+class ReplicaRoutingTestCase(APITransactionTestCase):
+    """Чтение с реплики и закрепление пользователя за основной базой данных"""
+
+    URL = "/api/ads/"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Вторая база данных - отдельное подключение к тестовой базе данных.
+        connections.settings["replica"] = {
+            **connections["default"].settings_dict,
+            "TEST": {"MIRROR": "default"},
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+
+    def setUp(self):
+        cache.clear()
+        self.user_1 = CustomUser.objects.create_user(
+            email="ivan@mail.ru", password="qwerty123!", role="user"
+        )
+        self.user_2 = CustomUser.objects.create_user(
+            email="max@mail.ru", password="qwerty123!", role="user"
+        )
+        self.ad = Ad.objects.create(
+            title="Объявление", price=1000, description="Описание", author=self.user_1
+        )
+        self.user_clients = [
+            BaseTestCase.create_authenticated_client(user_data)
+            for user_data in BaseTestCase.USERS_DATA
+        ]
+        # Пользователи, которых нет в кэше аутентификации, загружаются из основной базы.
+        for user in (self.user_1, self.user_2):
+            get_cached_user(user.pk)
+
+    def assert_database(self, alias, request, *args, **kwargs):
+        """Проверяет, что запрос читает данные только из базы данных alias"""
+
+        with CaptureQueriesContext(
+            connections["default"]
+        ) as primary, CaptureQueriesContext(connections["replica"]) as replica:
+            response = request(*args, **kwargs)
+        self.assertEqual(response.status_code // 100, 2, response.content)
+        queries = {"default": primary, "replica": replica}
+        self.assertTrue(queries[alias].captured_queries)
+        self.assertFalse(queries[{"default": "replica", "replica": "default"}[alias]])
+        return response
+
+    def test_reads_from_replica(self):
+        """Безопасные запросы читают данные с реплики"""
+
+        client = self.user_clients[0]
+        self.assert_database("replica", client.get, f"{self.URL}me/")
+        self.assert_database("replica", client.get, f"{self.URL}{self.ad.pk}/")
+        self.assert_database("replica", client.get, f"/api/async/ads/{self.ad.pk}/")
+        self.assert_database("replica", client.get, f"{self.URL}{self.ad.pk}/comments/")
+
+    def test_writes_to_primary(self):
+        """Небезопасные запросы читают и пишут данные в основную базу данных"""
+
+        data = {"title": "Новое", "price": 10, "description": "Описание"}
+        self.assert_database("default", self.user_clients[0].post, self.URL, data)
+        self.assert_database(
+            "default",
+            self.user_clients[1].post,
+            f"{self.URL}{self.ad.pk}/comments/",
+            {"text": "Отзыв"},
+        )
+
+    def test_read_your_writes(self):
+        """После изменения пользователь читает данные из основной базы данных"""
+
+        client, other_client = self.user_clients
+        self.assert_database("replica", client.get, f"{self.URL}me/")
+
+        data = {"title": "Новое", "price": 10, "description": "Описание"}
+        self.user_clients[0].post(self.URL, data)
+
+        response = self.assert_database("default", client.get, f"{self.URL}me/")
+        self.assertEqual(response.json()["count"], 2)
+        response = self.assert_database("default", client.get, self.URL)
+        self.assertEqual(response.json()["count"], 2)
+        self.assert_database("replica", other_client.get, f"{self.URL}me/")
+
+        cache.delete(STICKY_KEY.format(self.user_1.pk))
+        self.assert_database("replica", client.get, f"{self.URL}me/")
+
+    def test_list_cache_filled_from_primary(self):
+        """Кэшируемая страница списка строится по основной базе данных"""
+
+        for url in (self.URL, "/api/async/ads/"):
+            cache.clear()
+            self.assert_database("default", APIClient().get, url)
+
+        data = {"title": "Новое", "price": 10, "description": "Описание"}
+        self.user_clients[0].post(self.URL, data)
+        response = self.assert_database("default", APIClient().get, self.URL)
+        self.assertEqual(response.json()["count"], 2)
+        response = self.user_clients[1].get(self.URL)
+        self.assertEqual(response.json()["count"], 2)
+
+    def test_malformed_authorization_header(self):
+        """Некорректный заголовок Authorization приводит к ответу 401, а не 500"""
+
+        for header in ("Bearer", "Bearer a b", "Bearer invalid"):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=header)
+            response = client.get(f"{self.URL}me/")
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_without_replicas(self):
+        """Без настроенных реплик все запросы идут в основную базу данных"""
+
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assert_database("default", APIClient().get, self.URL)
+        self.assertEqual(ReplicaRouter().db_for_read(Ad), "default")
+
+
+class ThrottlingAPITestCase(BaseTestCase):
+    """Ограничение частоты создания объявлений и отзывов"""
+
+    def throttle_rates(self, **rates):
+        return self.settings(
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": {
+                    **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                    **rates,
+                },
+            }
+        )
+
+    def test_ad_creation_throttled(self):
+        """Создание объявлений одним пользователем ограничено"""
+
+        client, other_client = self.user_clients
+        with self.throttle_rates(ad_create_account="2/hour"):
+            for _ in range(2):
+                response = client.post(self.URL, self.ADS_DATA[0])
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+            response = client.post(self.URL, self.ADS_DATA[0])
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response["Retry-After"], "1800")
+
+            response = client.get(self.URL)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = other_client.post(self.URL, self.ADS_DATA[1])
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ad.objects.count(), 3)
+
+    def test_bulk_creation_charged_per_item(self):
+        """Пакетное создание забирает по токену на каждое объявление"""
+
+        client = self.user_clients[0]
+        bulk_url = f"{self.URL}bulk/"
+        with self.throttle_rates(ad_bulk_create_account="3/hour"):
+            response = client.post(bulk_url, self.ADS_DATA[:2], format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = client.post(bulk_url, self.ADS_DATA[:2], format="json")
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response["Retry-After"], "1200")
+            response = client.post(bulk_url, self.ADS_DATA[:1], format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = client.post(self.URL, self.ADS_DATA[0])
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ad.objects.count(), 4)
+
+    def test_bulk_rate_covers_max_items(self):
+        """Корзины пакетного создания вмещают пакет максимального размера"""
+
+        for kind in ("ip", "account"):
+            rate = settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"][
+                f"ad_bulk_create_{kind}"
+            ]
+            capacity, _ = parse_rate(rate)
+            self.assertGreaterEqual(capacity, settings.ADS_BULK_CREATE_MAX_ITEMS)
+
+    def test_locked_bucket_is_not_spent_twice(self):
+        """Пока корзину изменяет другой запрос, токен не выдается, а ответ - 503"""
+
+        client = self.user_clients[0]
+        key = f"throttle:ad_create:account:user:{self.user_1.pk}:lock"
+        cache.add(key, True, 60)
+        with mock.patch("config.throttling.time.sleep"):
+            response = client.post(self.URL, self.ADS_DATA[0])
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertIsNone(cache.get("throttle:ad_create:ip:127.0.0.1:lock"))
+
+        cache.delete(key)
+        response = client.post(self.URL, self.ADS_DATA[0])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ad.objects.count(), 1)
+
+    def test_denied_request_does_not_spend_other_bucket(self):
+        """Запрос, отклоненный одной корзиной, не забирает токен из другой"""
+
+        client, other_client = self.user_clients
+        with self.throttle_rates(ad_create_account="1/hour", ad_create_ip="2/hour"):
+            response = client.post(self.URL, self.ADS_DATA[0])
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = client.post(self.URL, self.ADS_DATA[0])
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            response = other_client.post(self.URL, self.ADS_DATA[1])
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = other_client.post(self.URL, self.ADS_DATA[1])
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response["Retry-After"], "3600")
+        self.assertEqual(Ad.objects.count(), 2)
+
+    def test_review_creation_throttled(self):
+        """Создание отзывов ограничено по пользователю и по IP-адресу"""
+
+        ad = Ad.objects.create(**self.ADS_DATA[0], author=self.user_1)
+        url = f"{self.URL}{ad.pk}/comments/"
+        client, other_client = self.user_clients
+        with self.throttle_rates(
+            review_create_account="1/hour", review_create_ip="2/hour"
+        ):
+            response = client.post(url, {"text": "Отзыв"})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = client.post(url, {"text": "Отзыв"})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            response = other_client.post(url, {"text": "Отзыв"})
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(Review.objects.count(), 1)
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(), PAGINATION_EXACT_COUNT_THRESHOLD=10**9
+)
+class ValuesSerializationAPITestCase(BaseTestCase):
+    """Быстрая сериализация списков через .values() совпадает с сериализаторами"""
+
+    @staticmethod
+    def make_image(name):
+        buffer = BytesIO()
+        Image.new("RGB", (40, 30), (200, 100, 50)).save(buffer, "JPEG")
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def setUp(self):
+        super().setUp()
+        self.user_2.image = self.make_image("avatar.jpg")
+        self.user_2.save()
+
+        self.laptop = Ad.objects.create(
+            title="Продам ноутбук",
+            price=50000,
+            description="Игровой ноутбук",
+            author=self.user_1,
+            image=self.make_image("laptop photo.jpg"),
+            review_count=2,
+            last_review_at=timezone.now(),
+        )
+        self.bag = Ad.objects.create(
+            title="Сумка для ноутбука",
+            price=1500,
+            description="Подходит для ноутбуков",
+            author=self.user_1,
+        )
+        self.car = Ad.objects.create(
+            title="Продам машину",
+            price=300000,
+            description="Отличное состояние",
+            author=self.user_2,
+        )
+        self.hidden = Ad.objects.create(
+            title="Скрытое",
+            price=10,
+            description="Скрыто модератором",
+            author=self.user_1,
+            is_hidden=True,
+        )
+        Review.objects.create(text="Отличный", author=self.user_1, ad=self.laptop)
+        Review.objects.create(text="Согласен", author=self.user_2, ad=self.laptop)
+
+    def assert_matches_serializer(self, response, serializer_class, queryset):
+        """
+        Проверяет, что ответ побайтно совпадает с ответом,
+        построенным сериализатором по экземплярам моделей.
+        """
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        objects = {obj.pk: obj for obj in queryset}
+        instances = [objects[item["pk"]] for item in data["results"]]
+        self.assertTrue(instances)
+        serializer = serializer_class(
+            instances, many=True, context={"request": response.wsgi_request}
+        )
+        expected = JSONRenderer().render({**data, "results": serializer.data})
+        self.assertEqual(response.content, expected)
+
+    def test_ad_list_matches_serializer(self):
+        """Список объявлений с фильтрами, поиском и пагинацией совпадает с сериализатором"""
+
+        params_list = [
+            {},
+            {"ordering": "price"},
+            {"pagination": "cursor"},
+            {"pagination": "cursor", "ordering": "-price"},
+            {"q": "ноутбук"},
+            {"fuzzy": "ноутбк"},
+        ]
+        for params in params_list:
+            with self.subTest(params=params):
+                cache.clear()
+                response = APIClient().get(self.URL, params)
+                queryset = AdFilter(params, queryset=Ad.get_visible_ads()).qs
+                self.assert_matches_serializer(response, AdListSerializer, queryset)
+
+        ad = next(ad for ad in response.json()["results"] if ad["pk"] == self.laptop.pk)
+        self.assertTrue(ad["image"].startswith("http://testserver/django_media/"))
+
+    def test_my_ads_matches_serializer(self):
+        """Список своих объявлений со скрытыми совпадает с сериализатором"""
+
+        response = self.user_clients[0].get(f"{self.URL}me/")
+        self.assertEqual(len(response.json()["results"]), 3)
+        queryset = Ad.get_all_ads().filter(author=self.user_1)
+        self.assert_matches_serializer(response, AdListSerializer, queryset)
+
+    def test_review_list_matches_serializer(self):
+        """Список отзывов с изображениями авторов совпадает с сериализатором"""
+
+        for url in (self.URL, "/api/async/ads/"):
+            with self.subTest(url=url):
+                response = self.user_clients[0].get(f"{url}{self.laptop.pk}/comments/")
+                queryset = Review.get_ad_reviews(self.laptop.pk)
+                self.assert_matches_serializer(response, ReviewSerializer, queryset)
+
+    def test_async_ad_list_matches_serializer(self):
+        """Асинхронный список объявлений совпадает с сериализатором"""
+
+        response = APIClient().get("/api/async/ads/", {"q": "ноутбук"})
+        queryset = AdFilter({"q": "ноутбук"}, queryset=Ad.get_visible_ads()).qs
+        self.assert_matches_serializer(response, AdListSerializer, queryset)
+
+    def test_list_does_not_load_unused_columns(self):
+        """Список объявлений не выбирает ненужные столбцы"""
+
+        with CaptureQueriesContext(connection) as queries:
+            APIClient().get(self.URL)
+        sql = next(
+            q["sql"]
+            for q in queries
+            if 'FROM "ads"' in q["sql"] and "LIMIT" in q["sql"]
+        )
+        self.assertNotIn("search_vector", sql)
+        self.assertNotIn('"users"', sql)
+
+
+class FastJSONTestCase(TestCase):
+    """JSON-рендерер и парсер на orjson совпадают со стандартными DRF"""
+
+    DATA = {
+        "pk": 1,
+        "price": Decimal("10.50"),
+        "created_at": timezone.make_aware(datetime(2023, 5, 1, 12, 30, 15, 123456)),
+        "naive": datetime(2023, 5, 1, 12, 30),
+        "date": date(2023, 5, 1),
+        "time": time(12, 30, 15, 500000),
+        "duration": timedelta(hours=1, seconds=5),
+        "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "message": gettext_lazy("This field is required."),
+        "errors": {"title": [ErrorDetail("Обязательное поле.", code="required")]},
+        "numbers": {1: 0.5, 2: None, 3: True},
+        "text": "Строка\u2028с разделителем\u2029строк",
+        "queryset": Ad.objects.none(),
+    }
+
+    def render(self, renderer, data, accepted_media_type=None):
+        return renderer.render(data, accepted_media_type, {})
+
+    def test_renderer_matches_json_renderer(self):
+        """Ответ совпадает с JSONRenderer, в том числе Decimal, даты и ленивые строки"""
+
+        self.assertIsNotNone(renderers.orjson)
+        expected = self.render(JSONRenderer(), self.DATA)
+        self.assertEqual(self.render(renderers.FastJSONRenderer(), self.DATA), expected)
+        self.assertIn("Обязательное поле".encode(), expected)
+        self.assertEqual(renderers.FastJSONRenderer().render(None), b"")
+
+    def test_renderer_fallbacks(self):
+        """Отступы, большие целые числа и отсутствие orjson обрабатываются json"""
+
+        renderer = renderers.FastJSONRenderer()
+        for data, media_type in [
+            (self.DATA, "application/json; indent=4"),
+            ({"big": 2**70}, None),
+        ]:
+            with self.subTest(media_type=media_type):
+                self.assertEqual(
+                    self.render(renderer, data, media_type),
+                    self.render(JSONRenderer(), data, media_type),
+                )
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(
+                self.render(renderer, self.DATA), self.render(JSONRenderer(), self.DATA)
+            )
+
+    def test_parser_matches_json_parser(self):
+        """Парсер возвращает те же данные и те же ошибки, что и JSONParser"""
+
+        content = '{"title": "Ноутбук", "price": 1.5, "big": 1180591620717411303424}'
+        self.assertEqual(
+            FastJSONParser().parse(BytesIO(content.encode())),
+            JSONParser().parse(BytesIO(content.encode())),
+        )
+        for content in [b'{"title": ', b'{"price": NaN}', b"\xff"]:
+            with self.subTest(content=content):
+                with self.assertRaises(ParseError) as expected:
+                    JSONParser().parse(BytesIO(content))
+                with self.assertRaises(ParseError) as actual:
+                    FastJSONParser().parse(BytesIO(content))
+                self.assertEqual(str(actual.exception), str(expected.exception))
+
+
+class CompressionAPITestCase(BaseTestCase):
+    """Сжатие ответов и статических файлов"""
+
+    def setUp(self):
+        super().setUp()
+        for index in range(4):
+            Ad.objects.create(
+                title=f"Объявление {index}",
+                price=1000,
+                description="Подробное описание объявления. " * 20,
+                author=self.user_1,
+            )
+
+    def test_choose_encoding(self):
+        """Кодировка выбирается по Accept-Encoding с учетом весов"""
+
+        cases = [
+            ("gzip, deflate, br", "br"),
+            ("gzip", "gzip"),
+            ("br;q=0.5, gzip", "gzip"),
+            ("br;q=0, *", "gzip"),
+            ("identity", None),
+            ("", None),
+        ]
+        for accept_encoding, encoding in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(choose_encoding(accept_encoding), encoding)
+
+    def test_json_response_compressed(self):
+        """Список объявлений сжимается brotli или gzip"""
+
+        content = APIClient().get(self.URL).content
+        self.assertGreater(len(content), settings.COMPRESSION_MIN_SIZE)
+
+        for accept_encoding, decompress in [
+            ("gzip, deflate, br", brotli.decompress),
+            ("gzip", gzip.decompress),
+        ]:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = APIClient().get(
+                    self.URL, HTTP_ACCEPT_ENCODING=accept_encoding
+                )
+                self.assertIn("Accept-Encoding", response["Vary"])
+                self.assertLess(len(response.content), len(content))
+                self.assertEqual(response["Content-Length"], str(len(response.content)))
+                self.assertEqual(decompress(response.content), content)
+
+        response = APIClient().get(self.URL)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_small_response_not_compressed(self):
+        """Короткие ответы не сжимаются"""
+
+        ad = Ad.objects.create(**self.ADS_DATA[0], author=self.user_1)
+        response = self.user_clients[0].get(
+            f"{self.URL}{ad.pk}/", HTTP_ACCEPT_ENCODING="br, gzip"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_compressed_etag_is_weak(self):
+        """ETag сжатого ответа слабый и подходит для условных запросов"""
+
+        response = APIClient().get(self.URL, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        response = APIClient().get(
+            self.URL, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_streaming_response_compressed(self):
+        """Потоковые ответы, в том числе асинхронные, сжимаются по мере передачи"""
+
+        chunks = [b'{"chunk": %d}\n' % index for index in range(100)]
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        middleware = CompressionMiddleware(lambda request: None)
+
+        response = middleware.process_response(
+            request,
+            StreamingHttpResponse(iter(chunks), content_type="application/json"),
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(
+            gzip.decompress(b"".join(response.streaming_content)), b"".join(chunks)
+        )
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async def read(response):
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="br")
+        response = middleware.process_response(
+            request, StreamingHttpResponse(stream(), content_type="application/json")
+        )
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(
+            brotli.decompress(asyncio.run(read(response))), b"".join(chunks)
+        )
+
+    def test_static_files_precompressed(self):
+        """collectstatic записывает сжатые копии текстовых файлов"""
+
+        storage = CompressedStaticFilesStorage(location=tempfile.mkdtemp())
+        script = b"function f() { return 1; }\n" * 100
+        storage.save("app.js", ContentFile(script))
+        storage.save("small.css", ContentFile(b"body { margin: 0; }"))
+        storage.save("logo.png", ContentFile(os.urandom(4096)))
+
+        processed = list(
+            storage.post_process(
+                {name: None for name in ["app.js", "small.css", "logo.png"]}
+            )
+        )
+        self.assertEqual(processed, [("app.js", "app.js", True)])
+        with storage.open("app.js.gz") as file:
+            self.assertEqual(gzip.decompress(file.read()), script)
+        for name in ["app.js.br", "small.css.gz", "logo.png.gz"]:
+            self.assertFalse(storage.exists(name))
+
+
+class GenerateDataTestCase(TestCase):
+    """Генерация синтетических данных командой generate_data"""
+
+    OPTIONS = {
+        "users": 20,
+        "ads": 50,
+        "reviews": 200,
+        "seed": 3,
+        "until": datetime(2026, 1, 1),
+    }
+
+    def generate(self):
+        """Генерирует данные и возвращает созданные объявления по порядку"""
+
+        last_ad_id = Ad.objects.order_by("-pk").values_list("pk", flat=True).first()
+        call_command(
+            "generate_data", password="qwerty123!", stdout=StringIO(), **self.OPTIONS
+        )
+        return Ad.objects.filter(pk__gt=last_ad_id or 0).order_by("pk")
+
+    def test_rows_are_loaded(self):
+        """Создается заданное количество корректных строк"""
+
+        ads = self.generate()
+        self.assertEqual(CustomUser.objects.count(), 20)
+        self.assertEqual(ads.count(), 50)
+        self.assertEqual(Review.objects.count(), 200)
+        self.assertFalse(ads.filter(search_vector__isnull=True).exists())
+        for user in CustomUser.objects.all():
+            user.full_clean()
+        user = CustomUser.objects.first()
+        self.assertTrue(self.client.login(email=user.email, password="qwerty123!"))
+        for ad in ads:
+            self.assertLessEqual(
+                ad.created_at, timezone.make_aware(datetime(2026, 1, 1))
+            )
+
+    def test_review_counters_are_consistent(self):
+        """Счетчики отзывов совпадают с пересчитанными по таблице отзывов"""
+
+        ads = self.generate()
+        counters = list(ads.values_list("review_count", "last_review_at"))
+        self.assertEqual(
+            sum(count for count, _ in counters),
+            Review.objects.filter(is_hidden=False).count(),
+        )
+
+        Ad.recompute_review_counters(ads)
+        self.assertEqual(
+            list(ads.values_list("review_count", "last_review_at")), counters
+        )
+
+    def test_same_seed_same_data(self):
+        """Повторный запуск с теми же параметрами дает те же данные"""
+
+        fields = ["title", "price", "description", "created_at", "review_count"]
+        first = list(self.generate().values_list(*fields))
+        second = list(self.generate().values_list(*fields))
+        self.assertEqual(first, second)
+        self.assertGreater(len({title for title, *_ in first}), 1)
+
+    def test_existing_users_as_authors(self):
+        """Без новых пользователей авторами становятся существующие"""
+
+        author = CustomUser.objects.create_user(
+            email="seller@mail.ru", password="qwerty123!", phone="+7(921)123-45-67"
+        )
+        call_command("generate_data", users=0, ads=5, reviews=5, stdout=StringIO())
+        self.assertEqual(Ad.objects.filter(author=author).count(), 5)
+        self.assertEqual(Review.objects.filter(author=author).count(), 5)
@@ -0,0 +1,128 @@
+import os
+import shutil
+import uuid
+from typing import BinaryIO, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from PIL import Image
+from rest_framework import serializers
+
+from .models import Ad, ImageUpload
+
+READ_BLOCK_SIZE = 64 * 1024
+
+ALLOWED_IMAGE_FORMATS = ("JPEG", "PNG", "WEBP", "GIF")
+
+
+def receive_chunk(
+    upload: ImageUpload, offset: int, stream: BinaryIO, length: int
+) -> Tuple[str, int]:
+    """
+    Записывает часть файла из потока запроса в отдельный временный файл части.
+    Выполняется вне транзакции: медленный клиент не держит блокировку
+    и соединение с базой данных.
+    Поток читается блоками по READ_BLOCK_SIZE байт, поэтому расход памяти
+    не зависит от размера части. Если клиент оборвал передачу,
+    принятые байты сохраняются и загрузку можно продолжить.
+    :param upload: Загрузка изображения.
+    :param offset: Позиция части в файле.
+    :param stream: Поток тела запроса.
+    :param length: Размер части в байтах.
+    :return: Путь к файлу части и количество записанных байт.
+    """
+    if offset + length > upload.size:
+        raise serializers.ValidationError("Часть выходит за пределы файла.")
+
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    chunk_path = f"{upload.path}.{uuid.uuid4().hex}"
+    remaining = length
+    try:
+        with open(chunk_path, "wb") as file:
+            while remaining:
+                block = stream.read(min(READ_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                file.write(block)
+                remaining -= len(block)
+    except BaseException:
+        os.remove(chunk_path)
+        raise
+    return chunk_path, length - remaining
+
+
+def append_chunk(
+    upload: ImageUpload, offset: int, chunk_path: str, written: int
+) -> bool:
+    """
+    Переносит принятую часть в файл загрузки, если offset загрузки
+    не изменился с начала приема части.
+    Offset сдвигается условным UPDATE ... WHERE offset = %s, строка блокируется
+    только на время копирования части внутри локального диска.
+    :param upload: Загрузка изображения.
+    :param offset: Позиция части в файле.
+    :param chunk_path: Путь к файлу части.
+    :param written: Количество байт в части.
+    :return: False, если часть уже принята другим запросом или offset изменился.
+    """
+    with transaction.atomic():
+        updated = ImageUpload.objects.filter(pk=upload.pk, offset=offset).update(
+            offset=offset + written
+        )
+        if not updated:
+            return False
+        mode = "r+b" if os.path.exists(upload.path) else "wb"
+        with open(upload.path, mode) as file, open(chunk_path, "rb") as chunk:
+            file.seek(offset)
+            shutil.copyfileobj(chunk, file, READ_BLOCK_SIZE)
+            file.truncate()
+    upload.offset = offset + written
+    return True
+
+
+def validate_image(path: str) -> None:
+    """
+    Проверяет загруженный файл изображения.
+    Формат и размеры читаются из заголовка файла без декодирования изображения,
+    поэтому слишком большие изображения отклоняются до распаковки.
+    :param path: Путь к файлу.
+    """
+    try:
+        with Image.open(path) as image:
+            if image.format not in ALLOWED_IMAGE_FORMATS:
+                raise serializers.ValidationError(
+                    "Неподдерживаемый формат изображения."
+                )
+            width, height = image.size
+            if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+                raise serializers.ValidationError("Слишком большое изображение.")
+            image.verify()
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        raise serializers.ValidationError("Файл не является изображением.")
+
+
+def attach_upload(upload: ImageUpload, ad: Ad) -> Ad:
+    """
+    Сохраняет полностью принятый файл в хранилище как изображение объявления
+    и удаляет загрузку вместе с временным файлом.
+    :param upload: Завершенная загрузка изображения.
+    :param ad: Объявление.
+    :return: Обновленное объявление.
+    """
+    validate_image(upload.path)
+    with open(upload.path, "rb") as file:
+        ad.image.save(os.path.basename(upload.filename), File(file), save=False)
+    ad.save(update_fields=["image", "updated_at"])
+    delete_upload(upload)
+    return ad
+
+
+def delete_upload(upload: ImageUpload) -> None:
+    """
+    Удаляет загрузку и ее временный файл.
+    :param upload: Загрузка изображения.
+    """
+    if os.path.exists(upload.path):
+        os.remove(upload.path)
+    upload.delete()
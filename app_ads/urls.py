@@ -1,10 +1,38 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import AdViewSet, ReviewViewSet
+from . import async_views
+from .views import (
+    AdViewSet,
+    ImageUploadViewSet,
+    MetricsViewSet,
+    ModerationViewSet,
+    ReviewViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"ads", AdViewSet, basename="ad")
 router.register(r"ads/(?P<ad_pk>\d+)/comments", ReviewViewSet, basename="ad-review")
+router.register(r"moderation", ModerationViewSet, basename="moderation")
+router.register(r"uploads", ImageUploadViewSet, basename="upload")
+router.register(r"metrics", MetricsViewSet, basename="metrics")
 
-urlpatterns = [path("", include(router.urls))]
+async_urlpatterns = [
+    path("ads/", async_views.ad_list, name="async-ad-list"),
+    path("ads/<int:pk>/", async_views.ad_detail, name="async-ad-detail"),
+    path(
+        "ads/<int:ad_pk>/comments/",
+        async_views.review_list,
+        name="async-ad-review-list",
+    ),
+    path(
+        "ads/<int:ad_pk>/comments/<int:pk>/",
+        async_views.review_detail,
+        name="async-ad-review-detail",
+    ),
+]
+
+urlpatterns = [
+    path("", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
+]
@@ -1,31 +1,72 @@
+import os
+from functools import partial
 from typing import List, Type
 
-from django.db.models import QuerySet
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q, QuerySet
+from django.db.models.functions import Greatest
+from django.http import Http404, HttpResponseBase
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import pagination, viewsets
+from rest_framework import mixins, serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import BasePagination, CursorPagination
 from rest_framework.permissions import AllowAny, BasePermission, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
+from rest_framework.throttling import BaseThrottle
 
+from config.db_pool.pool import get_pools_stats
+from config.db_router import is_pinned_to_primary, read_from_primary
+from config.throttling import get_scoped_throttles
+
+from .cache import bump_ads_version, get_ads_list_cache_key
+from .conditional import conditional_get, make_etag
 from .filters import AdFilter
-from .models import Ad, Review
-from .permissions import IsAdminOrOwner
-from .serializers import AdListSerializer, AdSerializer, ReviewSerializer
+from .models import Ad, ImageUpload, Review
+from .moderation import moderate_ads, moderate_reviews
+from .pagination import AdPagination, ReviewPagination, get_ad_pagination_class
+from .permissions import IsAdmin, IsAdminOrOwner
+from .serializers import (
+    AdListSerializer,
+    AdSerializer,
+    ImageUploadFinalizeSerializer,
+    ImageUploadSerializer,
+    ModerationSerializer,
+    ReviewSerializer,
+)
+from .uploads import append_chunk, attach_upload, delete_upload, receive_chunk
 
 
-class AdPagination(pagination.PageNumberPagination):
+class ValuesListModelMixin:
     """
-    Пагинация для объявлений.
+    Список объектов с быстрой сериализацией строк .values()
+    сериализатором с ValuesSerializerMixin.
     """
 
-    page_size = 4
-    page_query_param = "page"
+    def list_values(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Возвращает список объектов в том же формате, что и ListModelMixin.list.
+        :param request: HTTP-запрос.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        extra_columns = []
+        if isinstance(self.paginator, CursorPagination):
+            ordering = self.paginator.get_ordering(request, queryset, self)
+            extra_columns = [name.lstrip("-") for name in ordering]
+        queryset = serializer.get_values_queryset(queryset, *extra_columns)
+
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serializer.serialize_values(queryset))
+        return self.get_paginated_response(serializer.serialize_values(page))
 
 
-class AdViewSet(viewsets.ModelViewSet):
+class AdViewSet(ValuesListModelMixin, viewsets.ModelViewSet):
     """
     Набор представлений для работы с объявлениями.
     """
@@ -44,14 +85,39 @@ class AdViewSet(viewsets.ModelViewSet):
         "destroy": [IsAdminOrOwner()],
     }
 
+    throttle_scopes = {"create": "ad_create", "bulk": "ad_bulk_create"}
+
+    @property
+    def paginator(self) -> BasePagination:
+        """
+        Возвращает пагинатор, выбранный параметром запроса 'pagination'.
+        По умолчанию используется постраничная пагинация,
+        при 'pagination=cursor' - курсорная.
+        """
+        if not hasattr(self, "_paginator"):
+            request = getattr(self, "request", None)
+            pagination_class = (
+                get_ad_pagination_class(request.query_params, self.pagination_class)
+                if request
+                else self.pagination_class
+            )
+            self._paginator = pagination_class()
+        return self._paginator
+
     def get_queryset(self) -> QuerySet[Ad]:
         """
         Получает queryset объявлений в зависимости от действия.
+        Скрытые модератором объявления видны только автору в списке своих объявлений,
+        изменить или удалить скрытое объявление могут его автор и администратор.
         """
-        queryset = Ad.get_all_ads()
         if self.action == "my_ads":
-            queryset = queryset.filter(author=self.request.user)
-        return queryset.all()
+            return Ad.get_all_ads().filter(author=self.request.user)
+        if self.action in ("partial_update", "destroy"):
+            user = self.request.user
+            if user.role == "admin":
+                return Ad.get_all_ads()
+            return Ad.get_all_ads().filter(Q(is_hidden=False) | Q(author=user))
+        return Ad.get_visible_ads()
 
     def get_permissions(self) -> List[BasePermission]:
         """
@@ -59,14 +125,89 @@ class AdViewSet(viewsets.ModelViewSet):
         """
         return self.permissions.get(self.action, [IsAuthenticated()])
 
+    def get_throttles(self) -> List[BaseThrottle]:
+        """
+        Получает ограничения частоты запросов для текущего действия.
+        Пакетное создание забирает по токену на каждое объявление из списка
+        из отдельной корзины ad_bulk_create, емкость которой рассчитана
+        на пакеты до ADS_BULK_CREATE_MAX_ITEMS объявлений.
+        """
+        cost = 1
+        if self.action == "bulk" and isinstance(self.request.data, list):
+            cost = max(1, len(self.request.data))
+        return get_scoped_throttles(self.throttle_scopes.get(self.action), cost)
+
     def get_serializer_class(self) -> Type[Serializer]:
         """
         Возвращает класс сериализатора для текущего действия.
         """
-        if self.action in ["retrieve", "create", "partial_update", "destroy"]:
+        if self.action in ["retrieve", "create", "partial_update", "destroy", "bulk"]:
             return AdSerializer
         return AdListSerializer
 
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Возвращает список объявлений.
+        Страницы списка кэшируются по нормализованной строке запроса
+        и версии данных объявлений, которая меняется при любом изменении объявлений.
+        ETag страницы вычисляется из того же ключа, при совпадении возвращается 304.
+        :param request: HTTP-запрос.
+        """
+        cache_key = get_ads_list_cache_key(request)
+        return conditional_get(
+            request,
+            partial(self.get_cached_list, request, cache_key, *args, **kwargs),
+            etag=make_etag(cache_key),
+        )
+
+    def get_cached_list(
+        self, request: Request, cache_key: str, *args, **kwargs
+    ) -> Response:
+        """
+        Возвращает страницу списка объявлений из кэша или строит и кэширует ее.
+        Пользователю, закрепленному за основной базой данных после изменений,
+        страница строится заново, чтобы он сразу увидел свои изменения.
+        Кэшируемая страница всегда строится по основной базе данных,
+        чтобы под новой версией не оказались данные отстающей реплики.
+        :param request: HTTP-запрос.
+        :param cache_key: Ключ кэша страницы.
+        """
+        data = None if is_pinned_to_primary() else cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        with read_from_primary():
+            response = self.list_values(request, *args, **kwargs)
+        cache.set(cache_key, response.data, settings.ADS_LIST_CACHE_TIMEOUT)
+        return response
+
+    def retrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """
+        Возвращает объявление.
+        ETag и Last-Modified вычисляются без сериализации по полям updated_at
+        объявления и его автора, так как ответ содержит имя автора.
+        Версия берется из того же queryset, что и объект, поэтому для скрытого
+        объявления возвращается 404, а не 304. При совпадении версии возвращается 304.
+        :param request: HTTP-запрос.
+        """
+        ad_id = self.kwargs.get("pk")
+        updated_at = (
+            self.get_queryset()
+            .filter(pk=ad_id)
+            .annotate(last_modified=Greatest("updated_at", "author__updated_at"))
+            .values_list("last_modified", flat=True)
+            .first()
+        )
+        get_response = partial(super().retrieve, request, *args, **kwargs)
+        if updated_at is None:
+            return get_response()
+        return conditional_get(
+            request,
+            get_response,
+            etag=make_etag("ad", ad_id, updated_at.isoformat()),
+            last_modified=updated_at,
+        )
+
     def perform_create(self, serializer: Serializer) -> None:
         """
         Сохраняет новый объект при помощи сериализатора,
@@ -76,16 +217,79 @@ class AdViewSet(viewsets.ModelViewSet):
         """
         serializer.save(author=self.request.user)
 
+    @action(detail=False, methods=["POST"])
+    def bulk(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Создает объявления текущего пользователя из списка.
+        Пустой список и список длиннее ADS_BULK_CREATE_MAX_ITEMS отклоняются
+        до проверки элементов.
+        Каждый элемент проверяется правилами AdSerializer за один проход,
+        корректные объявления вставляются через bulk_create пакетами,
+        для некорректных возвращаются ошибки с индексом элемента.
+        :param request: HTTP-запрос со списком объявлений.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Ожидается непустой список объявлений."]}
+            )
+        if len(items) > settings.ADS_BULK_CREATE_MAX_ITEMS:
+            raise serializers.ValidationError(
+                {
+                    "non_field_errors": [
+                        "Количество объявлений в запросе не должно превышать "
+                        f"{settings.ADS_BULK_CREATE_MAX_ITEMS}."
+                    ]
+                }
+            )
+
+        serializer = self.get_serializer()
+        ads, indexes, errors = [], [], []
+        for index, item in enumerate(items):
+            try:
+                validated_data = serializer.run_validation(item)
+            except serializers.ValidationError as exc:
+                errors.append({"index": index, "errors": exc.detail})
+                continue
+            ads.append(Ad(author=request.user, **validated_data))
+            indexes.append(index)
+
+        created = Ad.objects.bulk_create(
+            ads, batch_size=settings.ADS_BULK_CREATE_BATCH_SIZE
+        )
+        if created:
+            bump_ads_version()
+
+        return Response(
+            {
+                "created": [
+                    {"index": index, "pk": ad.pk} for index, ad in zip(indexes, created)
+                ],
+                "errors": errors,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=True, methods=["GET"])
+    def similar(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Возвращает объявления, похожие на текущее по заголовку.
+        :param request: HTTP-запрос.
+        """
+        ad = self.get_object()
+        serializer = self.get_serializer(ad.get_similar_ads(), many=True)
+        return Response(serializer.data)
+
     @action(detail=False, methods=["GET"], url_path="me")
     def my_ads(self, request: Request, *args, **kwargs) -> Response:
         """
         Возвращает список объявлений текущего пользователя.
         :param request: HTTP-запрос.
         """
-        return super().list(self, request, *args, **kwargs)
+        return self.list_values(request, *args, **kwargs)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ValuesListModelMixin, viewsets.ModelViewSet):
     """
     Набор представлений для работы с отзывами.
     """
@@ -93,6 +297,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
     queryset = Review.get_all_reviews()
     permission_classes = [IsAuthenticated, IsAdminOrOwner]
     serializer_class = ReviewSerializer
+    pagination_class = ReviewPagination
     http_method_names = ["get", "post", "patch", "delete"]
 
     permissions = {
@@ -103,27 +308,297 @@ class ReviewViewSet(viewsets.ModelViewSet):
         "destroy": [IsAdminOrOwner()],
     }
 
+    throttle_scopes = {"create": "review_create"}
+
     def get_permissions(self) -> List[BasePermission]:
         """
         Получает права доступа для текущего действия.
         """
         return self.permissions.get(self.action, [IsAuthenticated()])
 
+    def get_throttles(self) -> List[BaseThrottle]:
+        """
+        Получает ограничения частоты запросов для текущего действия.
+        """
+        return get_scoped_throttles(self.throttle_scopes.get(self.action))
+
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """
+        Возвращает список отзывов к объявлению.
+        Существование объявления и версия списка (количество отзывов
+        и максимальный updated_at отзывов и их авторов) получаются одним запросом.
+        ETag вычисляется по версии, при ее совпадении возвращается 304.
+        :param request: HTTP-запрос.
+        """
+        ad_id = self.kwargs.get("ad_pk")
+        version = (
+            Ad.objects.filter(pk=ad_id)
+            .order_by()
+            .annotate(
+                count=Count("reviews", filter=Q(reviews__is_hidden=False)),
+                last_modified=Max(
+                    Greatest("reviews__updated_at", "reviews__author__updated_at")
+                ),
+            )
+            .values("count", "last_modified")
+            .first()
+        )
+        if version is None:
+            raise Http404
+        get_response = partial(self.list_values, request, *args, **kwargs)
+        if version["last_modified"] is None:
+            return get_response()
+        return conditional_get(
+            request,
+            get_response,
+            etag=make_etag(
+                "reviews",
+                ad_id,
+                version["count"],
+                version["last_modified"].isoformat(),
+                request.query_params.urlencode(),
+            ),
+            last_modified=version["last_modified"],
+        )
+
+    def retrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """
+        Возвращает отзыв.
+        ETag и Last-Modified вычисляются без сериализации по полям updated_at
+        отзыва и его автора, так как ответ содержит имя и изображение автора.
+        Версия берется из того же queryset, что и объект, поэтому для скрытого
+        отзыва возвращается 404, а не 304. При совпадении версии возвращается 304.
+        :param request: HTTP-запрос.
+        """
+        review_id = self.kwargs.get("pk")
+        updated_at = (
+            self.get_queryset()
+            .filter(pk=review_id)
+            .annotate(last_modified=Greatest("updated_at", "author__updated_at"))
+            .values_list("last_modified", flat=True)
+            .first()
+        )
+        get_response = partial(super().retrieve, request, *args, **kwargs)
+        if updated_at is None:
+            return get_response()
+        return conditional_get(
+            request,
+            get_response,
+            etag=make_etag("review", review_id, updated_at.isoformat()),
+            last_modified=updated_at,
+        )
+
     def get_queryset(self) -> QuerySet[Review]:
         """
         Получает queryset отзывов для определенного объявления.
+        Авторы загружаются тем же запросом, отдельная проверка объявления не выполняется:
+        для несуществующего объявления выборка пуста.
         """
-        ad_id = self.kwargs.get("ad_pk")
-        ad = get_object_or_404(Ad, id=ad_id)
-        return ad.reviews.all().order_by("created_at")
+        return Review.get_ad_reviews(self.kwargs.get("ad_pk"))
 
     def perform_create(self, serializer: Serializer) -> None:
         """
          Сохраняет новый отзыв,
-         связывая его с текущим пользователем и объявлением.
+         связывая его с текущим пользователем и объявлением,
+         и увеличивает счетчик отзывов объявления в той же транзакции.
+         Оставить отзыв к скрытому объявлению нельзя.
         :param serializer:Сериализатор для сохранения объекта.
         """
         user = self.request.user
         ad_id = self.kwargs.get("ad_pk")
-        ad = get_object_or_404(Ad, id=ad_id)
-        serializer.save(author=user, ad=ad)
+        ad = get_object_or_404(Ad.get_visible_ads(), id=ad_id)
+        with transaction.atomic():
+            review = serializer.save(author=user, ad=ad)
+            ad.register_review(review)
+        bump_ads_version()
+
+    def perform_destroy(self, instance: Review) -> None:
+        """
+        Удаляет отзыв и уменьшает счетчик отзывов объявления
+        в той же транзакции.
+        :param instance: Удаляемый отзыв.
+        """
+        with transaction.atomic():
+            instance.delete()
+            Ad(pk=instance.ad_id).unregister_review()
+        bump_ads_version()
+
+
+class ModerationViewSet(viewsets.ViewSet):
+    """
+    Набор представлений для массовой модерации объявлений и отзывов.
+    Доступен только пользователям с ролью 'admin',
+    права проверяются один раз на запрос, без проверки каждого объекта.
+    """
+
+    permission_classes = [IsAdmin]
+
+    @action(detail=False, methods=["POST"])
+    def ads(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Удаляет, скрывает или показывает объявления по списку id или по автору.
+        :param request: HTTP-запрос.
+        """
+        return self.moderate(request, Ad.objects.all(), moderate_ads)
+
+    @action(detail=False, methods=["POST"])
+    def reviews(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Удаляет, скрывает или показывает отзывы по списку id или по автору.
+        :param request: HTTP-запрос.
+        """
+        return self.moderate(request, Review.objects.all(), moderate_reviews)
+
+    @staticmethod
+    def moderate(request: Request, queryset: QuerySet, moderate) -> Response:
+        """
+        Проверяет запрос модерации и выполняет действие над выбранными объектами.
+        :param request: HTTP-запрос.
+        :param queryset: Все объекты модерируемой модели.
+        :param moderate: Функция, выполняющая действие.
+        :return: Действие и количество затронутых объектов.
+        """
+        serializer = ModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if "ids" in data:
+            queryset = queryset.filter(pk__in=data["ids"])
+        else:
+            queryset = queryset.filter(author_id=data["author_id"])
+
+        affected = moderate(data["action"], queryset)
+        return Response({"action": data["action"], "affected": affected})
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """
+    Набор представлений с метриками процесса для системы мониторинга.
+    Доступен только пользователям с ролью 'admin'.
+    """
+
+    permission_classes = [IsAdmin]
+
+    @action(detail=False, methods=["GET"], url_path="db-pool")
+    def db_pool(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Возвращает метрики пулов соединений с базой данных процесса,
+        обработавшего запрос, по псевдонимам баз данных.
+        :param request: HTTP-запрос.
+        """
+        return Response({"pid": os.getpid(), "databases": get_pools_stats()})
+
+
+class ImageUploadViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Набор представлений для загрузки изображений объявлений по частям.
+    Клиент создает загрузку, передает файл частями с заголовком Upload-Offset
+    и завершает загрузку, указывая объявление.
+    Оборванную загрузку можно продолжить с позиции offset.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = ImageUploadSerializer
+    http_method_names = ["get", "post", "put", "delete"]
+
+    def get_queryset(self) -> QuerySet[ImageUpload]:
+        """
+        Получает queryset загрузок текущего пользователя.
+        Для завершения загрузки строка блокируется, чтобы оно не выполнялось
+        одновременно с переносом части в файл загрузки.
+        """
+        queryset = ImageUpload.objects.filter(author=self.request.user)
+        if self.action == "finalize":
+            queryset = queryset.select_for_update()
+        return queryset
+
+    def perform_create(self, serializer: ImageUploadSerializer) -> None:
+        """
+        Создает загрузку от имени текущего пользователя.
+        :param serializer: Сериализатор загрузки.
+        """
+        serializer.save(author=self.request.user)
+
+    def perform_destroy(self, instance: ImageUpload) -> None:
+        """
+        Отменяет загрузку и удаляет временный файл.
+        :param instance: Загрузка изображения.
+        """
+        delete_upload(instance)
+
+    @action(detail=True, methods=["PUT"])
+    def chunk(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Принимает часть файла в теле запроса (application/octet-stream).
+        Позиция части передается в заголовке Upload-Offset и должна совпадать
+        с количеством уже принятых байт, иначе возвращается 409 с текущим offset.
+        Тело запроса принимается вне транзакции, строка загрузки блокируется
+        только для проверки и сдвига offset.
+        :param request: HTTP-запрос.
+        """
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            raise serializers.ValidationError("Некорректный заголовок Content-Length.")
+        if not 0 < length <= settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+            raise serializers.ValidationError(
+                f"Размер части должен быть от 1 до "
+                f"{settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE} байт."
+            )
+        try:
+            offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            raise serializers.ValidationError("Не указан заголовок Upload-Offset.")
+
+        upload = self.get_object()
+        if offset != upload.offset:
+            return self.offset_conflict(upload)
+
+        chunk_path, written = receive_chunk(upload, offset, request.stream, length)
+        try:
+            if not append_chunk(upload, offset, chunk_path, written):
+                upload.refresh_from_db()
+                return self.offset_conflict(upload)
+        finally:
+            os.remove(chunk_path)
+
+        return Response(
+            self.get_serializer(upload).data,
+            headers={"Upload-Offset": str(upload.offset)},
+        )
+
+    def offset_conflict(self, upload: ImageUpload) -> Response:
+        """
+        Возвращает ответ 409 с текущим offset загрузки.
+        :param upload: Загрузка изображения.
+        """
+        return Response(
+            self.get_serializer(upload).data, status=status.HTTP_409_CONFLICT
+        )
+
+    @action(detail=True, methods=["POST"])
+    def finalize(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Завершает загрузку: проверяет изображение
+        и сохраняет его как изображение объявления.
+        :param request: HTTP-запрос.
+        """
+        serializer = ImageUploadFinalizeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            upload = self.get_object()
+            if not upload.is_complete:
+                raise serializers.ValidationError("Загрузка не завершена.")
+
+            ad = get_object_or_404(Ad.get_all_ads(), pk=serializer.validated_data["ad"])
+            if not IsAdminOrOwner().has_object_permission(request, self, ad):
+                self.permission_denied(request)
+            attach_upload(upload, ad)
+
+        return Response(AdSerializer(ad, context=self.get_serializer_context()).data)
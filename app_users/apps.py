@@ -5,3 +5,6 @@ class AppUsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app_users"
     verbose_name = "Пользователи"
+
+    def ready(self):
+        from app_users import signals  # noqa: F401
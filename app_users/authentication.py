@@ -0,0 +1,119 @@
+from typing import Any, Optional, Tuple
+
+from django.http import HttpRequest
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+from config.db_router import VALIDATED_TOKEN_ATTR
+
+from .cache import aget_cached_user, get_cached_user
+from .models import CustomUser
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT-токену, при которой пользователь берется из кэша
+    (кэш процесса и общий кэш), а не загружается из базы данных на каждый запрос.
+    Кэш пользователя сбрасывается при сохранении и удалении пользователя,
+    в том числе при смене пароля и деактивации.
+    Токен, уже проверенный ReplicaRoutingMiddleware, повторно не проверяется.
+    """
+
+    def authenticate(self, request: HttpRequest) -> Optional[Tuple[CustomUser, Token]]:
+        """
+        Аутентифицирует пользователя по заголовку Authorization.
+        :param request: HTTP-запрос.
+        :return: Пользователь и проверенный токен или None, если токен не передан.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_request_validated_token(request, raw_token)
+        return self.get_user(validated_token), validated_token
+
+    def get_request_validated_token(
+        self, request: HttpRequest, raw_token: bytes
+    ) -> Token:
+        """
+        Возвращает токен, проверенный ReplicaRoutingMiddleware для этого запроса,
+        или проверяет токен заново.
+        :param request: HTTP-запрос.
+        :param raw_token: Токен из заголовка Authorization.
+        """
+        validated = getattr(request, VALIDATED_TOKEN_ATTR, None)
+        if validated is not None and validated[0] == raw_token:
+            return validated[1]
+        return self.get_validated_token(raw_token)
+
+    def get_user(self, validated_token: Token) -> CustomUser:
+        """
+        Возвращает пользователя, указанного в токене.
+        :param validated_token: Проверенный токен.
+        """
+        return self.check_user(get_cached_user(self.get_user_id(validated_token)))
+
+    @staticmethod
+    def get_user_id(validated_token: Token) -> Any:
+        """
+        Возвращает идентификатор пользователя из токена.
+        :param validated_token: Проверенный токен.
+        """
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    @staticmethod
+    def check_user(user: Optional[CustomUser]) -> CustomUser:
+        """
+        Проверяет, что пользователь существует и активен.
+        :param user: Пользователь или None.
+        """
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """
+    Аутентификация по JWT-токену для асинхронных представлений.
+    Проверка токена выполняется так же, как в CachedJWTAuthentication,
+    а пользователь загружается из кэша или асинхронным запросом ORM.
+    """
+
+    async def aauthenticate(
+        self, request: HttpRequest
+    ) -> Optional[Tuple[CustomUser, Token]]:
+        """
+        Аутентифицирует пользователя по заголовку Authorization.
+        :param request: HTTP-запрос.
+        :return: Пользователь и проверенный токен или None, если токен не передан.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_request_validated_token(request, raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token: Token) -> CustomUser:
+        """
+        Загружает пользователя, указанного в токене.
+        :param validated_token: Проверенный токен.
+        """
+        user = await aget_cached_user(self.get_user_id(validated_token))
+        return self.check_user(user)
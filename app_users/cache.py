@@ -0,0 +1,176 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import CustomUser
+
+USER_CACHE_KEY = "users:auth:{schema}:{user_id}"
+
+
+class LocalUserCache:
+    """
+    Кэш внутри процесса с вытеснением давно не использованных записей (LRU)
+    и ограниченным временем жизни записей.
+    Хранит значения полей пользователя, а не экземпляры модели,
+    поэтому изменение request.user в одном запросе не влияет на другие.
+    """
+
+    def __init__(self) -> None:
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: Any) -> Optional[Tuple]:
+        """
+        Возвращает значения полей пользователя или None, если записи нет или она устарела.
+        :param user_id: Идентификатор пользователя.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id: Any, values: Tuple) -> None:
+        """
+        Сохраняет значения полей пользователя на USER_CACHE_LOCAL_TIMEOUT секунд.
+        Если записей больше USER_CACHE_LOCAL_SIZE, вытесняется самая давняя.
+        :param user_id: Идентификатор пользователя.
+        :param values: Значения полей пользователя.
+        """
+        expires_at = time.monotonic() + settings.USER_CACHE_LOCAL_TIMEOUT
+        with self._lock:
+            self._entries[user_id] = (expires_at, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.USER_CACHE_LOCAL_SIZE:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_id: Any) -> None:
+        """
+        Удаляет запись пользователя.
+        :param user_id: Идентификатор пользователя.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """
+        Удаляет все записи.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+local_user_cache = LocalUserCache()
+
+
+def get_user_cache_fields() -> List[str]:
+    """
+    Возвращает поля пользователя, которые хранятся в кэше.
+    Хэш пароля в кэш не попадает: при обращении к нему
+    поле загружается из базы данных как отложенное.
+    """
+    return [
+        field.attname
+        for field in CustomUser._meta.concrete_fields
+        if field.attname != "password"
+    ]
+
+
+@lru_cache(maxsize=None)
+def get_user_cache_schema() -> str:
+    """
+    Возвращает версию схемы кэшированных значений - хэш имен полей в порядке
+    get_user_cache_fields(). После добавления или изменения порядка полей
+    пользователя ключи кэша меняются, и значения старой схемы не используются.
+    """
+    fields = ",".join(get_user_cache_fields())
+    return hashlib.md5(fields.encode()).hexdigest()[:12]
+
+
+def get_user_cache_key(user_id: Any) -> str:
+    """
+    Возвращает ключ общего кэша пользователя.
+    :param user_id: Идентификатор пользователя.
+    """
+    return USER_CACHE_KEY.format(schema=get_user_cache_schema(), user_id=user_id)
+
+
+def build_user(values: Tuple) -> CustomUser:
+    """
+    Создает экземпляр пользователя из значений полей, как при загрузке из базы данных.
+    :param values: Значения полей в порядке get_user_cache_fields().
+    """
+    return CustomUser.from_db("default", get_user_cache_fields(), values)
+
+
+def get_cached_user(user_id: Any) -> Optional[CustomUser]:
+    """
+    Возвращает пользователя по идентификатору.
+    Пользователь ищется в кэше процесса, затем в общем кэше
+    и только затем загружается из основной базы данных:
+    после сброса кэша в него не должны попасть данные из отстающей реплики.
+    :param user_id: Идентификатор пользователя.
+    :return: Пользователь или None, если пользователь не найден.
+    """
+    values = local_user_cache.get(user_id)
+    if values is None:
+        key = get_user_cache_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            values = (
+                CustomUser.objects.using("default")
+                .filter(pk=user_id)
+                .values_list(*get_user_cache_fields())
+                .first()
+            )
+            if values is None:
+                return None
+            cache.set(key, values, settings.USER_CACHE_TIMEOUT)
+        local_user_cache.set(user_id, values)
+    return build_user(values)
+
+
+async def aget_cached_user(user_id: Any) -> Optional[CustomUser]:
+    """
+    Асинхронно возвращает пользователя по идентификатору.
+    :param user_id: Идентификатор пользователя.
+    :return: Пользователь или None, если пользователь не найден.
+    """
+    values = local_user_cache.get(user_id)
+    if values is None:
+        key = get_user_cache_key(user_id)
+        values = await cache.aget(key)
+        if values is None:
+            values = (
+                await CustomUser.objects.using("default")
+                .filter(pk=user_id)
+                .values_list(*get_user_cache_fields())
+                .afirst()
+            )
+            if values is None:
+                return None
+            await cache.aset(key, values, settings.USER_CACHE_TIMEOUT)
+        local_user_cache.set(user_id, values)
+    return build_user(values)
+
+
+def invalidate_cached_user(user_id: Any) -> None:
+    """
+    Удаляет пользователя из кэша процесса и из общего кэша.
+    Другие процессы могут использовать свою копию из кэша процесса
+    не дольше USER_CACHE_LOCAL_TIMEOUT секунд.
+    :param user_id: Идентификатор пользователя.
+    """
+    local_user_cache.delete(user_id)
+    cache.delete(get_user_cache_key(user_id))
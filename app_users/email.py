@@ -1,12 +1,16 @@
 import os
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage
+from django.core.mail.backends.base import BaseEmailBackend
 from djoser import utils
 from djoser.conf import settings
 from dotenv import load_dotenv
 from templated_mail.mail import BaseEmailMessage
 
+from .models import OutboxEmail
+
 load_dotenv()
 
 
@@ -32,3 +36,25 @@ class PasswordResetEmail(BaseEmailMessage):
         context["protocol"] = "http"
         context["site_name"] = "ADS_ONLINE"
         return context
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """
+    Почтовый backend, который не отправляет письма, а сохраняет их в очередь (OutboxEmail).
+    Письма отправляются отдельным процессом командой send_outbox_emails,
+    поэтому медленный SMTP-сервер не задерживает обработку запросов.
+    """
+
+    def send_messages(self, email_messages: List[EmailMessage]) -> int:
+        """
+        Сохраняет письма в очередь на отправку.
+        :param email_messages: Список писем.
+        :return: Количество поставленных в очередь писем.
+        """
+        emails = [
+            OutboxEmail.from_message(message)
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxEmail.objects.bulk_create(emails)
+        return len(emails)
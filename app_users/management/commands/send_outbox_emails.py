@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from app_users.outbox import send_pending_emails
+
+
+class Command(BaseCommand):
+    """
+    Отправляет письма из очереди (OutboxEmail) пачками
+    через одно переиспользуемое соединение с почтовым сервером.
+    Неудачные попытки повторяются с экспоненциально растущей задержкой.
+    В режиме --loop работает постоянно, проверяя очередь каждые --interval секунд,
+    на время простоя соединение закрывается.
+    """
+
+    help = "Отправляет письма из очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Количество писем в одной пачке",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Работать постоянно",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Пауза между проверками пустой очереди в секундах",
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection(settings.EMAIL_OUTBOX_BACKEND)
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = send_pending_emails(connection, options["batch_size"])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    continue
+
+                connection.close()
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        finally:
+            connection.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Отправлено писем: {total_sent}, неудачных попыток: {total_failed}"
+            )
+        )
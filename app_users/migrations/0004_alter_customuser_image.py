@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-18 14:44
+
+import config.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_users", "0003_alter_customuser_first_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="customuser",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                storage=config.storage.get_content_addressed_storage,
+                upload_to="users/",
+                verbose_name="Изображение пользователя",
+            ),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 4.2 on 2026-10-18 14:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_users", "0004_alter_customuser_image"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=998, verbose_name="Тема")),
+                ("body", models.TextField(blank=True, verbose_name="Текст письма")),
+                (
+                    "html",
+                    models.TextField(blank=True, verbose_name="HTML-версия письма"),
+                ),
+                (
+                    "content_subtype",
+                    models.CharField(
+                        default="plain", max_length=16, verbose_name="Тип текста письма"
+                    ),
+                ),
+                (
+                    "from_email",
+                    models.CharField(max_length=254, verbose_name="Отправитель"),
+                ),
+                ("to", models.JSONField(default=list, verbose_name="Получатели")),
+                ("cc", models.JSONField(default=list, verbose_name="Копия")),
+                ("bcc", models.JSONField(default=list, verbose_name="Скрытая копия")),
+                (
+                    "reply_to",
+                    models.JSONField(default=list, verbose_name="Адрес для ответа"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("sent", "sent"),
+                            ("failed", "failed"),
+                        ],
+                        default="pending",
+                        max_length=7,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Количество попыток"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Время следующей попытки",
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="Последняя ошибка"),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Время создания"
+                    ),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Время отправки"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Письмо в очереди",
+                "verbose_name_plural": "Очередь писем",
+                "db_table": "outbox_emails",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="outboxemail",
+            index=models.Index(
+                fields=["status", "next_attempt_at"],
+                name="outbox_status_next_attempt_idx",
+            ),
+        ),
+    ]
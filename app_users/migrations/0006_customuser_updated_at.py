@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-18 21:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_users", "0005_outbox_email"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name="Время изменения",
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            "UPDATE users SET updated_at = date_joined;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
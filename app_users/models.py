@@ -1,7 +1,13 @@
+from datetime import timedelta
 from typing import List
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.mail import EmailMessage, EmailMultiAlternatives
 from django.db import models
+from django.utils import timezone
+
+from config.storage import get_content_addressed_storage
 
 from .managers import CustomUserManager
 from .validators import phone_validator
@@ -29,7 +35,10 @@ class CustomUser(AbstractUser):
     first_name = models.CharField(max_length=64, verbose_name="Имя")
     last_name = models.CharField(max_length=64, verbose_name="Фамилия")
     image = models.ImageField(
-        upload_to="users/", verbose_name="Изображение пользователя", **NULLABLE
+        upload_to="users/",
+        storage=get_content_addressed_storage,
+        verbose_name="Изображение пользователя",
+        **NULLABLE,
     )
     phone = models.CharField(
         max_length=16, verbose_name="Телефон", validators=[phone_validator]
@@ -40,6 +49,7 @@ class CustomUser(AbstractUser):
         default="user",
         verbose_name="Роль пользователя",
     )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Время изменения")
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -58,3 +68,125 @@ class CustomUser(AbstractUser):
         Возвращает список всех пользователей
         """
         return cls.objects.all().order_by("email")
+
+
+class OutboxEmail(models.Model):
+    """
+    Модель, описывающая письмо в очереди на отправку.
+    Письма сохраняются при обработке запроса и отправляются
+    отдельным процессом командой send_outbox_emails.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "pending"),
+        ("sending", "sending"),
+        ("sent", "sent"),
+        ("failed", "failed"),
+    ]
+
+    subject = models.CharField(max_length=998, verbose_name="Тема")
+    body = models.TextField(verbose_name="Текст письма", blank=True)
+    html = models.TextField(verbose_name="HTML-версия письма", blank=True)
+    content_subtype = models.CharField(
+        max_length=16, default="plain", verbose_name="Тип текста письма"
+    )
+    from_email = models.CharField(max_length=254, verbose_name="Отправитель")
+    to = models.JSONField(default=list, verbose_name="Получатели")
+    cc = models.JSONField(default=list, verbose_name="Копия")
+    bcc = models.JSONField(default=list, verbose_name="Скрытая копия")
+    reply_to = models.JSONField(default=list, verbose_name="Адрес для ответа")
+    status = models.CharField(
+        max_length=7, choices=STATUS_CHOICES, default="pending", verbose_name="Статус"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Количество попыток"
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Время следующей попытки"
+    )
+    last_error = models.TextField(verbose_name="Последняя ошибка", blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
+    sent_at = models.DateTimeField(verbose_name="Время отправки", **NULLABLE)
+
+    class Meta:
+        verbose_name = "Письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+        db_table = "outbox_emails"
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="outbox_status_next_attempt_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+    @classmethod
+    def from_message(cls, message: EmailMessage) -> "OutboxEmail":
+        """
+        Создает запись очереди по подготовленному письму.
+        :param message: Письмо Django.
+        """
+        html = next(
+            (
+                content
+                for content, mimetype in getattr(message, "alternatives", [])
+                if mimetype == "text/html"
+            ),
+            "",
+        )
+        return cls(
+            subject=message.subject,
+            body=message.body,
+            html=html,
+            content_subtype=message.content_subtype,
+            from_email=message.from_email,
+            to=list(message.to),
+            cc=list(message.cc),
+            bcc=list(message.bcc),
+            reply_to=list(message.reply_to),
+        )
+
+    def to_message(self) -> EmailMultiAlternatives:
+        """
+        Восстанавливает письмо Django из записи очереди.
+        """
+        message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=self.to,
+            cc=self.cc,
+            bcc=self.bcc,
+            reply_to=self.reply_to,
+        )
+        message.content_subtype = self.content_subtype
+        if self.html:
+            message.attach_alternative(self.html, "text/html")
+        return message
+
+    def mark_sent(self) -> None:
+        """
+        Отмечает письмо как отправленное.
+        """
+        self.status = "sent"
+        self.attempts += 1
+        self.sent_at = timezone.now()
+        self.last_error = ""
+
+    def mark_failed(self, error: Exception) -> None:
+        """
+        Учитывает неудачную попытку отправки.
+        Следующая попытка откладывается с экспоненциально растущей задержкой,
+        после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо больше не отправляется.
+        :param error: Ошибка отправки.
+        """
+        self.attempts += 1
+        self.last_error = repr(error)
+        if self.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            self.status = "failed"
+        else:
+            self.status = "pending"
+            delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (self.attempts - 1)
+            self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from smtplib import SMTPRecipientsRefused, SMTPResponseException
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+RESULT_FIELDS = ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+
+
+def claim_pending_emails(batch_size: int) -> List[OutboxEmail]:
+    """
+    Забирает пачку писем из очереди, время отправки которых наступило.
+    Письма блокируются через SELECT ... FOR UPDATE SKIP LOCKED только на время
+    короткой транзакции, в которой им присваивается статус 'sending'
+    и аренда на EMAIL_OUTBOX_LEASE_TIMEOUT секунд (в поле next_attempt_at).
+    Письмо, аренда которого истекла (например, обработчик очереди упал),
+    забирается снова.
+
+    :param batch_size: Максимальное количество писем в пачке.
+    :return: Забранные письма.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_TIMEOUT)
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status__in=["pending", "sending"], next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status="sending", next_attempt_at=lease_until
+        )
+    for email in emails:
+        email.status = "sending"
+        email.next_attempt_at = lease_until
+    return emails
+
+
+def send_pending_emails(
+    connection: BaseEmailBackend, batch_size: int
+) -> Tuple[int, int]:
+    """
+    Отправляет пачку писем из очереди, время отправки которых наступило.
+    Письма забираются в короткой транзакции (claim_pending_emails),
+    поэтому несколько обработчиков очереди не отправляют одно письмо дважды,
+    а медленный почтовый сервер не держит открытой транзакцию базы данных.
+    Результат отправки каждого письма сохраняется сразу после нее.
+    Все письма пачки отправляются через одно открытое соединение;
+    если соединение разорвано, оно открывается заново для следующего письма.
+    Письма, аренда которых истекла до их отправки, остаются в очереди.
+
+    :param connection: Соединение с почтовым сервером.
+    :param batch_size: Максимальное количество писем в пачке.
+    :return: Количество отправленных писем и количество неудачных попыток.
+    """
+    sent = failed = 0
+    for email in claim_pending_emails(batch_size):
+        if timezone.now() >= email.next_attempt_at:
+            break
+        try:
+            connection.open()
+            connection.send_messages([email.to_message()])
+        except Exception as error:
+            if not isinstance(error, (SMTPRecipientsRefused, SMTPResponseException)):
+                connection.close()
+            email.mark_failed(error)
+            failed += 1
+        else:
+            email.mark_sent()
+            sent += 1
+        email.save(update_fields=RESULT_FIELDS)
+    return sent, failed
@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from djoser.serializers import PasswordResetConfirmSerializer
 from rest_framework import serializers
@@ -120,3 +120,12 @@ class EmailCheckSerializer(serializers.Serializer):
                 "Данный адрес электронной почты не найден."
             )
         return value
+
+    def get_user(self) -> Optional[CustomUser]:
+        """
+        Возвращает активного пользователя с указанным адресом электронной почты.
+        Используется djoser при отправке письма для сброса пароля.
+        """
+        return CustomUser.objects.filter(
+            email=self.validated_data["email"], is_active=True
+        ).first()
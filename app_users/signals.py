@@ -0,0 +1,20 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_cached_user
+from .models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_cache(sender, instance, **kwargs) -> None:
+    """
+    Сбрасывает кэш пользователя при изменении (в том числе пароля и активности)
+    или удалении пользователя. Кэш сбрасывается еще раз после фиксации транзакции,
+    чтобы в него не попали данные, прочитанные до фиксации.
+    """
+    invalidate_cached_user(instance.pk)
+    transaction.on_commit(partial(invalidate_cached_user, instance.pk))
@@ -1,14 +1,36 @@
 import os
-
+import socketserver
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings as django_settings
+from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from djoser import utils
 from djoser.conf import settings
 from dotenv import load_dotenv
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
+from app_users.cache import (
+    get_cached_user,
+    get_user_cache_fields,
+    get_user_cache_key,
+    get_user_cache_schema,
+    local_user_cache,
+)
 from app_users.email import PasswordResetEmail
-from app_users.models import CustomUser
+from app_users.models import CustomUser, OutboxEmail
 
 load_dotenv()
 
@@ -17,6 +39,7 @@ class UserCreationTestCase(APITestCase):
     """Регистрация пользователя"""
 
     def setUp(self):
+        cache.clear()
         self.register_url = "/api/users/"
         self.valid_user_data = {
             "email": "ivan@mail.com",
@@ -104,6 +127,7 @@ class UserDisplayTestCase(APITestCase):
     """Чтение данных пользователя"""
 
     def setUp(self):
+        cache.clear()
         self.url = "/api/users/"
         self.user_data = {
             "email": "ivan@mail.com",
@@ -152,3 +176,383 @@ class TestPasswordResetEmail(APITestCase):
         self.assertEqual(context["domain"], os.getenv("HOST") + ":3000")
         self.assertEqual(context["protocol"], "http")
         self.assertEqual(context["site_name"], "ADS_ONLINE")
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Обработчик минимального SMTP-сервера для тестов"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 localhost ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == "QUIT":
+                self.reply("221 Bye")
+                return
+            if command in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif command == "RCPT":
+                address = line.split(":", 1)[1].strip("<> ")
+                if address in server.rejected:
+                    self.reply("550 Mailbox unavailable")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while (line := self.rfile.readline()) != b".\r\n":
+                    data.append(line)
+                server.messages.append((recipients, b"".join(data)))
+                recipients = []
+                self.reply("250 OK")
+            else:
+                if command in ("RSET", "MAIL"):
+                    recipients = []
+                self.reply("250 OK")
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    """Минимальный SMTP-сервер для тестов"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()
+
+
+class EmailOutboxTestCase(APITestCase):
+    """Очередь писем"""
+
+    def setUp(self):
+        self.smtp = SMTPServer()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+
+        self.settings_override = override_settings(
+            EMAIL_BACKEND="app_users.email.OutboxEmailBackend",
+            EMAIL_OUTBOX_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.smtp.server_address[1],
+            EMAIL_HOST_USER="",
+            EMAIL_USE_SSL=False,
+            EMAIL_USE_TLS=False,
+            DEFAULT_FROM_EMAIL="noreply@ads.ru",
+            EMAIL_OUTBOX_RETRY_DELAY=0,
+            EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        CustomUser.objects.create_user(
+            email="ivan@mail.ru", password="qwerty123!", phone="+7(921)123-45-67"
+        )
+
+    def send_outbox(self):
+        call_command("send_outbox_emails", stdout=StringIO())
+
+    def test_password_reset_is_queued(self):
+        """Письмо для сброса пароля ставится в очередь и не отправляется в запросе"""
+
+        response = self.client.post(
+            "/api/users/reset_password/", {"email": "ivan@mail.ru"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.smtp.connections, 0)
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.to), ("pending", ["ivan@mail.ru"]))
+        self.assertIn("password/reset/confirm/", email.body + email.html)
+
+        self.send_outbox()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("sent", 1))
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(self.smtp.messages[0][0], ["ivan@mail.ru"])
+
+    def test_batches_use_single_connection(self):
+        """Все письма отправляются через одно соединение"""
+
+        for i in range(5):
+            mail.send_mail("Тема", f"Текст {i}", None, [f"user{i}@mail.ru"])
+        self.assertEqual(OutboxEmail.objects.count(), 5)
+
+        call_command("send_outbox_emails", "--batch-size=2", stdout=StringIO())
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertFalse(OutboxEmail.objects.exclude(status="sent").exists())
+
+    def test_failed_email_is_retried(self):
+        """Неудачная отправка повторяется, после исчерпания попыток письмо помечается"""
+
+        self.smtp.rejected.add("bad@mail.ru")
+        mail.send_mail("Тема", "Текст", None, ["bad@mail.ru"])
+        mail.send_mail("Тема", "Текст", None, ["good@mail.ru"])
+
+        with self.settings(EMAIL_OUTBOX_RETRY_DELAY=3600):
+            self.send_outbox()
+        bad = OutboxEmail.objects.get(to=["bad@mail.ru"])
+        self.assertEqual((bad.status, bad.attempts), ("pending", 1))
+        self.assertGreater(bad.next_attempt_at, bad.created_at)
+        self.assertIn("550", bad.last_error)
+        self.assertEqual(OutboxEmail.objects.get(to=["good@mail.ru"]).status, "sent")
+
+        OutboxEmail.objects.filter(pk=bad.pk).update(next_attempt_at=bad.created_at)
+        self.send_outbox()
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), ("failed", 2))
+        self.assertEqual(len(self.smtp.messages), 1)
+
+    def test_claimed_email_is_leased(self):
+        """Забранное письмо не отправляется повторно до истечения аренды"""
+
+        mail.send_mail("Тема", "Текст", None, ["ivan@mail.ru"])
+        email = OutboxEmail.objects.get()
+        OutboxEmail.objects.filter(pk=email.pk).update(
+            status="sending", next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+        self.send_outbox()
+        self.assertEqual(len(self.smtp.messages), 0)
+
+        OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=email.created_at)
+        self.send_outbox()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("sent", 1))
+        self.assertEqual(len(self.smtp.messages), 1)
+
+
+class CachedUserAuthenticationTestCase(APITestCase):
+    """Кэш пользователей при аутентификации по JWT-токену"""
+
+    URL = "/api/users/me/"
+
+    def setUp(self):
+        cache.clear()
+        local_user_cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email="ivan@mail.com",
+            password="qwerty123!",
+            first_name="Ivan",
+            last_name="Ivanov",
+            phone="+7(912)345-67-89",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.get_token()}")
+
+    def get_token(self, password="qwerty123!"):
+        response = APIClient().post(
+            "/api/token/", {"email": self.user.email, "password": password}
+        )
+        return response.json().get("access")
+
+    def count_user_queries(self, url="/api/ads/"):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sum('FROM "users"' in query["sql"] for query in queries)
+
+    def test_user_loaded_once(self):
+        """Пользователь загружается из базы данных только при первом запросе"""
+
+        self.assertEqual(self.count_user_queries(), 1)
+        self.assertEqual(self.count_user_queries(), 0)
+
+        local_user_cache.clear()
+        self.assertEqual(self.count_user_queries(), 0)
+
+    def test_password_not_cached(self):
+        """Хэш пароля не хранится в кэше"""
+
+        user = get_cached_user(self.user.pk)
+        self.assertIn("password", user.get_deferred_fields())
+        self.assertNotIn(self.user.password, str(cache.get(get_user_cache_key(user.pk))))
+        self.assertTrue(user.check_password("qwerty123!"))
+
+    def test_cache_key_depends_on_fields(self):
+        """Значения другой схемы полей пользователя не читаются из кэша"""
+
+        get_cached_user(self.user.pk)
+        self.assertIsNotNone(cache.get(get_user_cache_key(self.user.pk)))
+
+        fields = [*get_user_cache_fields(), "new_field"]
+        get_user_cache_schema.cache_clear()
+        self.addCleanup(get_user_cache_schema.cache_clear)
+        with mock.patch("app_users.cache.get_user_cache_fields", return_value=fields):
+            self.assertIsNone(cache.get(get_user_cache_key(self.user.pk)))
+
+    def test_profile_update_invalidates_cache(self):
+        """После изменения профиля возвращаются новые данные"""
+
+        self.client.get(self.URL)
+        response = self.client.patch(self.URL, {"first_name": "Petr"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.client.get(self.URL).json()["first_name"], "Petr")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Petr")
+        self.assertTrue(self.user.check_password("qwerty123!"))
+
+    def test_deactivation_invalidates_cache(self):
+        """Деактивированный пользователь сразу теряет доступ"""
+
+        self.client.get(self.URL)
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()["code"], "user_inactive")
+
+    def test_password_change(self):
+        """Смена пароля сохраняет новый пароль и сбрасывает кэш"""
+
+        self.client.get(self.URL)
+        response = self.client.post(
+            "/api/users/set_password/",
+            {"current_password": "qwerty123!", "new_password": "asdfgh456!"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertIsNone(cache.get(get_user_cache_key(self.user.pk)))
+        self.assertIsNone(local_user_cache.get(self.user.pk))
+        self.assertIsNotNone(self.get_token("asdfgh456!"))
+
+    def test_deleted_user(self):
+        """Удаленный пользователь не аутентифицируется"""
+
+        self.client.get(self.URL)
+        self.user.delete()
+
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()["code"], "user_not_found")
+
+    @override_settings(USER_CACHE_LOCAL_SIZE=1)
+    def test_local_cache_eviction(self):
+        """Кэш процесса хранит не больше USER_CACHE_LOCAL_SIZE пользователей"""
+
+        other = CustomUser.objects.create_user(email="max@mail.com", password="x")
+        get_cached_user(self.user.pk)
+        get_cached_user(other.pk)
+        self.assertIsNone(local_user_cache.get(self.user.pk))
+        self.assertIsNotNone(local_user_cache.get(other.pk))
+
+
+def throttle_rates(**rates):
+    """Переопределяет ограничения частоты запросов"""
+
+    return override_settings(
+        REST_FRAMEWORK={
+            **django_settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **django_settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                **rates,
+            },
+        }
+    )
+
+
+class ThrottlingTestCase(APITestCase):
+    """Ограничение частоты попыток входа и регистрации"""
+
+    TOKEN_URL = "/api/token/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email="ivan@mail.com", password="qwerty123!"
+        )
+
+    def login(self, email="ivan@mail.com", password="wrong", **extra):
+        return self.client.post(
+            self.TOKEN_URL, {"email": email, "password": password}, **extra
+        )
+
+    @throttle_rates(login_account="3/min")
+    def test_login_throttled_per_account(self):
+        """Попытки входа в одну учетную запись ограничены до проверки пароля"""
+
+        for _ in range(3):
+            response = self.login()
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with mock.patch.object(ModelBackend, "authenticate") as authenticate:
+            response = self.login(email="IVAN@mail.com ", password="qwerty123!")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "20")
+        authenticate.assert_not_called()
+
+        response = self.login(email="max@mail.com")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @throttle_rates(login_ip="2/min")
+    def test_login_throttled_per_ip(self):
+        """Попытки входа с одного IP-адреса ограничены"""
+
+        self.login(email="a@mail.com", REMOTE_ADDR="10.0.0.1")
+        self.login(email="b@mail.com", REMOTE_ADDR="10.0.0.1")
+        response = self.login(email="c@mail.com", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        response = self.login(email="c@mail.com", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @throttle_rates(login_ip="1/min")
+    def test_client_ip_behind_proxy(self):
+        """За прокси IP-адрес клиента берется из X-Forwarded-For"""
+
+        for address in ("10.0.0.1", "10.0.0.2"):
+            response = self.login(
+                email=f"{address}@mail.com", HTTP_X_FORWARDED_FOR=address
+            )
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.login(
+            email="spoofed@mail.com", HTTP_X_FORWARDED_FOR="1.1.1.1, 10.0.0.1"
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @throttle_rates(login_account="2/min")
+    def test_bucket_refills(self):
+        """Корзина пополняется со временем"""
+
+        now = time.time()
+        with mock.patch("config.throttling.time.time", return_value=now):
+            self.login()
+            self.login()
+            response = self.login()
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        with mock.patch("config.throttling.time.time", return_value=now + 30):
+            response = self.login(password="qwerty123!")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.login()
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @throttle_rates(registration_ip="2/hour")
+    def test_registration_throttled(self):
+        """Регистрация с одного IP-адреса ограничена"""
+
+        for number in range(3):
+            response = self.client.post(
+                "/api/users/",
+                {
+                    "email": f"user{number}@mail.com",
+                    "first_name": "Ivan",
+                    "last_name": "Ivanov",
+                    "password": "qwerty123!",
+                    "phone": "+7(912)345-67-89",
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1800")
+        self.assertEqual(CustomUser.objects.count(), 3)
@@ -0,0 +1,35 @@
+from typing import List
+
+from djoser.views import UserViewSet as BaseUserViewSet
+from rest_framework.throttling import BaseThrottle
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from config.throttling import get_scoped_throttles
+
+
+class TokenObtainView(TokenObtainPairView):
+    """
+    Получение пары JWT-токенов по электронной почте и паролю.
+    Частота попыток входа ограничивается до проверки пароля.
+    """
+
+    def get_throttles(self) -> List[BaseThrottle]:
+        """
+        Получает ограничения частоты запросов: с одного IP-адреса и к одной учетной записи.
+        """
+        return get_scoped_throttles("login")
+
+
+class UserViewSet(BaseUserViewSet):
+    """
+    Набор представлений для пользователей djoser
+    с ограничением частоты регистрации.
+    """
+
+    throttle_scopes = {"create": "registration"}
+
+    def get_throttles(self) -> List[BaseThrottle]:
+        """
+        Получает ограничения частоты запросов для текущего действия.
+        """
+        return get_scoped_throttles(self.throttle_scopes.get(self.action))
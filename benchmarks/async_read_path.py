@@ -0,0 +1,82 @@
+"""
+Сравнение пропускной способности синхронного (WSGI) и асинхронного (ASGI)
+путей чтения объявлений при большом количестве одновременных соединений.
+
+Скрипт запускает gunicorn с синхронными worker'ами (config.wsgi) и gunicorn
+с worker'ами uvicorn (config.asgi) с одинаковым количеством процессов,
+нагружает одинаковые по содержимому эндпоинты /api/... и /api/async/...
+и выводит результат в формате JSON.
+
+Пример запуска из корня проекта:
+
+    python benchmarks/async_read_path.py --workers 2 --concurrency 64 --requests 2000 \
+        --path "ads/?page=2" --email user@mail.ru --password secret
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from typing import Dict, Optional
+
+from http_load import SERVER_APPS, fetch, get_free_port, run_load, start_server
+
+PREFIXES = {"wsgi": "/api/", "asgi": "/api/async/"}
+
+
+async def obtain_token(
+    port: int, headers: Dict[str, str], email: str, password: str
+) -> Optional[str]:
+    """
+    Получает access-токен пользователя.
+    """
+    body = json.dumps({"email": email, "password": password}).encode()
+    status, content = await fetch(
+        port,
+        "POST",
+        "/api/token/",
+        {**headers, "Content-Type": "application/json"},
+        body,
+    )
+    if status != 200:
+        raise RuntimeError(f"Не удалось получить токен: {content.decode()}")
+    return json.loads(content)["access"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--path", default="ads/", help="Путь относительно /api/")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--email", help="Пользователь для эндпоинтов с авторизацией")
+    parser.add_argument("--password")
+    options = parser.parse_args()
+
+    headers = {"Host": os.getenv("HOST", "127.0.0.1")}
+    results = {}
+    for name, prefix in PREFIXES.items():
+        port = get_free_port()
+        process = start_server(SERVER_APPS[name], port, options.workers)
+        try:
+            if options.email:
+                token = asyncio.run(
+                    obtain_token(port, headers, options.email, options.password)
+                )
+                headers["Authorization"] = f"Bearer {token}"
+            request = (options.path, "GET", prefix + options.path, headers, b"")
+            asyncio.run(run_load(port, lambda: request, options.concurrency, 1))
+            results[name] = asyncio.run(
+                run_load(port, lambda: request, options.requests, options.concurrency)
+            )["total"]
+        finally:
+            process.terminate()
+            process.wait()
+
+    results["workers"] = options.workers
+    results["path"] = options.path
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Общие функции нагрузочных скриптов: запуск gunicorn, HTTP-клиент на asyncio
+и подсчет пропускной способности и перцентилей задержки.
+"""
+
+import asyncio
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER_APPS = {
+    "wsgi": ["config.wsgi:application"],
+    "asgi": ["config.asgi:application", "-k", "uvicorn.workers.UvicornWorker"],
+}
+
+# Запрос нагрузки: имя эндпоинта, метод, путь, заголовки, тело.
+LoadRequest = Tuple[str, str, str, Dict[str, str], bytes]
+
+
+def get_free_port() -> int:
+    """
+    Возвращает свободный TCP-порт.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app_args: List[str], port: int, workers: int) -> subprocess.Popen:
+    """
+    Запускает gunicorn и ждет, пока он начнет принимать соединения.
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            *app_args,
+            "--workers",
+            str(workers),
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--log-level",
+            "warning",
+        ],
+        cwd=BASE_DIR,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Сервер не запустился")
+
+
+async def fetch(
+    port: int, method: str, path: str, headers: Dict[str, str], body: bytes = b""
+) -> Tuple[int, bytes]:
+    """
+    Выполняет один HTTP/1.1-запрос в отдельном соединении.
+    :return: Код ответа и тело ответа.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    lines = [f"{method} {path} HTTP/1.1", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    if body:
+        lines.append(f"Content-Length: {len(body)}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), content
+
+
+def percentile(latencies: List[float], percent: float) -> float:
+    """
+    Возвращает перцентиль по методу ближайшего ранга.
+    :param latencies: Отсортированные задержки.
+    :param percent: Перцентиль от 0 до 100.
+    """
+    rank = max(math.ceil(percent / 100 * len(latencies)), 1)
+    return latencies[rank - 1]
+
+
+def summarize(
+    latencies: List[float], statuses: Counter, elapsed: float
+) -> Dict[str, object]:
+    """
+    Возвращает количество запросов, ошибок, коды ответов,
+    запросов в секунду и перцентили задержки p50/p95/p99.
+    Ошибкой считается ответ с кодом 4xx/5xx или разрыв соединения (код 0).
+    :param latencies: Задержки запросов в секундах.
+    :param statuses: Количество ответов по кодам.
+    :param elapsed: Продолжительность нагрузки в секундах.
+    """
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(
+            count for status, count in statuses.items() if not 0 < status < 400
+        ),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run_load(
+    port: int,
+    make_request: Callable[[], LoadRequest],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, object]:
+    """
+    Выполняет requests запросов, поддерживая concurrency одновременных соединений.
+    :param port: Порт сервера.
+    :param make_request: Функция, возвращающая очередной запрос.
+    :param requests: Количество запросов.
+    :param concurrency: Количество одновременных клиентов.
+    :return: Итоги по всем запросам (total) и по каждому эндпоинту (endpoints).
+    """
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    queue = iter(range(requests))
+
+    async def client():
+        for _ in queue:
+            name, method, path, headers, body = make_request()
+            started = time.perf_counter()
+            try:
+                status, _ = await fetch(port, method, path, headers, body)
+            except OSError:
+                status = 0
+            latencies[name].append(time.perf_counter() - started)
+            statuses[name][status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    total = summarize(
+        [latency for values in latencies.values() for latency in values],
+        sum(statuses.values(), Counter()),
+        elapsed,
+    )
+    total["concurrency"] = concurrency
+    total["seconds"] = round(elapsed, 3)
+    return {
+        "total": total,
+        "endpoints": {
+            name: summarize(latencies[name], statuses[name], elapsed)
+            for name in sorted(latencies)
+        },
+    }
@@ -0,0 +1,121 @@
+"""
+Сравнение скорости стандартных JSONRenderer/JSONParser DRF
+и FastJSONRenderer/FastJSONParser на orjson.
+
+Рендеринг измеряется на списке объявлений из базы данных из настроек проекта,
+сериализованном AdListSerializer, разбор - на теле запроса пакетного создания
+объявлений. Скрипт проверяет совпадение результатов и выводит в формате JSON
+медианное время и количество операций в секунду.
+
+Пример запуска из корня проекта:
+
+    python benchmarks/json_rendering.py --rows 1000 --repeat 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+from typing import Any, Callable, Dict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(run: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Выполняет функцию repeat раз и возвращает медиану времени.
+    :param run: Измеряемая функция.
+    :param repeat: Количество повторов.
+    """
+    durations = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - started_at)
+    median = statistics.median(durations)
+    return {
+        "median_ms": round(median * 1000, 3),
+        "ops_per_second": round(1 / median) if median else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    options = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+
+    from django.test import RequestFactory
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from app_ads.models import Ad
+    from app_ads.serializers import AdListSerializer
+    from config.parsers import FastJSONParser
+    from config.renderers import FastJSONRenderer, orjson
+
+    request = RequestFactory().get("/", HTTP_HOST=os.getenv("HOST", "127.0.0.1"))
+    objects = list(Ad.get_visible_ads()[: options.rows])
+    data = {
+        "count": len(objects),
+        "results": AdListSerializer(
+            objects, many=True, context={"request": request}
+        ).data,
+    }
+    payload = json.dumps(
+        [
+            {
+                "title": ad["title"],
+                "price": ad["price"],
+                "description": ad["description"],
+            }
+            for ad in data["results"]
+        ],
+        ensure_ascii=False,
+    ).encode()
+
+    renderers = {"json": JSONRenderer(), "fast": FastJSONRenderer()}
+    parsers = {"json": JSONParser(), "fast": FastJSONParser()}
+    if renderers["fast"].render(data) != renderers["json"].render(data):
+        raise RuntimeError("Результаты рендеринга не совпадают")
+    if parsers["fast"].parse(BytesIO(payload)) != parsers["json"].parse(
+        BytesIO(payload)
+    ):
+        raise RuntimeError("Результаты разбора не совпадают")
+
+    results = {
+        "orjson": orjson.__version__ if orjson is not None else None,
+        "rows": len(objects),
+        "response_bytes": len(renderers["json"].render(data)),
+        "payload_bytes": len(payload),
+    }
+    for name in ("json", "fast"):
+        renderer, json_parser = renderers[name], parsers[name]
+        results[name] = {
+            "render": measure(lambda: renderer.render(data), options.repeat),
+            "parse": measure(
+                lambda: json_parser.parse(BytesIO(payload)), options.repeat
+            ),
+        }
+    results["speedup"] = {
+        operation: round(
+            results["json"][operation]["median_ms"]
+            / results["fast"][operation]["median_ms"],
+            2,
+        )
+        for operation in ("render", "parse")
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Сравнение скорости сериализации списков объявлений и отзывов сериализатором DRF
+по экземплярам моделей и быстрым путем через .values() (ValuesSerializerMixin).
+
+Скрипт работает внутри процесса с базой данных из настроек проекта,
+выбирает одни и те же строки обоими способами, проверяет побайтное совпадение
+JSON и выводит в формате JSON медианное время выборки вместе с сериализацией
+и отдельно сериализации, а также количество строк в секунду.
+
+Пример запуска из корня проекта:
+
+    python benchmarks/list_serialization.py --model ads --rows 1000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(run: Callable[[], Tuple[bytes, float]], repeat: int) -> Dict[str, Any]:
+    """
+    Выполняет функцию repeat раз и возвращает медианы времени.
+    :param run: Функция, возвращающая JSON и время сериализации в секундах.
+    :param repeat: Количество повторов.
+    """
+    totals, serializations = [], []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        _, serialization = run()
+        totals.append(time.perf_counter() - started_at)
+        serializations.append(serialization)
+    return {
+        "total_ms": round(statistics.median(totals) * 1000, 2),
+        "serialization_ms": round(statistics.median(serializations) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", choices=["ads", "reviews"], default="ads")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    options = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+
+    from django.test import RequestFactory
+    from rest_framework.renderers import JSONRenderer
+
+    from app_ads.models import Ad, Review
+    from app_ads.serializers import AdListSerializer, ReviewSerializer
+
+    if options.model == "ads":
+        queryset = Ad.get_visible_ads().order_by("-created_at", "-id")
+        serializer_class = AdListSerializer
+    else:
+        queryset = (
+            Review.objects.filter(is_hidden=False)
+            .select_related("author")
+            .order_by("created_at", "id")
+        )
+        serializer_class = ReviewSerializer
+    queryset = queryset[: options.rows]
+    request = RequestFactory().get("/", HTTP_HOST=os.getenv("HOST", "127.0.0.1"))
+    renderer = JSONRenderer()
+
+    def run_serializer() -> Tuple[bytes, float]:
+        objects: List[Any] = list(queryset.all())
+        started_at = time.perf_counter()
+        data = serializer_class(objects, many=True, context={"request": request}).data
+        content = renderer.render(data)
+        return content, time.perf_counter() - started_at
+
+    def run_values() -> Tuple[bytes, float]:
+        serializer = serializer_class(context={"request": request})
+        rows = list(serializer.get_values_queryset(queryset.all()))
+        started_at = time.perf_counter()
+        content = renderer.render(serializer.serialize_values(rows))
+        return content, time.perf_counter() - started_at
+
+    expected, _ = run_serializer()
+    actual, _ = run_values()
+    if actual != expected:
+        raise RuntimeError("Результаты сериализации не совпадают")
+
+    rows = len(json.loads(expected))
+    results = {"model": options.model, "rows": rows}
+    for name, run in (("serializer", run_serializer), ("values", run_values)):
+        result = measure(run, options.repeat)
+        result["rows_per_second"] = round(rows / (result["total_ms"] / 1000 or 1))
+        results[name] = result
+    results["speedup"] = round(
+        results["serializer"]["total_ms"] / results["values"]["total_ms"], 2
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Нагрузочное тестирование API объявлений смешанным профилем запросов.
+
+Скрипт дополняет базу данных из настроек проекта тестовыми пользователями
+(loadtest-N@loadtest.local), их объявлениями и отзывами, запускает gunicorn
+(или использует уже запущенный сервер), нагружает его смесью запросов
+ленты, поиска, карточки объявления, списка отзывов, входа и создания
+объявлений и отзывов с заданным количеством одновременных клиентов
+и выводит в формате JSON пропускную способность и перцентили задержки
+p50/p95/p99 по каждому эндпоинту. Результат можно сохранить в файл
+и сравнивать между запусками.
+
+Клиенты представляются разными IP-адресами в X-Forwarded-For (NUM_PROXIES = 1),
+поэтому ограничения частоты запросов срабатывают так же, как для реальных
+пользователей; ответы 429 учитываются в statuses и errors.
+
+Пример запуска из корня проекта:
+
+    python benchmarks/load_test.py --users 200 --ads 5000 --reviews 20000 \
+        --requests 5000 --concurrency 32 --workers 4 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+from typing import Any, Callable, Dict, List
+from urllib.parse import urlencode
+
+from http_load import (
+    BASE_DIR,
+    SERVER_APPS,
+    LoadRequest,
+    get_free_port,
+    run_load,
+    start_server,
+)
+
+EMAIL_TEMPLATE = "loadtest-{}@loadtest.local"
+EMAIL_DOMAIN = "@loadtest.local"
+PASSWORD = "loadtest-password"
+
+DEFAULT_MIX = (
+    "feed=40,search=15,detail=15,reviews=15,login=5,create_ad=5,create_review=5"
+)
+
+ITEMS = [
+    "ноутбук",
+    "велосипед",
+    "диван",
+    "телефон",
+    "куртка",
+    "коляска",
+    "гитара",
+    "холодильник",
+    "стол",
+    "машина",
+]
+ADJECTIVES = ["новый", "подержанный", "отличный", "недорогой", "редкий", "детский"]
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """
+    Разбирает профиль нагрузки вида 'feed=40,search=15'.
+    :param value: Веса эндпоинтов через запятую.
+    """
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in REQUEST_BUILDERS:
+            raise argparse.ArgumentTypeError(f"Неизвестный эндпоинт: {name}")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+def make_title(rng: random.Random) -> str:
+    return f"{rng.choice(ADJECTIVES).capitalize()} {rng.choice(ITEMS)}"
+
+
+def make_description(rng: random.Random) -> str:
+    return f"Продам {rng.choice(ITEMS)}, состояние {rng.choice(ADJECTIVES)}. " * 3
+
+
+def seed(users: int, ads: int, reviews: int, rng: random.Random) -> Dict[str, Any]:
+    """
+    Дополняет базу данных тестовыми пользователями, объявлениями и отзывами
+    до заданного количества и возвращает данные для построения запросов.
+    Пароль хэшируется один раз для всех пользователей.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from app_ads.models import Ad, Review
+    from app_users.models import CustomUser
+
+    with transaction.atomic():
+        existing = CustomUser.objects.filter(email__endswith=EMAIL_DOMAIN)
+        password = make_password(PASSWORD)
+        CustomUser.objects.bulk_create(
+            [
+                CustomUser(
+                    email=EMAIL_TEMPLATE.format(index),
+                    password=password,
+                    first_name="Load",
+                    last_name=f"Test{index}",
+                    phone="+7(900)000-00-00",
+                )
+                for index in range(existing.count(), users)
+            ],
+            batch_size=1000,
+        )
+        user_list = list(existing.order_by("pk")[:users])
+
+        own_ads = Ad.objects.filter(author__email__endswith=EMAIL_DOMAIN)
+        Ad.objects.bulk_create(
+            [
+                Ad(
+                    title=make_title(rng),
+                    price=rng.randint(100, 500000),
+                    description=make_description(rng),
+                    author=rng.choice(user_list),
+                )
+                for _ in range(own_ads.count(), ads)
+            ],
+            batch_size=1000,
+        )
+        ad_ids = list(Ad.get_visible_ads().values_list("pk", flat=True))
+
+        own_reviews = Review.objects.filter(author__email__endswith=EMAIL_DOMAIN)
+        new_reviews = [
+            Review(
+                text=f"Отзыв о товаре: {rng.choice(ADJECTIVES)}",
+                author=rng.choice(user_list),
+                ad_id=rng.choice(ad_ids),
+            )
+            for _ in range(own_reviews.count(), reviews)
+        ]
+        Review.objects.bulk_create(new_reviews, batch_size=1000)
+        Ad.recompute_review_counters(
+            Ad.objects.filter(pk__in={review.ad_id for review in new_reviews})
+        )
+
+    return {
+        "emails": [user.email for user in user_list],
+        "tokens": [str(AccessToken.for_user(user)) for user in user_list[:100]],
+        "ad_ids": ad_ids,
+        "counts": {
+            "users": len(user_list),
+            "ads": len(ad_ids),
+            "reviews": own_reviews.count(),
+        },
+    }
+
+
+def cleanup() -> None:
+    """
+    Удаляет тестовых пользователей вместе с их объявлениями и отзывами
+    и пересчитывает счетчики отзывов остальных объявлений.
+    """
+    from app_ads.cache import bump_ads_version
+    from app_ads.models import Ad, Review
+    from app_users.models import CustomUser
+
+    users = CustomUser.objects.filter(email__endswith=EMAIL_DOMAIN)
+    ad_ids = set(
+        Review.objects.filter(author__in=users)
+        .exclude(ad__author__in=users)
+        .values_list("ad_id", flat=True)
+    )
+    users.delete()
+    Ad.recompute_review_counters(Ad.objects.filter(pk__in=ad_ids))
+    bump_ads_version()
+
+
+def json_body(data: Dict[str, Any]) -> bytes:
+    return json.dumps(data, ensure_ascii=False).encode()
+
+
+def authorization(rng: random.Random, data: Dict[str, Any]) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {rng.choice(data['tokens'])}"}
+
+
+def feed(rng: random.Random, data: Dict[str, Any]) -> LoadRequest:
+    params = {"page": rng.randint(1, max(min(len(data["ad_ids"]) // 4, 20), 1))}
+    if rng.random() < 0.25:
+        params["ordering"] = rng.choice(["price", "-price"])
+    return "feed", "GET", f"/api/ads/?{urlencode(params)}", {}, b""
+
+
+def search(rng: random.Random, data: Dict[str, Any]) -> LoadRequest:
+    query = urlencode({"q": rng.choice(ITEMS)})
+    return "search", "GET", f"/api/ads/?{query}", {}, b""
+
+
+def detail(rng: random.Random, data: Dict[str, Any]) -> LoadRequest:
+    path = f"/api/ads/{rng.choice(data['ad_ids'])}/"
+    return "detail", "GET", path, authorization(rng, data), b""
+
+
+def reviews(rng: random.Random, data: Dict[str, Any]) -> LoadRequest:
+    path = f"/api/ads/{rng.choice(data['ad_ids'])}/comments/"
+    return "reviews", "GET", path, authorization(rng, data), b""
+
+
+def login(rng: random.Random, data: Dict[str, Any]) -> LoadRequest:
+    body = json_body({"email": rng.choice(data["emails"]), "password": PASSWORD})
+    return "login", "POST", "/api/token/", {}, body
+
+
+def create_ad(rng: random.Random, data: Dict[str, Any]) -> LoadRequest:
+    body = json_body(
+        {
+            "title": make_title(rng),
+            "price": rng.randint(100, 500000),
+            "description": make_description(rng),
+        }
+    )
+    return "create_ad", "POST", "/api/ads/", authorization(rng, data), body
+
+
+def create_review(rng: random.Random, data: Dict[str, Any]) -> LoadRequest:
+    path = f"/api/ads/{rng.choice(data['ad_ids'])}/comments/"
+    body = json_body({"text": f"Отзыв: {rng.choice(ADJECTIVES)}"})
+    return "create_review", "POST", path, authorization(rng, data), body
+
+
+REQUEST_BUILDERS: Dict[str, Callable[[random.Random, Dict[str, Any]], LoadRequest]] = {
+    "feed": feed,
+    "search": search,
+    "detail": detail,
+    "reviews": reviews,
+    "login": login,
+    "create_ad": create_ad,
+    "create_review": create_review,
+}
+
+
+def make_request_factory(
+    mix: Dict[str, int], data: Dict[str, Any], clients: int, rng: random.Random
+) -> Callable[[], LoadRequest]:
+    """
+    Возвращает функцию, строящую случайный запрос по профилю нагрузки.
+    :param mix: Веса эндпоинтов.
+    :param data: Данные из seed().
+    :param clients: Количество различных IP-адресов клиентов.
+    :param rng: Генератор случайных чисел.
+    """
+    names: List[str] = list(mix)
+    weights = [mix[name] for name in names]
+    ips = [
+        f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+        for index in range(clients)
+    ]
+    host = os.getenv("HOST", "127.0.0.1")
+
+    def make_request() -> LoadRequest:
+        name = rng.choices(names, weights)[0]
+        _, method, path, headers, body = REQUEST_BUILDERS[name](rng, data)
+        headers = {"Host": host, "X-Forwarded-For": rng.choice(ips), **headers}
+        if body:
+            headers["Content-Type"] = "application/json"
+        return name, method, path, headers, body
+
+    return make_request
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--ads", type=int, default=2000)
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument(
+        "--mix", type=parse_mix, default=DEFAULT_MIX, help=f"По умолчанию {DEFAULT_MIX}"
+    )
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument(
+        "--clients", type=int, default=1000, help="Различных IP-адресов"
+    )
+    parser.add_argument("--server", choices=list(SERVER_APPS), default="wsgi")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, help="Порт уже запущенного сервера")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Файл для сохранения результата")
+    parser.add_argument(
+        "--cleanup", action="store_true", help="Удалить тестовые данные после нагрузки"
+    )
+    options = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    import django
+
+    django.setup()
+
+    rng = random.Random(options.seed)
+    data = seed(options.users, options.ads, options.reviews, rng)
+    make_request = make_request_factory(options.mix, data, options.clients, rng)
+
+    port, process = options.port, None
+    if port is None:
+        port = get_free_port()
+        process = start_server(SERVER_APPS[options.server], port, options.workers)
+    try:
+        if options.warmup:
+            asyncio.run(
+                run_load(port, make_request, options.warmup, options.concurrency)
+            )
+        result = asyncio.run(
+            run_load(port, make_request, options.requests, options.concurrency)
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if options.cleanup:
+            cleanup()
+
+    results = {
+        "server": options.server if process is not None else f"127.0.0.1:{port}",
+        "workers": options.workers if process is not None else None,
+        "mix": options.mix,
+        "data": data["counts"],
+        **result,
+    }
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if options.output:
+        with open(options.output, "w") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
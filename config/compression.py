@@ -0,0 +1,223 @@
+import zlib
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+GZIP_MAX_RANDOM_BYTES = 100
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_CONTENT_TYPES = (
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """
+    Проверяет, имеет ли смысл сжимать содержимое такого типа:
+    текст, JSON, XML, JavaScript и SVG. Изображения и архивы уже сжаты.
+    :param content_type: Значение заголовка Content-Type.
+    """
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type.endswith(("+json", "+xml"))
+        or media_type in COMPRESSIBLE_CONTENT_TYPES
+    )
+
+
+def get_available_encodings() -> Dict[str, Callable[[], "StreamCompressor"]]:
+    """
+    Возвращает поддерживаемые кодировки в порядке предпочтения.
+    brotli сжимает JSON и текст сильнее gzip, но доступен, только если установлен Brotli.
+    """
+    encodings = {"gzip": GzipStreamCompressor}
+    if brotli is not None:
+        encodings = {"br": BrotliStreamCompressor, **encodings}
+    return encodings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Выбирает кодировку ответа по заголовку Accept-Encoding с учетом весов (q).
+    При равных весах предпочитается br.
+    :param accept_encoding: Значение заголовка Accept-Encoding.
+    :return: 'br', 'gzip' или None, если клиент не принимает сжатые ответы.
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in get_available_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class StreamCompressor:
+    """
+    Потоковое сжатие: каждый фрагмент сжимается и сбрасывается сразу,
+    поэтому клиент получает данные без ожидания конца ответа.
+    """
+
+    def compress(self, chunk: bytes) -> bytes:
+        """
+        Сжимает очередной фрагмент.
+        :param chunk: Фрагмент содержимого.
+        """
+        raise NotImplementedError
+
+    def finish(self) -> bytes:
+        """
+        Завершает поток сжатых данных.
+        """
+        raise NotImplementedError
+
+
+class GzipStreamCompressor(StreamCompressor):
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(
+            GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliStreamCompressor(StreamCompressor):
+    def __init__(self) -> None:
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def compress_content(content: bytes, encoding: str) -> bytes:
+    """
+    Сжимает содержимое ответа целиком.
+    Для gzip, как и в GZipMiddleware, в заголовок добавляется имя файла
+    случайной длины, что затрудняет атаку BREACH.
+    :param content: Содержимое ответа.
+    :param encoding: 'br' или 'gzip'.
+    """
+    if encoding == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return compress_string(content, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+def compress_iterator(chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Сжимает содержимое потокового ответа.
+    :param chunks: Фрагменты содержимого.
+    :param encoding: 'br' или 'gzip'.
+    """
+    compressor = get_available_encodings()[encoding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_iterator(
+    chunks: AsyncIterator[bytes], encoding: str
+) -> AsyncIterator[bytes]:
+    """
+    Сжимает содержимое асинхронного потокового ответа.
+    :param chunks: Фрагменты содержимого.
+    :param encoding: 'br' или 'gzip'.
+    """
+    compressor = get_available_encodings()[encoding]()
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжимает ответы алгоритмом brotli или gzip в зависимости от заголовка Accept-Encoding.
+    Сжимаются только текстовые типы содержимого (JSON, HTML, CSS, JavaScript, SVG),
+    обычные ответы - не короче COMPRESSION_MIN_SIZE байт и только если сжатие
+    уменьшает размер. Потоковые ответы, в том числе асинхронные, сжимаются по мере передачи.
+    Строгий ETag становится слабым (W/"..."), как в GZipMiddleware:
+    условные запросы сравнивают ETag без учета слабости.
+    """
+
+    def process_response(
+        self, request: HttpRequest, response: HttpResponseBase
+    ) -> HttpResponseBase:
+        if response.has_header("Content-Encoding") or not is_compressible(
+            response.get("Content-Type")
+        ):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_iterator(
+                    response.streaming_content, encoding
+                )
+            else:
+                response.streaming_content = compress_iterator(
+                    response.streaming_content, encoding
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed_content = compress_content(response.content, encoding)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
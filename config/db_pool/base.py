@@ -0,0 +1,92 @@
+from functools import partial
+from typing import Any, Dict, Optional
+
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from .pool import ConnectionPool, close_pools, get_pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """
+    Создание и удаление тестовой базы данных с учетом пула соединений.
+    """
+
+    def _destroy_test_db(self, test_database_name: str, verbosity: int) -> None:
+        """
+        Закрывает соединения пула с тестовой базой данных перед ее удалением:
+        PostgreSQL не удаляет базу данных, к которой есть подключения.
+        """
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Бэкенд PostgreSQL, который берет соединения из пула процесса
+    и возвращает их в пул вместо закрытия.
+    Параметры пула задаются ключом POOL настроек базы данных:
+    SIZE - максимальное количество соединений (0 отключает пул),
+    TIMEOUT - время ожидания свободного соединения в секундах,
+    MAX_LIFETIME - время жизни соединения в секундах,
+    HEALTH_CHECK_INTERVAL - время простоя в секундах,
+    после которого соединение проверяется перед выдачей.
+    """
+
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.pool: Optional[ConnectionPool] = None
+
+    def get_pool(self, conn_params: Dict[str, Any]) -> Optional[ConnectionPool]:
+        """
+        Возвращает пул соединений для параметров подключения.
+        :param conn_params: Параметры подключения.
+        :return: Пул или None, если пул отключен.
+        """
+        options = self.settings_dict.get("POOL") or {}
+        if not options.get("SIZE"):
+            return None
+        return get_pool(
+            self.alias,
+            tuple(sorted(conn_params.items())),
+            lambda: ConnectionPool(
+                connect=partial(
+                    super(DatabaseWrapper, self).get_new_connection, conn_params
+                ),
+                size=options["SIZE"],
+                timeout=options.get("TIMEOUT", 5),
+                max_lifetime=options.get("MAX_LIFETIME"),
+                health_check_interval=options.get("HEALTH_CHECK_INTERVAL"),
+            ),
+        )
+
+    def get_new_connection(self, conn_params: Dict[str, Any]) -> Any:
+        """
+        Выдает соединение из пула. Новые соединения открываются
+        и настраиваются стандартным бэкендом PostgreSQL.
+        :param conn_params: Параметры подключения.
+        """
+        self.pool = self.get_pool(conn_params)
+        if self.pool is None:
+            return super().get_new_connection(conn_params)
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return self.pool.acquire()
+
+    def _close(self) -> None:
+        """
+        Возвращает соединение в пул.
+        Соединение, закрываемое внутри транзакции, в пул не возвращается.
+        """
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                self.pool.discard(self.connection)
+            else:
+                self.pool.release(self.connection)
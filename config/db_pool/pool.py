@@ -0,0 +1,300 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from psycopg2 import Error as DatabaseError
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PooledConnection:
+    """
+    Соединение из пула с моментом открытия и последнего использования.
+    """
+
+    __slots__ = ("connection", "created_at", "last_used_at")
+
+    def __init__(self, connection: Any) -> None:
+        self.connection = connection
+        self.created_at = self.last_used_at = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений с базой данных внутри процесса.
+    Соединения открываются по мере необходимости, но не больше size одновременно.
+    Если свободных соединений нет, поток ждет освобождения соединения не дольше timeout.
+    Соединение, простоявшее дольше health_check_interval, перед выдачей проверяется
+    запросом SELECT 1, соединение старше max_lifetime закрывается.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int,
+        timeout: float,
+        max_lifetime: Optional[float] = None,
+        health_check_interval: Optional[float] = None,
+    ) -> None:
+        """
+        :param connect: Функция, открывающая новое соединение.
+        :param size: Максимальное количество открытых соединений.
+        :param timeout: Максимальное время ожидания свободного соединения в секундах.
+        :param max_lifetime: Максимальное время жизни соединения в секундах.
+        :param health_check_interval: Время простоя в секундах,
+        после которого соединение проверяется перед выдачей.
+        """
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self._condition = threading.Condition()
+        self._idle = deque()
+        self._in_use = {}
+        self._opened = 0
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "errors": 0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+        }
+
+    def acquire(self) -> Any:
+        """
+        Выдает соединение из пула, при необходимости открывает новое.
+        Последним возвращенное соединение выдается первым,
+        поэтому редко используемые соединения успевают закрыться по max_lifetime.
+        :raises OperationalError: Если свободное соединение не появилось за timeout.
+        """
+        started_at = time.monotonic()
+        deadline = started_at + self.timeout
+        waited = False
+        while True:
+            with self._condition:
+                while not self._idle and self._opened >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise OperationalError(
+                            f"Не удалось получить соединение из пула за {self.timeout} с: "
+                            f"открыто {self._opened} из {self.size}."
+                        )
+                    if not waited:
+                        self._stats["waits"] += 1
+                        waited = True
+                    self._condition.wait(remaining)
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    pooled = None
+                    self._opened += 1
+
+            if pooled is None:
+                try:
+                    pooled = PooledConnection(self.connect())
+                except Exception:
+                    with self._condition:
+                        self._opened -= 1
+                        self._stats["errors"] += 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self._stats["connections_opened"] += 1
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                continue
+
+            with self._condition:
+                self._in_use[id(pooled.connection)] = pooled
+                self._stats["checkouts"] += 1
+                self._stats["wait_time"] += time.monotonic() - started_at
+            return pooled.connection
+
+    def release(self, connection: Any) -> None:
+        """
+        Возвращает соединение в пул.
+        Незавершенная транзакция откатывается, а закрытое, сломанное
+        или устаревшее соединение закрывается, освобождая место для нового.
+        :param connection: Соединение, полученное методом acquire.
+        """
+        with self._condition:
+            pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            connection.close()
+            return
+
+        if not self._reset(pooled) or self._is_expired(pooled):
+            self._discard(pooled)
+            return
+
+        pooled.last_used_at = time.monotonic()
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    def discard(self, connection: Any) -> None:
+        """
+        Закрывает соединение, полученное методом acquire, не возвращая его в пул.
+        :param connection: Соединение.
+        """
+        with self._condition:
+            pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            connection.close()
+        else:
+            self._discard(pooled)
+
+    def close(self) -> None:
+        """
+        Закрывает все свободные соединения пула.
+        Выданные соединения закрываются при возврате, если они устарели.
+        """
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Возвращает метрики пула: накопительные счетчики выдач соединений, ожиданий,
+        суммарного времени ожидания, превышений timeout, ошибок, открытых
+        и закрытых соединений, а также текущее количество соединений.
+        """
+        with self._condition:
+            return {
+                "size": self.size,
+                "opened": self._opened,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                **self._stats,
+            }
+
+    def _is_expired(self, pooled: PooledConnection) -> bool:
+        """
+        Проверяет, превышено ли максимальное время жизни соединения.
+        :param pooled: Соединение из пула.
+        """
+        return (
+            self.max_lifetime is not None
+            and time.monotonic() - pooled.created_at > self.max_lifetime
+        )
+
+    def _is_usable(self, pooled: PooledConnection) -> bool:
+        """
+        Проверяет свободное соединение перед выдачей.
+        :param pooled: Соединение из пула.
+        """
+        connection = pooled.connection
+        if connection.closed or self._is_expired(pooled):
+            return False
+        if (
+            self.health_check_interval is None
+            or time.monotonic() - pooled.last_used_at < self.health_check_interval
+        ):
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return self._reset(pooled)
+        except DatabaseError:
+            with self._condition:
+                self._stats["errors"] += 1
+            return False
+
+    def _reset(self, pooled: PooledConnection) -> bool:
+        """
+        Откатывает незавершенную транзакцию соединения.
+        :param pooled: Соединение из пула.
+        :return: True, если соединение можно использовать повторно.
+        """
+        connection = pooled.connection
+        if connection.closed:
+            return False
+        try:
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            return connection.get_transaction_status() == TRANSACTION_STATUS_IDLE
+        except DatabaseError:
+            with self._condition:
+                self._stats["errors"] += 1
+            return False
+
+    def _discard(self, pooled: PooledConnection) -> None:
+        """
+        Закрывает соединение и освобождает его место в пуле.
+        :param pooled: Соединение из пула.
+        """
+        try:
+            pooled.connection.close()
+        except DatabaseError:
+            pass
+        with self._condition:
+            self._opened -= 1
+            self._stats["connections_closed"] += 1
+            self._condition.notify()
+
+
+_pools: Dict[Any, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(
+    alias: str, key: Any, factory: Callable[[], ConnectionPool]
+) -> ConnectionPool:
+    """
+    Возвращает пул соединений процесса, при первом обращении создает его.
+    Пулы различаются псевдонимом базы данных и параметрами подключения,
+    поэтому, например, тестовая база данных получает отдельный пул.
+    :param alias: Псевдоним базы данных из DATABASES.
+    :param key: Параметры подключения, приведенные к хэшируемому виду.
+    :param factory: Функция, создающая пул.
+    """
+    with _pools_lock:
+        pool = _pools.get((alias, key))
+        if pool is None:
+            pool = _pools[(alias, key)] = factory()
+        return pool
+
+
+def close_pools(dbname: Optional[str] = None) -> None:
+    """
+    Закрывает свободные соединения пулов.
+    :param dbname: Имя базы данных. Если не указано, закрываются соединения всех пулов.
+    """
+    with _pools_lock:
+        pools = [
+            pool
+            for (_, key), pool in _pools.items()
+            if dbname is None or dict(key).get("dbname") == dbname
+        ]
+    for pool in pools:
+        pool.close()
+
+
+def get_pools_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Возвращает метрики всех пулов процесса, сгруппированные по псевдониму базы данных.
+    Метрики пулов одного псевдонима с разными параметрами подключения суммируются,
+    size - максимальный размер среди них.
+    """
+    stats = {}
+    with _pools_lock:
+        pools = list(_pools.items())
+    for (alias, _), pool in pools:
+        pool_stats = pool.get_stats()
+        if alias in stats:
+            for name, value in pool_stats.items():
+                if name == "size":
+                    stats[alias][name] = max(stats[alias][name], value)
+                else:
+                    stats[alias][name] += value
+        else:
+            stats[alias] = pool_stats
+    return stats
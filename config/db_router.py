@@ -0,0 +1,176 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional, Type
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.http import HttpRequest, HttpResponseBase
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+PRIMARY_DB = "default"
+STICKY_KEY = "db:primary:user:{}"
+VALIDATED_TOKEN_ATTR = "validated_jwt"
+
+use_replicas = ContextVar("use_replicas", default=False)
+
+authentication = JWTAuthentication()
+
+
+class ReplicaRouter:
+    """
+    Маршрутизатор запросов к базам данных.
+    Запись всегда выполняется в основную базу данных, а чтение - в случайную
+    реплику из DATABASE_REPLICAS, но только при обработке безопасного HTTP-запроса,
+    для которого ReplicaRoutingMiddleware разрешила чтение с реплик.
+    Остальное чтение (команды управления, небезопасные запросы) идет в основную базу.
+    """
+
+    def db_for_read(self, model: Type[Model], **hints: Any) -> str:
+        if settings.DATABASE_REPLICAS and use_replicas.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return PRIMARY_DB
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> str:
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
+        """
+        Разрешает связи между объектами, прочитанными из основной базы данных и реплик:
+        реплики содержат те же данные.
+        """
+        databases = {PRIMARY_DB, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def is_pinned_to_primary() -> bool:
+    """
+    Проверяет, что реплики настроены, но чтение в текущем запросе
+    идет из основной базы данных, например из-за закрепления пользователя.
+    Такому запросу не следует отдавать данные из кэша,
+    которые могли быть построены по отстающей реплике.
+    """
+    return bool(settings.DATABASE_REPLICAS) and not use_replicas.get()
+
+
+@contextmanager
+def read_from_primary() -> Iterator[None]:
+    """
+    Направляет чтение внутри блока в основную базу данных.
+    Используется для данных, которые кэшируются для всех пользователей:
+    страница, построенная по отстающей реплике, попала бы в кэш под новой версией
+    и пережила бы закрепление пользователя за основной базой данных.
+    """
+    token = use_replicas.set(False)
+    try:
+        yield
+    finally:
+        use_replicas.reset(token)
+
+
+def get_request_user_id(request: HttpRequest) -> Optional[Any]:
+    """
+    Возвращает идентификатор пользователя из JWT-токена запроса
+    без обращения к базе данных.
+    Проверенный токен сохраняется в запросе вместе с исходным токеном,
+    чтобы аутентификация DRF не проверяла его повторно.
+    :param request: HTTP-запрос.
+    :return: Идентификатор пользователя или None, если токен не передан или недействителен.
+    """
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = authentication.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        # Ответ 401 на некорректный заголовок формирует аутентификация DRF.
+        return None
+    setattr(request, VALIDATED_TOKEN_ATTR, (raw_token, validated_token))
+    return validated_token.get(api_settings.USER_ID_CLAIM)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает чтение с реплик на время обработки безопасного запроса (GET, HEAD, OPTIONS).
+    После небезопасного запроса пользователь на DATABASE_REPLICA_STICKY_TIMEOUT секунд
+    закрепляется за основной базой данных, чтобы сразу видеть свои изменения
+    несмотря на отставание реплик.
+    Закрепление хранится в кэше, поэтому между процессами оно работает
+    только с общим кэшем (Redis, Memcached).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        user_id = get_request_user_id(request)
+        if request.method in self.SAFE_METHODS:
+            replicas_allowed = user_id is None or not cache.get(
+                STICKY_KEY.format(user_id)
+            )
+            token = use_replicas.set(replicas_allowed)
+            try:
+                return self.get_response(request)
+            finally:
+                use_replicas.reset(token)
+
+        response = self.get_response(request)
+        if user_id is not None:
+            stick_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        user_id = get_request_user_id(request)
+        if request.method in self.SAFE_METHODS:
+            replicas_allowed = user_id is None or not await cache.aget(
+                STICKY_KEY.format(user_id)
+            )
+            token = use_replicas.set(replicas_allowed)
+            try:
+                return await self.get_response(request)
+            finally:
+                use_replicas.reset(token)
+
+        response = await self.get_response(request)
+        if user_id is not None:
+            await cache.aset(
+                STICKY_KEY.format(user_id),
+                True,
+                settings.DATABASE_REPLICA_STICKY_TIMEOUT,
+            )
+        return response
+
+
+def stick_to_primary(user_id: Any) -> None:
+    """
+    Закрепляет пользователя за основной базой данных
+    на DATABASE_REPLICA_STICKY_TIMEOUT секунд.
+    :param user_id: Идентификатор пользователя.
+    """
+    cache.set(
+        STICKY_KEY.format(user_id), True, settings.DATABASE_REPLICA_STICKY_TIMEOUT
+    )
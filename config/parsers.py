@@ -0,0 +1,42 @@
+import codecs
+from io import BytesIO
+from typing import Any, Mapping, Optional
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON-парсер на orjson с запасным вариантом на стандартном модуле json.
+    Тело запроса, которое orjson не разобрал (ошибка в JSON, целые числа больше 64 бит),
+    разбирается стандартным JSONParser, поэтому и результат, и сообщения об ошибках
+    совпадают с JSONParser. Тела не в UTF-8 также разбираются JSONParser.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(
+        self,
+        stream: Any,
+        media_type: Optional[str] = None,
+        parser_context: Optional[Mapping[str, Any]] = None,
+    ) -> Any:
+        """
+        Разбирает тело запроса в формате JSON.
+        :param stream: Поток с телом запроса.
+        :param media_type: Тип содержимого запроса.
+        :param parser_context: Контекст парсера.
+        """
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != "utf-8" or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        content = stream.read()
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(content), media_type, parser_context)
@@ -0,0 +1,67 @@
+from typing import Any, Mapping, Optional
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson с запасным вариантом на стандартном модуле json.
+    Типы, которые orjson не сериализует сам (Decimal, даты и время, ленивые строки
+    переводов, QuerySet), преобразуются кодировщиком DRF, поэтому ответ совпадает
+    с ответом JSONRenderer. Отличаться может только запись чисел с плавающей точкой
+    в экспоненциальной форме (1e-5 вместо 1e-05).
+    Если orjson не установлен, запрошен отступ (например, Browsable API)
+    или данные не сериализуются orjson (целые числа больше 64 бит),
+    используется стандартный JSONRenderer.
+    """
+
+    encoder = JSONRenderer.encoder_class()
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        """
+        Сериализует данные в JSON.
+        :param data: Данные ответа.
+        :param accepted_media_type: Согласованный тип содержимого.
+        :param renderer_context: Контекст рендерера.
+        """
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(
+                data, default=self.encoder.default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Как и JSONRenderer, экранируем U+2028 и U+2029: JSON остается подмножеством JavaScript.
+        if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+            content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return content
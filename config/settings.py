@@ -1,6 +1,7 @@
 import os
 from datetime import timedelta
 from pathlib import Path
+from urllib.parse import urlsplit
 
 from dotenv import load_dotenv
 
@@ -21,6 +22,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_yasg",
     "corsheaders",
@@ -34,6 +36,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "config.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -41,6 +44,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "config.db_router.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -65,15 +69,75 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "config.db_pool",
         "NAME": os.getenv("POSTGRES_DB"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        "OPTIONS": {
+            "options": "-c pg_trgm.word_similarity_threshold=0.4",
+        },
+        "CONN_MAX_AGE": int(os.getenv("CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": True,
+        "POOL": {
+            "SIZE": int(os.getenv("DB_POOL_SIZE", 10)),
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", 5)),
+            "MAX_LIFETIME": 30 * 60,
+            "HEALTH_CHECK_INTERVAL": 30,
+        },
+    }
+}
+
+# Реплики только для чтения: POSTGRES_REPLICAS=host[:port][/dbname],...
+DATABASE_REPLICAS = []
+for number, replica in enumerate(os.getenv("POSTGRES_REPLICAS", "").split(","), 1):
+    if not replica.strip():
+        continue
+    location = urlsplit(f"//{replica.strip()}")
+    alias = f"replica_{number}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "NAME": location.path.lstrip("/") or DATABASES["default"]["NAME"],
+        "HOST": location.hostname,
+        "PORT": location.port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["config.db_router.ReplicaRouter"]
+DATABASE_REPLICA_STICKY_TIMEOUT = 10
+
+# LocMemCache подходит только для разработки и тестов: у каждого процесса gunicorn
+# свой кэш, поэтому сброс версии списка объявлений, закрепление за основной базой
+# данных и ограничения частоты запросов действуют только в одном процессе.
+# В эксплуатации задайте общий кэш через CACHE_BACKEND и CACHE_LOCATION
+# (например, django.core.cache.backends.redis.RedisCache).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "ads_board"),
     }
 }
 
+ADS_LIST_CACHE_TIMEOUT = 60
+
+ADS_BULK_CREATE_MAX_ITEMS = 5000
+ADS_BULK_CREATE_BATCH_SIZE = 500
+
+MODERATION_BATCH_SIZE = 1000
+
+IMAGE_RENDITION_WIDTHS = [320, 640, 1280]
+IMAGE_RENDITION_WORKERS = int(os.getenv("IMAGE_RENDITION_WORKERS", 2))
+
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, "uploads")
+CHUNKED_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 1024 * 1024
+CHUNKED_UPLOAD_EXPIRATION = 24 * 60 * 60
+IMAGE_UPLOAD_MAX_PIXELS = 50_000_000
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -105,6 +169,13 @@ USE_TZ = True
 STATIC_URL = "django_static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "django_static")
 
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "config.storage.CompressedStaticFilesStorage"},
+}
+
+COMPRESSION_MIN_SIZE = 1024
+
 MEDIA_URL = "django_media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "django_media")
 
@@ -127,14 +198,46 @@ SWAGGER_SETTINGS = {
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "app_users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "config.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    "NUM_PROXIES": 1,
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "20/min",
+        "login_account": "5/min",
+        "registration_ip": "20/hour",
+        "registration_account": "10/hour",
+        "ad_create_ip": "100/hour",
+        "ad_create_account": "30/hour",
+        "ad_bulk_create_ip": "20000/hour",
+        "ad_bulk_create_account": "10000/hour",
+        "review_create_ip": "200/hour",
+        "review_create_account": "60/hour",
+    },
 }
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+THROTTLE_CACHE = "default"
+
+PAGINATION_EXACT_COUNT_THRESHOLD = 10000
+PAGINATION_COUNT_CACHE_TIMEOUT = 30
+
+EMAIL_BACKEND = "app_users.email.OutboxEmailBackend"
+EMAIL_OUTBOX_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_LEASE_TIMEOUT = 300
+EMAIL_TIMEOUT = 10
 EMAIL_HOST = "smtp.yandex.ru"
 EMAIL_PORT = 465
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
@@ -143,6 +246,10 @@ EMAIL_USE_TLS = False
 EMAIL_USE_SSL = True
 DEFAULT_FROM_EMAIL = os.getenv("EMAIL_HOST_USER")
 
+USER_CACHE_TIMEOUT = 60
+USER_CACHE_LOCAL_TIMEOUT = 5
+USER_CACHE_LOCAL_SIZE = 1024
+
 DJOSER = {
     "PASSWORD_RESET_CONFIRM_URL": "password/reset/confirm/{uid}/{token}/",
     "EMAIL": {"password_reset": "app_users.email.PasswordResetEmail"},
@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import tempfile
+from typing import Any, Dict, Iterator, Tuple
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+
+from .compression import is_compressible
+
+STATIC_GZIP_LEVEL = 9
+BLOBS_DIR = "blobs"
+
+
+def get_static_compressors() -> Dict[str, Any]:
+    """
+    Возвращает функции сжатия статических файлов по расширению сжатой копии.
+    Сжатие выполняется один раз при сборке, поэтому используется максимальная степень.
+    Копии .br не создаются: образ nginx собран без модуля ngx_brotli
+    и не умеет их отдавать (brotli_static).
+    """
+    return {
+        ".gz": lambda content: gzip.compress(content, STATIC_GZIP_LEVEL, mtime=0)
+    }
+
+
+class CompressedStaticFilesStorage(StaticFilesStorage):
+    """
+    Хранилище статических файлов, которое после collectstatic записывает рядом
+    с текстовыми файлами (CSS, JavaScript, JSON, SVG, HTML) не короче
+    COMPRESSION_MIN_SIZE байт их сжатые копии .gz.
+    nginx отдает готовые копии (gzip_static) без сжатия на лету.
+    Копия не записывается, если сжатие не уменьшает размер файла.
+    """
+
+    def post_process(
+        self, paths: Dict[str, Tuple[Any, str]], dry_run: bool = False, **options
+    ) -> Iterator[Tuple[str, str, bool]]:
+        """
+        Создает сжатые копии собранных файлов.
+        :param paths: Собранные файлы: путь -> (хранилище-источник, путь в источнике).
+        :param dry_run: Не записывать файлы.
+        :return: Итератор (исходный путь, путь результата, обработан ли файл).
+        """
+        if dry_run:
+            return
+        compressors = get_static_compressors()
+        for name in paths:
+            if not is_compressible(mimetypes.guess_type(name)[0]):
+                continue
+            with self.open(name) as file:
+                content = file.read()
+            if len(content) < settings.COMPRESSION_MIN_SIZE:
+                continue
+
+            processed = False
+            for extension, compress in compressors.items():
+                compressed_name = name + extension
+                if self.exists(compressed_name):
+                    self.delete(compressed_name)
+                compressed = compress(content)
+                if len(compressed) < len(content):
+                    self._save(compressed_name, ContentFile(compressed))
+                    processed = True
+            yield name, name, processed
+
+
+def get_blob_name(digest: str, extension: str) -> str:
+    """
+    Возвращает имя файла в хранилище по хэшу его содержимого.
+    Файлы раскладываются по подкаталогам по первым символам хэша.
+    :param digest: SHA-256 содержимого файла.
+    :param extension: Расширение файла с точкой.
+    """
+    return posixpath.join(BLOBS_DIR, digest[:2], f"{digest}{extension.lower()}")
+
+
+def is_blob_name(name: str) -> bool:
+    """
+    Проверяет, хранится ли файл в контентно-адресуемом хранилище.
+    :param name: Имя файла.
+    """
+    return bool(name) and name.startswith(f"{BLOBS_DIR}/")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище, в котором имя файла - хэш SHA-256 его содержимого.
+    Хэш вычисляется во время потоковой записи загруженного файла,
+    одинаковые файлы хранятся в единственном экземпляре.
+    Содержимое файла по адресу никогда не меняется,
+    поэтому такие файлы можно кэшировать на клиенте бессрочно.
+    """
+
+    def get_available_name(self, name: str, max_length: int = None) -> str:
+        """
+        Возвращает имя без изменений: итоговое имя определяется содержимым файла.
+        """
+        return name
+
+    def _save(self, name: str, content: File) -> str:
+        """
+        Сохраняет файл под именем, полученным из хэша его содержимого.
+        Если такой файл уже есть, новая копия не записывается.
+        Временный файл удаляется и при ошибке записи или переименования.
+        :param name: Исходное имя файла, используется только его расширение.
+        :param content: Содержимое файла.
+        :return: Имя сохраненного файла.
+        """
+        directory = self.path(BLOBS_DIR)
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        temp_file = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+        try:
+            with temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            blob_name = get_blob_name(digest.hexdigest(), os.path.splitext(name)[1])
+            path = self.path(blob_name)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_file.name, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(temp_file.name):
+                os.remove(temp_file.name)
+        return blob_name
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def get_content_addressed_storage() -> ContentAddressedStorage:
+    """
+    Возвращает контентно-адресуемое хранилище для полей ImageField.
+    """
+    return content_addressed_storage
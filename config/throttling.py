@@ -0,0 +1,286 @@
+import hashlib
+import math
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from rest_framework.views import APIView
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 20
+LOCK_RETRY_DELAY = 0.005
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """
+    Разбирает ограничение частоты запросов в формате DRF, например '5/min'.
+    :param rate: Ограничение: количество запросов и период (s, min, hour, day).
+    :return: Емкость корзины и скорость ее пополнения в токенах в секунду.
+    """
+    try:
+        num, period = rate.split("/")
+        capacity = int(num)
+        duration = PERIODS[period[0]]
+    except (ValueError, KeyError, IndexError):
+        raise ImproperlyConfigured(f"Некорректное ограничение частоты запросов: {rate}")
+    return capacity, capacity / duration
+
+
+class ThrottleLockUnavailable(APIException):
+    """
+    Корзины клиента дольше LOCK_ATTEMPTS попыток изменяет другой запрос.
+    Лимит клиента при этом не исчерпан, поэтому ответ - 503, а не 429.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Сервис временно перегружен, повторите запрос позже."
+    default_code = "throttle_lock_unavailable"
+    wait = LOCK_TIMEOUT
+
+
+def acquire_lock(cache: BaseCache, lock_key: str) -> bool:
+    """
+    Берет блокировку атомарным cache.add, повторяя попытки LOCK_ATTEMPTS раз.
+    :param cache: Кэш, в котором хранится состояние корзин.
+    :param lock_key: Ключ блокировки.
+    :return: False, если блокировку так и не удалось взять.
+    """
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock_key, True, LOCK_TIMEOUT):
+            return True
+        time.sleep(LOCK_RETRY_DELAY)
+    return False
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket.
+    Корзина вмещает N токенов и равномерно пополняется N токенами за период,
+    каждый запрос забирает cost токенов (по умолчанию один): допускается всплеск
+    до N токенов подряд, а в среднем - не больше N токенов за период.
+    Ограничения задаются в DEFAULT_THROTTLE_RATES по имени '<scope>_<kind>',
+    состояние корзин хранится в кэше THROTTLE_CACHE.
+    Корзина изменяется под блокировкой, взятой атомарным cache.add,
+    поэтому одновременные запросы одного клиента не тратят один и тот же токен.
+    Несколько корзин одного действия проверяются вместе через ScopedThrottle.
+    """
+
+    kind = None
+
+    def __init__(self, scope: str, cost: int = 1) -> None:
+        """
+        :param scope: Имя ограничиваемого действия, например 'login'.
+        :param cost: Количество токенов, которое забирает запрос.
+        """
+        self.scope = scope
+        self.cost = cost
+        self.wait_time = None
+        self.state = None
+
+    @property
+    def cache(self) -> BaseCache:
+        """
+        Возвращает кэш, в котором хранится состояние корзин.
+        """
+        return caches[settings.THROTTLE_CACHE]
+
+    def get_rate(self) -> str:
+        """
+        Возвращает ограничение частоты запросов из настроек.
+        """
+        name = f"{self.scope}_{self.kind}"
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[name]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f"Не задано ограничение частоты запросов для '{name}'."
+            )
+
+    def get_ident_key(self, request: Request) -> Optional[str]:
+        """
+        Возвращает идентификатор клиента или None, если запрос не ограничивается.
+        :param request: HTTP-запрос.
+        """
+        raise NotImplementedError
+
+    def get_key(self, request: Request) -> Optional[str]:
+        """
+        Возвращает ключ корзины клиента в кэше или None, если запрос не ограничивается.
+        :param request: HTTP-запрос.
+        """
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return None
+        return f"throttle:{self.scope}:{self.kind}:{ident}"
+
+    def allow_request(self, request: Request, view: APIView) -> bool:
+        """
+        Забирает токены из корзины клиента.
+        :param request: HTTP-запрос.
+        :param view: Представление.
+        :return: False, если в корзине недостаточно токенов.
+        """
+        return ScopedThrottle([self]).allow_request(request, view)
+
+    def check(self, key: str) -> bool:
+        """
+        Пополняет корзину и проверяет, хватает ли в ней cost токенов,
+        ничего не сохраняя в кэш. Вызывается под блокировкой корзины.
+        Запрос, которому нужно больше токенов, чем вмещает корзина,
+        не выполнится никогда, поэтому Retry-After для него не передается.
+        :param key: Ключ корзины в кэше.
+        :return: False, если в корзине недостаточно токенов.
+        """
+        capacity, refill_rate = parse_rate(self.get_rate())
+        now = time.time()
+        tokens, updated_at = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+        self.state = (tokens, now, capacity, refill_rate)
+
+        if tokens >= self.cost:
+            return True
+        if self.cost <= capacity:
+            self.wait_time = (self.cost - tokens) / refill_rate
+        return False
+
+    def charge(self, key: str) -> None:
+        """
+        Забирает cost токенов из проверенной методом check корзины.
+        Вызывается под той же блокировкой, что и check.
+        :param key: Ключ корзины в кэше.
+        """
+        tokens, now, capacity, refill_rate = self.state
+        tokens -= self.cost
+        timeout = math.ceil((capacity - tokens) / refill_rate)
+        self.cache.set(key, (tokens, now), timeout or 1)
+
+    def wait(self) -> Optional[float]:
+        """
+        Возвращает количество секунд до появления токена в корзине (заголовок Retry-After).
+        """
+        return self.wait_time
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Ограничение частоты запросов с одного IP-адреса.
+    Адрес за прокси определяется по X-Forwarded-For с учетом NUM_PROXIES.
+    """
+
+    kind = "ip"
+
+    def get_ident_key(self, request: Request) -> Optional[str]:
+        return self.get_ident(request)
+
+
+class AccountTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Ограничение частоты запросов к одной учетной записи: для аутентифицированного
+    пользователя - по его идентификатору, для входа и регистрации -
+    по адресу электронной почты из тела запроса.
+    """
+
+    kind = "account"
+
+    def get_ident_key(self, request: Request) -> Optional[str]:
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return f"email:{digest}"
+
+
+class ScopedThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов действия сразу несколькими корзинами,
+    например с одного IP-адреса и к одной учетной записи.
+    Все корзины блокируются и проверяются вместе, а токены забираются,
+    только если их хватает в каждой: запрос, отклоненный одной корзиной,
+    не расходует остальные.
+    """
+
+    def __init__(self, buckets: Sequence[TokenBucketThrottle]) -> None:
+        """
+        :param buckets: Корзины действия.
+        """
+        self.buckets = buckets
+        self.denied = []
+
+    @property
+    def cache(self) -> BaseCache:
+        """
+        Возвращает кэш, в котором хранится состояние корзин.
+        """
+        return caches[settings.THROTTLE_CACHE]
+
+    def allow_request(self, request: Request, view: APIView) -> bool:
+        """
+        Забирает токены из всех корзин клиента.
+        Блокировки берутся в порядке ключей, чтобы одновременные запросы
+        не ждали друг друга по кругу. Если корзины дольше LOCK_ATTEMPTS попыток
+        изменяет другой запрос, возвращается 503 (ThrottleLockUnavailable).
+        :param request: HTTP-запрос.
+        :param view: Представление.
+        :return: False, если хотя бы в одной корзине недостаточно токенов.
+        """
+        buckets = []
+        for bucket in self.buckets:
+            key = bucket.get_key(request)
+            if key is not None:
+                buckets.append((key, bucket))
+        if not buckets:
+            return True
+
+        buckets.sort(key=lambda item: item[0])
+        locked = []
+        try:
+            for key, _ in buckets:
+                if not acquire_lock(self.cache, f"{key}:lock"):
+                    raise ThrottleLockUnavailable()
+                locked.append(f"{key}:lock")
+
+            self.denied = [bucket for key, bucket in buckets if not bucket.check(key)]
+            if self.denied:
+                return False
+            for key, bucket in buckets:
+                bucket.charge(key)
+            return True
+        finally:
+            self.cache.delete_many(locked)
+
+    def wait(self) -> Optional[float]:
+        """
+        Возвращает количество секунд, через которое токенов хватит во всех
+        отклонивших запрос корзинах, или None, если этого не случится никогда.
+        """
+        waits = [bucket.wait() for bucket in self.denied]
+        if not waits or None in waits:
+            return None
+        return max(waits)
+
+
+def get_scoped_throttles(scope: Optional[str], cost: int = 1) -> List[BaseThrottle]:
+    """
+    Возвращает ограничения частоты запросов действия с одного IP-адреса
+    и к одной учетной записи.
+    :param scope: Имя ограничиваемого действия или None, если действие не ограничивается.
+    :param cost: Количество токенов, которое забирает запрос.
+    """
+    if scope is None:
+        return []
+    return [
+        ScopedThrottle(
+            [IPTokenBucketThrottle(scope, cost), AccountTokenBucketThrottle(scope, cost)]
+        )
+    ]